@@ -8,8 +8,8 @@ import glob
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from loterias.megasena import MegaSena
-from loterias.ensemble_predictor import EnsemblePredictor
+from loterias import MegaSena, Lotofacil, Quina, EnsemblePredictor
+from judge.members import DEFAULT_MEMBERS
 
 def find_snapshots(game_name, mode='auto'):
     """
@@ -50,9 +50,10 @@ def find_snapshots(game_name, mode='auto'):
     if lstm_path: 
         snapshots['lstm'] = lstm_path.replace(".keras", "")
 
-    # 3. Transformer (Optional)
+    # 3. Transformer (Optional, joins the ensemble only when a snapshot exists)
     trans_path = find_latest_in_paths("transformer", "keras")
-    # if trans_path: ... (EnsemblePredictor needs support first)
+    if trans_path:
+        snapshots['transformer'] = trans_path.replace(".keras", "")
     
     return snapshots
 
@@ -70,10 +71,8 @@ def main():
     if args.game == 'megasena':
         lottery = MegaSena()
     elif args.game == 'lotofacil':
-        from loterias.lotofacil import Lotofacil
         lottery = Lotofacil()
     elif args.game == 'quina':
-        from loterias.quina import Quina
         lottery = Quina()
     else:
         print(f"Error: Game {args.game} not supported.")
@@ -106,7 +105,8 @@ def main():
         range_min=getattr(lottery, 'range_min', 1), 
         range_max=getattr(lottery, 'range_max', 60), 
         draw_count=getattr(lottery, 'draw_count', 6), 
-        snapshot_paths=snapshot_paths
+        snapshot_paths=snapshot_paths,
+        members=DEFAULT_MEMBERS + [m for m in snapshot_paths if m not in DEFAULT_MEMBERS]
     )
 
     # Predict
@@ -7,6 +7,14 @@ from core.games.quina import Quina
 from cli.formatting import export_to_json, export_to_csv
 from core.base import ModelFactory
 
+# Number range, draw size and default bet size of each supported game
+GAME_CONFIGS = {
+    'megasena': {'min': 1, 'max': 60, 'draw': 6, 'default_play': 20},
+    'lotofacil': {'min': 1, 'max': 25, 'draw': 15, 'default_play': 20},
+    'quina': {'min': 1, 'max': 80, 'draw': 5, 'default_play': 15}
+}
+GAMES = {'megasena': MegaSena, 'lotofacil': Lotofacil, 'quina': Quina}
+
 def parse_model_args(args_list):
     """Parses a list of strings in 'key:value' format into a dictionary."""
     if not args_list:
@@ -34,7 +42,10 @@ def main():
     parser.add_argument('--backtest', action='store_true', help="Run backtesting simulation (required for ensemble backtest).")
     parser.add_argument('--draws', type=int, default=100, help="Number of past draws to backtest (default: 100).")
     parser.add_argument('--verbose', action='store_true', help="Show detailed output for every draw in backtest.")
+    parser.add_argument('--incremental', action='store_true', help="Backtest by updating the trained model draw by draw instead of retraining it (models without update support are retrained). With --ensemble, fine-tunes the LSTM online.")
+    parser.add_argument('--jobs', type=int, default=1, help="Worker processes for --backtest; tested draws are split across them (default: 1).")
     parser.add_argument('--filters', type=str, help="Statistical filters (e.g. 'sum:100-200,odd:3').")
+    parser.add_argument('--offline', action='store_true', help="Use only the locally cached draw history (never download).")
     
     # Deep Learning Arguments
     parser.add_argument('--epochs', type=int, default=50, help="Number of epochs for training Deep Learning models (default: 50).")
@@ -43,6 +54,7 @@ def main():
     parser.add_argument('--optimize', action='store_true', help="Run Genetic Optimization to find best weights for Hybrid heuristic models (Frequency, Gap, Surfing).")
     parser.add_argument('--generations', type=int, default=5, help="Number of generations for optimization (default: 5).")
     parser.add_argument('--population', type=int, default=10, help="Population size for optimization (default: 10).")
+    parser.add_argument('--grid-steps', type=int, help="With --optimize, search every combination of N evenly spaced weights instead of evolving them.")
 
     # Analysis Arguments
     parser.add_argument('--analyze', action='store_true', help="Run statistical analysis on past draws instead of predicting.")
@@ -50,6 +62,8 @@ def main():
     # Ensemble Arguments
     parser.add_argument('--ensemble', action='store_true', help="Use Ensemble Strategy (default: prediction, use --backtest for simulation).")
     parser.add_argument('--predict', action='store_true', help="DEPRECATED: Use --ensemble without arguments for prediction.")
+    parser.add_argument('--timeout', type=float, help="With --ensemble, seconds to wait for members; slower ones are dropped (tree workers are stopped, Keras/heuristic threads finish in the background).")
+    parser.add_argument('--members', type=str, help="Comma-separated ensemble members (default: mc,rf,xgb,lstm,catboost; also available: transformer).")
 
     # Snapshot Arguments
     parser.add_argument('--save-model', type=str, help="Save the trained model to the specified path.")
@@ -58,15 +72,12 @@ def main():
     # Anomaly Detection Arguments
     parser.add_argument('--validator-model', type=str, help="Path to an AutoEncoder model to validate and filter predictions.")
     parser.add_argument('--anomaly-threshold', type=float, default=0.1, help="Max anomaly score for a prediction to be accepted (default: 0.1).")
+    parser.add_argument('--candidates', type=int, default=1000, help="Candidate pool ranked by the validator when the prediction is rejected (default: 1000).")
 
     args = parser.parse_args()
     
     # Configuration and Defaults
-    defaults = {
-        'megasena': {'min': 1, 'max': 60, 'draw': 6, 'default_play': 20},
-        'lotofacil': {'min': 1, 'max': 25, 'draw': 15, 'default_play': 20},
-        'quina': {'min': 1, 'max': 80, 'draw': 5, 'default_play': 15}
-    }
+    defaults = GAME_CONFIGS
     
     if args.game not in defaults:
         print(f"Error: Game {args.game} not supported.", file=sys.stderr)
@@ -146,11 +157,7 @@ def main():
     args = parser.parse_args()
     
     # Configuration and Defaults
-    defaults = {
-        'megasena': {'min': 1, 'max': 60, 'draw': 6, 'default_play': 20},
-        'lotofacil': {'min': 1, 'max': 25, 'draw': 15, 'default_play': 20},
-        'quina': {'min': 1, 'max': 80, 'draw': 5, 'default_play': 15}
-    }
+    defaults = GAME_CONFIGS
     
     # If a sub-command was used, execute its function
     if args.command:
@@ -192,6 +199,10 @@ def main():
         print(f"Error: Minimum numbers for {args.game} is {game_config['draw']}.", file=sys.stderr)
         sys.exit(1)
 
+    if args.offline:
+        from data.manager import DataManager
+        DataManager.offline = True
+
     # Parse model args
     model_args = parse_model_args(args.model_args)
     
@@ -214,17 +225,29 @@ def main():
     else:
         handle_prediction(args, lottery, game_config, model_args, quantity)
 
+def ensemble_members(args):
+    """Parses --members; unknown names end the run with the list of available members."""
+    if not args.members:
+        return None
+    from judge.members import resolve_members
+    try:
+        return resolve_members([m.strip() for m in args.members.split(',') if m.strip()])
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
 def handle_ensemble_backtest(args, lottery, game_config, model_args):
-    from judge.backtester import EnsembleBacktester
+    from judge.backtest_ensemble import EnsembleBacktester
     
     backtester = EnsembleBacktester(
         lottery, 
         game_config['min'], 
         game_config['max'], 
         game_config['draw'], 
-        model_args=model_args
+        model_args=model_args,
+        members=ensemble_members(args)
     )
-    results = backtester.run(draws_to_test=args.draws, verbose=args.verbose)
+    results = backtester.run(draws_to_test=args.draws, verbose=args.verbose, online=args.incremental)
     
     print(json.dumps(results, indent=2, default=str))
 
@@ -245,7 +268,9 @@ def handle_ensemble_prediction(args, lottery, game_config, model_args):
         game_config['min'], 
         game_config['max'], 
         game_config['draw'], 
-        model_args=model_args
+        model_args=model_args,
+        members=ensemble_members(args),
+        timeout=args.timeout
     )
     result = predictor.predict_next(count=quantity)
     
@@ -280,7 +305,7 @@ def handle_optimization(args, lottery, game_config):
     )
     
     try:
-        best_weights = optimizer.optimize()
+        best_weights = optimizer.grid_search(args.grid_steps) if args.grid_steps else optimizer.optimize()
         w_gap, w_freq, w_surf = best_weights
         
         print("\n" + "="*40)
@@ -300,7 +325,8 @@ def handle_optimization(args, lottery, game_config):
 def handle_inspection(args):
     from ops.inspector import TrainingInspector
     
-    inspector = TrainingInspector()
+    # Summaries of finished runs are cached: only epochs logged since the last inspection are parsed
+    inspector = TrainingInspector(cache_path="data/training_log.runs.pkl")
     runs = inspector.get_runs(model_filter=args.model)
     
     if not runs:
@@ -333,7 +359,8 @@ def handle_backtest(args, lottery, game_config, model_args, quantity):
     )
     
     try:
-        results = backtester.run(draws_to_test=args.draws, prediction_size=quantity)
+        results = backtester.run(draws_to_test=args.draws, prediction_size=quantity, incremental=args.incremental,
+                                 jobs=args.jobs)
         
         # Filter output based on verbose flag
         output_results = results.copy()
@@ -422,37 +449,45 @@ def handle_prediction(args, lottery, game_config, model_args, quantity):
             print("Error: seed must be an integer.", file=sys.stderr)
             sys.exit(1)
 
-    # Generate Prediction (with Rejection Sampling)
-    max_retries = 1000
-    prediction = []
+    # Filters are solved exactly (see PredictionFilter.count): an impossible filter fails fast
+    if prediction_filter and not prediction_filter.count(game_config['min'], game_config['max'], quantity):
+        print(f"Error: No {quantity}-number combination satisfies filters '{args.filters}'.", file=sys.stderr)
+        sys.exit(1)
+
+    # Generate Prediction
+    # A prediction that misses the filters is replaced by the valid combination sharing the most
+    # numbers with it, so the filters never need retries.
+    # A model output the filters cannot be applied to (e.g. empty or too short) ends the run like
+    # the former retry loop did when it gave up.
+    prediction = model.predict(count=quantity, **model_args)
+    try:
+        if prediction_filter and not prediction_filter.validate(prediction):
+            prediction = prediction_filter.nearest(prediction, game_config['min'], game_config['max'])
+    except ValueError as e:
+        print(f"Error: Could not generate a prediction satisfying constraints: {e}", file=sys.stderr)
+        sys.exit(1)
     
-    for attempt in range(max_retries):
-        temp_prediction = model.predict(count=quantity, **model_args)
-        
-        # 1. Check Statistical Filters
-        if prediction_filter:
-            if not prediction_filter.validate(temp_prediction):
-                continue
+    # Check Anomaly Validator
+    # If the prediction is too anomalous, a pool of candidates satisfying the filters is sampled
+    # and ranked in one batched forward pass; the least anomalous one is used.
+    if validator and validator.validate(prediction) > args.anomaly_threshold:
+        sampler = prediction_filter or PredictionFilter("")
+        try:
+            pool = sampler.sample(game_config['min'], game_config['max'], quantity,
+                                  seed=model_args.get('seed'), size=args.candidates)
+        except ValueError as e:
+            print(f"Error: Could not generate a prediction satisfying constraints: {e}", file=sys.stderr)
+            sys.exit(1)
+        scores = validator.validate_batch(pool)
+        best = int(scores.argmin())
         
-        # 2. Check Anomaly Validator
-        if validator:
-            score = validator.validate(temp_prediction)
-            if score > args.anomaly_threshold:
-                # Too anomalous
-                continue
-                
-        # If passed all checks
-        prediction = temp_prediction
-        break
-    else:
-        # Loop finished without break -> Retries exhausted
-        msg = f"Error: Could not generate a prediction satisfying constraints after {max_retries} retries."
-        if args.filters:
-            msg += f" Filters: '{args.filters}'."
-        if validator:
-            msg += f" Anomaly Threshold: {args.anomaly_threshold}."
-        print(msg, file=sys.stderr)
-        sys.exit(1)
+        if scores[best] > args.anomaly_threshold:
+            msg = f"Error: None of {args.candidates} candidates passed the anomaly threshold {args.anomaly_threshold} (best score: {scores[best]:.4f})."
+            if args.filters:
+                msg += f" Filters: '{args.filters}'."
+            print(msg, file=sys.stderr)
+            sys.exit(1)
+        prediction = pool[best]
     
     result = {
         "game": args.game,
@@ -0,0 +1,279 @@
+import argparse
+import sys
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, Any
+from cli.main import GAME_CONFIGS, GAMES, parse_model_args
+from core.base import ModelFactory
+
+# Models whose update() fine-tunes instead of matching a full train(): retrained after new draws
+FINE_TUNED_MODELS = ('lstm', 'transformer')
+
+class PredictionService:
+    """
+    Long-running prediction backend (see preloto-serve): keeps each game's preprocessed history,
+    trained models, a warm EnsemblePredictor and its ledger in memory between requests.
+
+    The history is refreshed with Lottery.ingest() at most every `refresh_interval` seconds.
+    The service subscribes to each Lottery (see _on_new_draws): cached models advance with
+    update() over the ingested draws and backtest/analysis results are dropped. Models whose
+    update() only fine-tunes (LSTM, Transformer) or is unsupported are retrained on next use, so
+    /predict keeps answering like the CLI. Warm ensemble members catch up on their next call
+    (fine-tuning the online ones) and reload when their snapshot files change.
+    """
+
+    def __init__(self, model_args: Dict[str, Any] = None, snapshot_paths: Dict[str, Dict[str, str]] = None,
+                 members: list = None, refresh_interval: float = 300.0):
+        self.model_args = model_args or {}
+        self.snapshot_paths = snapshot_paths or {} # game -> {member: path}
+        self.members = members
+        self.refresh_interval = refresh_interval
+        self._games = {}
+        # Requests are answered one at a time: models and the ledger are not thread-safe
+        self._lock = threading.Lock()
+
+    def handle(self, path: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """Dispatches a request path ('/predict', '/ensemble', '/backtest', '/analyze', '/health')."""
+        routes = {
+            '/predict': self.predict,
+            '/ensemble': self.ensemble,
+            '/backtest': self.backtest,
+            '/analyze': self.analyze,
+        }
+        if path == '/health':
+            return {'status': 'ok', 'games': {game: len(state['lottery'].data) for game, state in self._games.items()}}
+        if path not in routes:
+            raise KeyError(f"Unknown endpoint {path}. Available: /health, {', '.join(routes)}")
+        with self._lock:
+            return routes[path](**params)
+
+    def _game(self, game: str) -> Dict[str, Any]:
+        """Returns the in-memory state of a game, loading it on first use and refreshing it when due."""
+        if game not in GAME_CONFIGS:
+            raise ValueError(f"Game {game} not supported.")
+
+        state = self._games.get(game)
+        if state is None:
+            lottery = GAMES[game]()
+            lottery.preprocess_data()
+            state = {'lottery': lottery, 'config': GAME_CONFIGS[game], 'checked': time.monotonic(),
+                     'models': {}, 'results': {}, 'ensemble': None}
+            lottery.subscribe(lambda lottery, new_rows: self._on_new_draws(state, new_rows))
+            self._games[game] = state
+        elif time.monotonic() - state['checked'] >= self.refresh_interval:
+            state['checked'] = time.monotonic()
+            try:
+                new_rows = state['lottery'].ingest()
+            except Exception as e:
+                print(f"Warning: Could not refresh {game} ({e}). Serving cached history.", file=sys.stderr)
+                new_rows = []
+            if len(new_rows):
+                print(f"{game}: {len(new_rows)} new draw(s) ingested.", file=sys.stderr)
+        return state
+
+    def _on_new_draws(self, state: Dict[str, Any], new_rows):
+        """Lottery.subscribe callback: advances the cached models by the ingested draws only."""
+        state['results'].clear()
+        for key, model in list(state['models'].items()):
+            if key[0] in FINE_TUNED_MODELS:
+                del state['models'][key]
+                continue
+            try:
+                for draw in new_rows['dezenas']:
+                    model.update(list(draw))
+            except Exception:
+                # No (or a failed) incremental update: retrained from the full history on next use
+                del state['models'][key]
+
+    def _model(self, state: Dict[str, Any], model_type: str, model_args: Dict[str, Any]):
+        """Returns a trained model for the current history, reusing the cached one."""
+        key = (model_type, tuple(sorted(model_args.items())))
+        model = state['models'].get(key)
+        if model is None:
+            config = state['config']
+            model = ModelFactory.create_model(model_type, config['min'], config['max'], config['draw'])
+            if model_type != 'random':
+                lottery = state['lottery']
+                model.train(lottery.data, incidence=lottery.incidence, **model_args)
+            state['models'][key] = model
+        return model
+
+    def predict(self, game: str, model: str = 'random', count: str = None, filters: str = None,
+                model_args: str = None) -> Dict[str, Any]:
+        """
+        Same answer as `preloto <game> --model <model>` (model_args as 'key:value,key:value'); deep
+        models train with the service's --epochs like the CLI's and are retrained after new draws.
+        """
+        from data.filters import PredictionFilter
+
+        state = self._game(game)
+        config = state['config']
+        quantity = int(count) if count else config['default_play']
+        if quantity < config['draw']:
+            raise ValueError(f"Minimum numbers for {game} is {config['draw']}.")
+
+        args = {**self.model_args, **parse_model_args(model_args.split(',') if model_args else [])}
+        if 'seed' in args:
+            args['seed'] = int(args['seed'])
+
+        prediction_filter = PredictionFilter(filters) if filters else None
+        if prediction_filter and not prediction_filter.count(config['min'], config['max'], quantity):
+            raise ValueError(f"No {quantity}-number combination satisfies filters '{filters}'.")
+
+        prediction = self._model(state, model, args).predict(count=quantity, **args)
+        if prediction_filter and not prediction_filter.validate(prediction):
+            prediction = prediction_filter.nearest(prediction, config['min'], config['max'])
+
+        result = {
+            "game": game,
+            "model": model,
+            "numbers": prediction,
+            "cost": state['lottery'].get_price(quantity),
+            "parameters": args
+        }
+        if filters:
+            result["filters"] = filters
+        return result
+
+    def ensemble(self, game: str, count: str = None) -> Dict[str, Any]:
+        """
+        `preloto <game> --ensemble` from warm members (see EnsemblePredictor keep_models). After new
+        draws the LSTM/Transformer members are fine-tuned with update() rather than retrained, so their
+        votes can differ from a fresh CLI run; the other members match it.
+        """
+        from judge.ensemble import EnsemblePredictor
+
+        state = self._game(game)
+        config = state['config']
+        if state['ensemble'] is None:
+            state['ensemble'] = EnsemblePredictor(
+                state['lottery'], config['min'], config['max'], config['draw'],
+                model_args=self.model_args, snapshot_paths=self.snapshot_paths.get(game),
+                members=self.members, keep_models=True
+            )
+        return state['ensemble'].predict_next(count=int(count) if count else config['default_play'])
+
+    def backtest(self, game: str, model: str = 'random', draws: str = '100', count: str = None,
+                 incremental: str = 'false') -> Dict[str, Any]:
+        """Same summary as `preloto <game> --backtest --model <model>`; cached until new draws arrive."""
+        from judge.backtest_standard import Backtester
+
+        state = self._game(game)
+        config = state['config']
+        quantity = int(count) if count else config['default_play']
+        incremental = incremental.lower() in ('1', 'true', 'yes')
+        key = ('backtest', model, int(draws), quantity, incremental)
+        if key not in state['results']:
+            backtester = Backtester(state['lottery'], model, dict(self.model_args), config['min'], config['max'], config['draw'])
+            results = backtester.run(draws_to_test=int(draws), prediction_size=quantity, silent=True, incremental=incremental)
+            state['results'][key] = {k: v for k, v in results.items() if k != 'details'}
+        return state['results'][key]
+
+    def analyze(self, game: str, draws: str = '100') -> Dict[str, Any]:
+        """Same report as `preloto <game> --analyze`; cached until new draws arrive."""
+        from data.analysis import Analyzer
+
+        state = self._game(game)
+        key = ('analyze', int(draws))
+        if key not in state['results']:
+            df = state['lottery'].data
+            if int(draws):
+                df = df.iloc[-int(draws):]
+            state['results'][key] = Analyzer(df, state['config']['min'], state['config']['max']).analyze()
+        return state['results'][key]
+
+def make_server(service: PredictionService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """HTTP front end: GET /<endpoint>?key=value answers with the JSON of PredictionService.handle."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                status, body = 200, service.handle(url.path, params)
+            except KeyError as e:
+                status, body = 404, {'error': str(e.args[0] if e.args else e)}
+            except (ValueError, TypeError) as e:
+                status, body = 400, {'error': str(e)}
+            except Exception as e:
+                status, body = 500, {'error': str(e)}
+
+            payload = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            print(f"{self.address_string()} - {format % args}", file=sys.stderr)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+def parse_snapshots(specs) -> Dict[str, Dict[str, str]]:
+    """Turns --snapshot 'game:member:path' values into {game: {member: path}} (paths may contain ':')."""
+    from judge.members import resolve_members
+
+    snapshot_paths = {}
+    for spec in specs or []:
+        game, member, path = (spec.split(':', 2) + ['', ''])[:3]
+        if game not in GAME_CONFIGS or not path:
+            raise ValueError(f"Invalid --snapshot '{spec}': expected game:member:path with game in {', '.join(GAME_CONFIGS)}.")
+        resolve_members([member])
+        snapshot_paths.setdefault(game, {})[member] = path
+    return snapshot_paths
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Preloto prediction service: keeps data and models warm between requests.")
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="Address to bind (default: 127.0.0.1, local only).")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765).")
+    parser.add_argument('--refresh-interval', type=float, default=300.0, help="Seconds between checks for new draws (default: 300).")
+    parser.add_argument('--members', type=str, help="Comma-separated ensemble members for /ensemble (default: mc,rf,xgb,lstm,catboost).")
+    parser.add_argument('--snapshot', action='append', metavar='GAME:MEMBER:PATH',
+                        help="Load an ensemble member from a snapshot instead of training it (repeatable); reloaded when the files change.")
+    parser.add_argument('--model-args', nargs='*', help="Default model arguments in key:value format.")
+    parser.add_argument('--epochs', type=int, default=50, help="Number of epochs for training Deep Learning models (default: 50).")
+    parser.add_argument('--offline', action='store_true', help="Use only the locally cached draw history (never download).")
+    return parser.parse_args(argv)
+
+def service_from_args(args: argparse.Namespace) -> PredictionService:
+    """Builds the PredictionService configured by the command line (see parse_args)."""
+    if args.offline:
+        from data.manager import DataManager
+        DataManager.offline = True
+
+    members = None
+    if args.members:
+        from judge.members import resolve_members
+        members = resolve_members([m.strip() for m in args.members.split(',') if m.strip()])
+
+    # Same convenience injection as the preloto CLI
+    model_args = parse_model_args(args.model_args)
+    if args.epochs and 'epochs' not in model_args:
+        model_args['epochs'] = args.epochs
+
+    return PredictionService(model_args=model_args, snapshot_paths=parse_snapshots(args.snapshot),
+                             members=members, refresh_interval=args.refresh_interval)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        service = service_from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
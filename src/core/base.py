@@ -1,6 +1,15 @@
 from abc import ABC, abstractmethod
+import os
+import sys
+import glob
+import json
+import importlib
+import numpy as np
 import pandas as pd
 
+class IncompatibleSnapshotError(ValueError):
+    """Raised while loading a saved model whose state layout is too old to be converted; retrain it."""
+
 class Lottery(ABC):
     """Abstract base class for a Lottery game."""
     
@@ -9,16 +18,210 @@ class Lottery(ABC):
         self.data_url = data_url
         self.slug = slug
         self.data = None
+        # Draw incidence cache, rebuilt by preprocess_data (see _index_draws)
+        self.incidence = None
+        self.prefix_counts = None
+        # Callbacks notified with (lottery, new_rows) after ingest() appends draws
+        self._listeners = []
 
-    @abstractmethod
     def load_data(self) -> pd.DataFrame:
-        """Loads the lottery data."""
-        pass
+        """Loads the raw lottery data from `data_url`."""
+        from data.manager import DataManager
+
+        self.data = DataManager.load_csv(self.data_url)
+        return self.data
 
-    @abstractmethod
     def preprocess_data(self) -> pd.DataFrame:
-        """Preprocesses the loaded data."""
-        pass
+        """
+        Returns the preprocessed history and indexes it (see _index_draws).
+        Without loaded data, the Parquet cache is tried first; a miss loads and prepares the source
+        CSV and stores the result. Data already assigned to `self.data` is prepared as is.
+        """
+        from_source = self.data is None
+        if from_source:
+            cached = self._load_preprocessed()
+            if cached is not None:
+                self.data = cached
+                self._index_draws(cached)
+                return cached
+            self.load_data()
+
+        df = self._prepare(self.data)
+        self.data = df
+        self._index_draws(df)
+        if from_source:
+            self._store_preprocessed(df)
+        return df
+
+    def _prepare(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turns raw CSV rows into preprocessed rows (with 'data' and 'dezenas'); the per-game hook
+        used by preprocess_data() and ingest().
+        """
+        raise NotImplementedError(f"{self.name} does not define how to preprocess its data.")
+
+    def _index_draws(self, df: pd.DataFrame):
+        """
+        Caches the (n_draws, range_max + 1) uint8 incidence matrix of the preprocessed history
+        and its prefix sums, so consumers can slice any draw range without re-parsing 'dezenas'.
+        """
+        from data.features import build_incidence_matrix
+
+        self.incidence = build_incidence_matrix(df['dezenas'].tolist(), self.range_max)
+        self.prefix_counts = np.zeros((len(df) + 1, self.range_max + 1), dtype=np.int32)
+        np.cumsum(self.incidence, axis=0, out=self.prefix_counts[1:])
+
+    def _extend_index(self, new_rows: pd.DataFrame):
+        """Appends the incidence rows and prefix sums of newly ingested draws to the cache."""
+        from data.features import build_incidence_matrix
+
+        added = build_incidence_matrix(new_rows['dezenas'].tolist(), self.range_max)
+        prefix = np.empty((len(added), self.range_max + 1), dtype=np.int32)
+        np.cumsum(added, axis=0, out=prefix)
+        prefix += self.prefix_counts[-1]
+
+        self.incidence = np.vstack([self.incidence, added])
+        self.prefix_counts = np.vstack([self.prefix_counts, prefix])
+
+    def subscribe(self, callback):
+        """
+        Registers callback(lottery, new_rows) to be called whenever ingest() appends draws,
+        so derived state can advance by the new rows only (preloto-serve advances its cached
+        heuristic and tree models this way, see PredictionService).
+        """
+        self._listeners.append(callback)
+
+    def ingest(self) -> pd.DataFrame:
+        """
+        Refreshes the source and appends only the draws after the last known 'Concurso'.
+        Only new rows are preprocessed and indexed, they are appended to the Parquet cache as one
+        more part file (see _store_preprocessed) and subscribers are notified with them.
+        Returns the new preprocessed rows (empty if up to date).
+
+        The refreshed CSV itself is parsed in full: upstream republishes it as a whole file with
+        no ordering guarantee, and parsing a few thousand rows is negligible next to the download.
+        """
+        from data.manager import DataManager
+
+        if self.data is None:
+            self.preprocess_data()
+
+        raw = DataManager.load_csv(self.data_url, refresh=True)
+        last_known = self.data['Concurso'].max() if len(self.data) else -1
+        fresh = raw[raw['Concurso'] > last_known]
+        if fresh.empty:
+            return self.data.iloc[0:0]
+
+        new_rows = self._prepare(fresh.sort_values('Concurso'))
+        self.data = pd.concat([self.data, new_rows], ignore_index=True)
+        self._extend_index(new_rows)
+        self._store_preprocessed(self.data, new_rows=new_rows)
+
+        for callback in self._listeners:
+            callback(self, new_rows)
+        return new_rows
+
+    # ingest() compacts the Parquet cache back into a single part once it holds this many
+    _MAX_CACHE_PARTS = 16
+
+    def _preprocessed_cache_dir(self) -> str:
+        """Directory of the Parquet cache: part files plus a manifest.json naming them in order."""
+        from data.manager import DataManager
+
+        return os.path.join(DataManager.cache_dir, f"{self.slug}_preprocessed")
+
+    def _source_checksum(self) -> str:
+        """
+        Checksum of the local copy of the source CSV, which keys the Parquet cache. Reading that
+        copy goes through DataManager.fetch without refresh, so startup only asks the server again
+        once the download is older than DataManager.ttl (never offline).
+        """
+        from data.manager import DataManager
+
+        return DataManager.file_checksum(DataManager.fetch(self.data_url))
+
+    def _read_manifest(self):
+        path = os.path.join(self._preprocessed_cache_dir(), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _load_preprocessed(self):
+        """
+        Returns the preprocessed history from the Parquet cache, or None if it is missing/stale.
+        Balls are stored as integer columns; the 'dezenas' lists are rebuilt from them on load.
+        """
+        from data.manager import DataManager
+
+        try:
+            manifest = self._read_manifest()
+            if manifest is None or manifest["checksum"] != self._source_checksum():
+                return None
+            cache_dir = self._preprocessed_cache_dir()
+            parts = [DataManager.load_parquet(os.path.join(cache_dir, part)) for part in manifest["parts"]]
+            df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        except Exception:
+            return None
+
+        ball_cols = [f'Bola{i}' for i in range(1, self.draw_count + 1)]
+        df['dezenas'] = df[ball_cols].values.tolist()
+        return df
+
+    def _store_preprocessed(self, df: pd.DataFrame, new_rows: pd.DataFrame = None):
+        """
+        Persists the preprocessed history (without the 'dezenas' lists) under the current source checksum.
+
+        With `new_rows` (the tail of `df` added by ingest()), only those rows are written, as one more
+        part file, when the cache holds the rest of `df`. Otherwise, or once _MAX_CACHE_PARTS parts
+        accumulate, `df` is written as a single part and the older parts are removed.
+        """
+        from data.manager import DataManager
+
+        try:
+            checksum = self._source_checksum()
+            cache_dir = self._preprocessed_cache_dir()
+            manifest = self._read_manifest()
+            if manifest is not None and manifest["checksum"] == checksum and manifest["rows"] == len(df):
+                return
+
+            part = f"part-{checksum[:16]}.parquet"
+            appendable = (new_rows is not None and manifest is not None
+                          and manifest["rows"] == len(df) - len(new_rows)
+                          and len(manifest["parts"]) < self._MAX_CACHE_PARTS and part not in manifest["parts"])
+            if appendable:
+                DataManager.export_parquet(new_rows.drop(columns=['dezenas']), os.path.join(cache_dir, part))
+                parts = manifest["parts"] + [part]
+            else:
+                DataManager.export_parquet(df.drop(columns=['dezenas']), os.path.join(cache_dir, part))
+                parts = [part]
+
+            # The manifest is replaced atomically, after the part it names is complete
+            manifest_path = os.path.join(cache_dir, "manifest.json")
+            with open(manifest_path + ".tmp", "w") as f:
+                json.dump({"checksum": checksum, "rows": len(df), "parts": parts}, f)
+            os.replace(manifest_path + ".tmp", manifest_path)
+
+            for stale in glob.glob(os.path.join(cache_dir, "part-*.parquet")):
+                if os.path.basename(stale) not in parts:
+                    os.remove(stale)
+            # Single-file caches written before the part layout
+            for stale in glob.glob(os.path.join(DataManager.cache_dir, f"{self.slug}_preprocessed_*.parquet")):
+                os.remove(stale)
+        except Exception as e:
+            print(f"Warning: Could not cache preprocessed {self.name} data: {e}", file=sys.stderr)
+
+    def get_incidence(self) -> np.ndarray:
+        """Returns the cached incidence matrix, preprocessing the data if needed."""
+        if self.incidence is None:
+            self.preprocess_data()
+        return self.incidence
+
+    def count_between(self, start: int, stop: int) -> np.ndarray:
+        """Returns how many times each number (indexed 0..range_max) was drawn in draws [start, stop)."""
+        if self.prefix_counts is None:
+            self.preprocess_data()
+        return self.prefix_counts[stop] - self.prefix_counts[start]
 
     def get_price(self, quantity: int = None) -> float:
         """Gets the current price of a bet for this lottery based on quantity of numbers."""
@@ -60,6 +263,14 @@ class Model(ABC):
         """Generates a prediction."""
         pass
 
+    def update(self, draw: list):
+        """
+        Incorporates one newly observed draw into the trained state, as if train() had been
+        called with that draw appended. Used by incremental walk-forward backtests; models
+        that cannot update in place raise NotImplementedError and are retrained instead.
+        """
+        raise NotImplementedError(f"{self.name} does not support incremental updates.")
+
     def save(self, path: str):
         """Saves the model to disk. Default implementation uses pickle."""
         import pickle
@@ -76,50 +287,37 @@ class Model(ABC):
             with open(path, 'rb') as f:
                 loaded = pickle.load(f)
                 self.__dict__.update(loaded.__dict__)
+        except IncompatibleSnapshotError:
+            raise
         except Exception as e:
             print(f"Error loading model {self.name}: {e}")
 
 class ModelFactory:
     """Factory for creating prediction models."""
     
+    # Model type -> (module, class); a module is imported only when its model is created
+    MODELS = {
+        'random': ('models.heuristic.random_model', 'RandomModel'),
+        'frequency': ('models.heuristic.frequency', 'FrequencyModel'),
+        'gap': ('models.heuristic.gap', 'GapModel'),
+        'surfing': ('models.heuristic.surfing', 'SurfingModel'),
+        'hybrid': ('models.ensemble.hybrid', 'HybridModel'),
+        'rf': ('models.tree.rf', 'RandomForestModel'),
+        'lstm': ('models.deep.lstm', 'LSTMModel'),
+        'mc': ('models.heuristic.monte_carlo', 'MonteCarloModel'),
+        'xgb': ('models.tree.xgboost', 'XGBoostModel'),
+        'catboost': ('models.tree.catboost', 'CatBoostModel'),
+        'transformer': ('models.deep.transformer', 'TransformerModel'),
+        'autoencoder': ('models.deep.autoencoder', 'AutoEncoderModel'),
+    }
+    
     @staticmethod
-    def create_model(model_type: str, range_min: int, range_max: int, draw_count: int) -> Model:
-        from models.heuristic.random_model import RandomModel
-        from models.heuristic.frequency import FrequencyModel
-        from models.heuristic.gap import GapModel
-        from models.heuristic.surfing import SurfingModel
-        from models.ensemble.hybrid import HybridModel
-        from models.tree.rf import RandomForestModel
-        from models.deep.lstm import LSTMModel
-        from models.heuristic.monte_carlo import MonteCarloModel
-        from models.tree.xgboost import XGBoostModel
-        from models.tree.catboost import CatBoostModel
-        from models.deep.transformer import TransformerModel
-        from models.deep.autoencoder import AutoEncoderModel
-        
-        if model_type == 'random':
-            return RandomModel(range_min, range_max, draw_count)
-        elif model_type == 'frequency':
-            return FrequencyModel(range_min, range_max, draw_count)
-        elif model_type == 'gap':
-            return GapModel(range_min, range_max, draw_count)
-        elif model_type == 'surfing':
-            return SurfingModel(range_min, range_max, draw_count)
-        elif model_type == 'hybrid':
-            return HybridModel(range_min, range_max, draw_count)
-        elif model_type == 'rf':
-            return RandomForestModel(range_min, range_max, draw_count)
-        elif model_type == 'lstm':
-            return LSTMModel(range_min, range_max, draw_count)
-        elif model_type == 'mc':
-            return MonteCarloModel(range_min, range_max, draw_count)
-        elif model_type == 'xgb':
-            return XGBoostModel(range_min, range_max, draw_count)
-        elif model_type == 'catboost':
-            return CatBoostModel(range_min, range_max, draw_count)
-        elif model_type == 'transformer':
-            return TransformerModel(range_min, range_max, draw_count)
-        elif model_type == 'autoencoder':
-            return AutoEncoderModel(range_min, range_max, draw_count)
-        else:
+    def model_class(model_type: str) -> type:
+        if model_type not in ModelFactory.MODELS:
             raise ValueError(f"Unknown model type: {model_type}")
+        module, name = ModelFactory.MODELS[model_type]
+        return getattr(importlib.import_module(module), name)
+    
+    @staticmethod
+    def create_model(model_type: str, range_min: int, range_max: int, draw_count: int) -> Model:
+        return ModelFactory.model_class(model_type)(range_min, range_max, draw_count)
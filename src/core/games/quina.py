@@ -1,5 +1,4 @@
 from core.base import Lottery
-from data.manager import DataManager
 import pandas as pd
 
 class Quina(Lottery):
@@ -13,15 +12,8 @@ class Quina(Lottery):
         self.range_max = 80
         self.draw_count = 5
 
-    def load_data(self) -> pd.DataFrame:
-        self.data = DataManager.load_csv(self.data_url)
-        return self.data
-
-    def preprocess_data(self) -> pd.DataFrame:
-        if self.data is None:
-            self.load_data()
-            
-        df = self.data.copy()
+    def _prepare(self, raw: pd.DataFrame) -> pd.DataFrame:
+        df = raw.copy()
         
         # Rename columns
         column_mapping = {
@@ -36,5 +28,4 @@ class Quina(Lottery):
         bola_cols = [f'Bola{i}' for i in range(1, 6)]
         df['dezenas'] = df[bola_cols].values.tolist()
         
-        self.data = df
         return df
@@ -1,7 +1,7 @@
 import pandas as pd
 import statistics
 from typing import Dict, Any
-from .features import calculate_sum, count_odds, calculate_spread
+from .features import calculate_sum, count_odds, calculate_spread, build_incidence_matrix, extract_draws
 
 class Analyzer:
     def __init__(self, data: pd.DataFrame, range_min: int, range_max: int):
@@ -27,16 +27,9 @@ class Analyzer:
 
     def _analyze_frequencies(self) -> Dict[str, int]:
         """Calculates frequency of each number."""
-        counts = {str(n): 0 for n in range(self.range_min, self.range_max + 1)}
-        
-        for _, row in self.data.iterrows():
-            for col in self.ball_cols:
-                try:
-                    val = int(row[col])
-                    if str(val) in counts:
-                        counts[str(val)] += 1
-                except Exception:
-                    pass
+        incidence = build_incidence_matrix(extract_draws(self.data), self.range_max)
+        totals = incidence[:, self.range_min:self.range_max + 1].sum(axis=0)
+        counts = {str(n): int(c) for n, c in zip(range(self.range_min, self.range_max + 1), totals)}
         
         # Sort by frequency desc
         return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
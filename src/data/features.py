@@ -1,4 +1,9 @@
 from typing import List
+import numpy as np
+import pandas as pd
+
+# Per-number feature layout produced by build_number_features (shared by RF, XGBoost and CatBoost)
+NUMBER_FEATURES = ['gap', 'freq', 'freq10', 'ctx_sum', 'ctx_odd', 'ctx_even', 'ctx_spread']
 
 def calculate_sum(numbers: List[int]) -> int:
     """Calculates the sum of the numbers."""
@@ -17,3 +22,210 @@ def calculate_spread(numbers: List[int]) -> int:
     if not numbers:
         return 0
     return max(numbers) - min(numbers)
+
+def extract_draws(data: pd.DataFrame) -> List[List[int]]:
+    """Returns the drawn numbers of every row, preferring the 'dezenas' list column over 'bola' columns."""
+    if 'dezenas' in data.columns:
+        draws = []
+        for draw in data['dezenas']:
+            try:
+                draws.append([int(x) for x in draw])
+            except Exception:
+                draws.append([])
+        return draws
+
+    ball_cols = [c for c in data.columns if 'bola' in c.lower()]
+    return [[int(x) for x in row if pd.notnull(x)] for row in data[ball_cols].values.tolist()]
+
+def build_incidence_matrix(draws: List[List[int]], range_max: int) -> np.ndarray:
+    """
+    Encodes draws as a (n_draws, range_max + 1) uint8 matrix where [i, n] == 1 if n was drawn in draw i.
+    Numbers outside [0, range_max] are ignored.
+    """
+    matrix = np.zeros((len(draws), range_max + 1), dtype=np.uint8)
+    lengths = [len(d) for d in draws]
+    if not sum(lengths):
+        return matrix
+
+    rows = np.repeat(np.arange(len(draws)), lengths)
+    cols = np.fromiter((n for d in draws for n in d), dtype=np.int64, count=sum(lengths))
+    valid = (cols >= 0) & (cols <= range_max)
+    matrix[rows[valid], cols[valid]] = 1
+    return matrix
+
+def draw_positions(draw: List[int], range_min: int, range_max: int) -> np.ndarray:
+    """
+    Offsets (number - range_min) of the distinct in-range numbers of one draw: the columns a
+    per-number state array touches, so heuristics update in O(draw_count) instead of O(range).
+    """
+    numbers = np.unique(np.asarray([int(n) for n in draw], dtype=np.int64))
+    return numbers[(numbers >= range_min) & (numbers <= range_max)] - range_min
+
+def draw_statistics(incidence: np.ndarray) -> np.ndarray:
+    """
+    Computes (sum, odd, even, spread) for every row of an incidence matrix.
+    Returns an (n_draws, 4) int64 array; empty draws yield zeros.
+    """
+    numbers = np.arange(incidence.shape[1])
+    present = incidence.astype(bool)
+
+    sums = incidence @ numbers
+    odds = incidence[:, 1::2].sum(axis=1, dtype=np.int64)
+    evens = incidence.sum(axis=1, dtype=np.int64) - odds
+
+    has_any = present.any(axis=1)
+    highest = incidence.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+    lowest = np.argmax(present, axis=1)
+    spreads = np.where(has_any, highest - lowest, 0)
+
+    return np.stack([sums, odds, evens, spreads], axis=1).astype(np.int64)
+
+def build_number_features(incidence: np.ndarray, range_min: int, range_max: int, recent_window: int = 10) -> np.ndarray:
+    """
+    Builds the per-number feature tensor used by the tree models.
+
+    Returns an array of shape (n_draws + 1, n_numbers, len(NUMBER_FEATURES)) where slice [t] holds
+    the state observed *before* draw t (gap, total frequency, frequency in the last `recent_window`
+    draws and the statistics of draw t - 1). Slice [n_draws] is the state for the next, unknown draw.
+    """
+    n_draws = incidence.shape[0]
+    hits = incidence[:, range_min:range_max + 1].astype(np.int64)
+    n_numbers = hits.shape[1]
+
+    # Prefix sums: cum[t] = appearances in draws [0, t)
+    cum = np.zeros((n_draws + 1, n_numbers), dtype=np.int64)
+    np.cumsum(hits, axis=0, out=cum[1:])
+
+    lagged = np.zeros_like(cum)
+    lagged[recent_window:] = cum[:-recent_window] if recent_window <= n_draws else 0
+    freq_recent = cum - lagged
+
+    # Gap before draw t = t - 1 - (last position < t where the number appeared), or t if never seen
+    positions = np.where(hits > 0, np.arange(n_draws)[:, None], -1)
+    last_seen = np.full((n_draws + 1, n_numbers), -1, dtype=np.int64)
+    if n_draws:
+        last_seen[1:] = np.maximum.accumulate(positions, axis=0)
+    gaps = np.arange(n_draws + 1)[:, None] - 1 - last_seen
+
+    context = np.zeros((n_draws + 1, 4), dtype=np.int64)
+    context[1:] = draw_statistics(incidence)
+
+    features = np.empty((n_draws + 1, n_numbers, len(NUMBER_FEATURES)), dtype=np.float64)
+    features[:, :, 0] = gaps
+    features[:, :, 1] = cum
+    features[:, :, 2] = freq_recent
+    features[:, :, 3:] = context[:, None, :]
+    return features
+
+def build_training_set(data: pd.DataFrame, range_min: int, range_max: int, warmup: int = 50, incidence: np.ndarray = None):
+    """
+    Turns draw history into a supervised dataset: one row per (draw, number) after `warmup` draws.
+    A precomputed incidence matrix (e.g. Lottery.incidence[:i]) skips re-parsing data['dezenas'].
+
+    Returns (X, y, next_features) where next_features holds the rows to score for the next draw.
+    """
+    if incidence is None:
+        incidence = build_incidence_matrix(extract_draws(data), range_max)
+    features = build_number_features(incidence, range_min, range_max)
+    n_draws = incidence.shape[0]
+
+    X = features[warmup:n_draws].reshape(-1, len(NUMBER_FEATURES))
+    y = incidence[warmup:n_draws, range_min:range_max + 1].reshape(-1).astype(np.int64)
+    return X, y, features[n_draws]
+
+def _grow(buffer: np.ndarray, rows: int) -> np.ndarray:
+    """Returns `buffer` if it has room for `rows` rows, else a copy with (at least) doubled capacity."""
+    if rows <= len(buffer):
+        return buffer
+    grown = np.empty((max(rows, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+    grown[:len(buffer)] = buffer
+    return grown
+
+class IncrementalTrainingSet:
+    """
+    build_training_set that can be extended one draw at a time (used by the tree models' update()).
+
+    Keeps the unscaled X/y rows, the encoded history and the running per-number state (gap, total
+    frequency, frequency in the last `recent_window` draws, statistics of the last draw). append()
+    adds the n_numbers rows of the state before the new draw plus its labels and advances the state
+    in O(range) work; buffers grow by doubling, so no draw copies the whole history.
+    """
+
+    def __init__(self, incidence: np.ndarray, range_min: int, range_max: int, warmup: int = 50, recent_window: int = 10):
+        self.range_min = range_min
+        self.range_max = range_max
+        self.warmup = warmup
+        self.recent_window = recent_window
+
+        features = build_number_features(incidence, range_min, range_max, recent_window)
+        self.n_draws = incidence.shape[0]
+        X = features[warmup:self.n_draws].reshape(-1, len(NUMBER_FEATURES))
+        self._X = X.copy()
+        self._y = incidence[warmup:self.n_draws, range_min:range_max + 1].reshape(-1).astype(np.int64)
+        self._history = np.array(incidence, dtype=np.uint8)
+        self.next_features = features[self.n_draws].copy()
+
+    @property
+    def X(self) -> np.ndarray:
+        return self._X[:len(self)]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:len(self)]
+
+    @property
+    def history(self) -> np.ndarray:
+        """Incidence matrix of every draw seen so far."""
+        return self._history[:self.n_draws]
+
+    def __len__(self) -> int:
+        return max(self.n_draws - self.warmup, 0) * (self.range_max - self.range_min + 1)
+
+    def __getstate__(self):
+        # Spare capacity of the doubling buffers is not worth pickling
+        state = self.__dict__.copy()
+        state['_X'], state['_y'], state['_history'] = self.X, self.y, self.history
+        return state
+
+    def append(self, draw: List[int]):
+        row = build_incidence_matrix([draw], self.range_max)
+        hits = row[0, self.range_min:self.range_max + 1].astype(np.int64)
+
+        # The state before this draw becomes a training sample (once past the warmup)
+        if self.n_draws >= self.warmup:
+            start, stop = len(self), len(self) + len(hits)
+            self._X = _grow(self._X, stop)
+            self._y = _grow(self._y, stop)
+            self._X[start:stop] = self.next_features
+            self._y[start:stop] = hits
+
+        self._history = _grow(self._history, self.n_draws + 1)
+        self._history[self.n_draws] = row[0]
+
+        state = self.next_features
+        state[:, 0] = np.where(hits > 0, 0, state[:, 0] + 1)
+        state[:, 1] += hits
+        state[:, 2] += hits
+        if self.n_draws >= self.recent_window:
+            state[:, 2] -= self._history[self.n_draws - self.recent_window, self.range_min:self.range_max + 1]
+        state[:, 3:] = draw_statistics(row)[0]
+        self.n_draws += 1
+
+def build_draw_vectors(incidence: np.ndarray, draw_count: int) -> np.ndarray:
+    """
+    Encodes each draw as the sequence-model input row (shared by LSTM and Transformer):
+    the multi-hot numbers followed by sum, odd, even and spread normalized to roughly [0, 1].
+    Returns an (n_draws, range_max + 5) float32 array.
+    """
+    range_max = incidence.shape[1] - 1
+    scale = np.array([range_max * draw_count, draw_count, draw_count, range_max], dtype=np.float32)
+    return np.hstack([incidence.astype(np.float32), draw_statistics(incidence) / scale]).astype(np.float32)
+
+def build_sequence_windows(vectors: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Stacks every run of `window_size` consecutive rows: returns a read-only
+    (n_draws - window_size + 1, window_size, n_features) view without copying.
+    """
+    if len(vectors) < window_size:
+        return np.empty((0, window_size, vectors.shape[1]), dtype=vectors.dtype)
+    return np.lib.stride_tricks.sliding_window_view(vectors, window_size, axis=0).transpose(0, 2, 1)
@@ -1,6 +1,36 @@
 from typing import List, Tuple
+import numpy as np
 from .features import calculate_sum, count_odds, count_evens
 
+def _subset_tables(pool: np.ndarray, k: int, max_sum: int, scores: np.ndarray = None) -> np.ndarray:
+    """
+    Dynamic programming over subsets of `pool` with up to k numbers and sums up to max_sum.
+
+    Returns tables of shape (len(pool) + 1, k + 1, max_sum + 1). Without scores, tables[i, j, s]
+    counts the j-number subsets of pool[i:] summing to s. With scores, it holds the best total
+    score of such a subset, or -inf if there is none.
+    """
+    n = len(pool)
+    if scores is None:
+        tables = np.zeros((n + 1, k + 1, max_sum + 1))
+        tables[n, 0, 0] = 1
+    else:
+        tables = np.full((n + 1, k + 1, max_sum + 1), -np.inf)
+        tables[n, 0, 0] = 0
+
+    for i in range(n - 1, -1, -1):
+        tables[i] = tables[i + 1]
+        p = int(pool[i])
+        if k == 0 or p > max_sum:
+            continue
+        # Taking pool[i]: one more number and p more in the sum
+        taken = tables[i + 1, :-1, :max_sum + 1 - p]
+        if scores is None:
+            tables[i, 1:, p:] += taken
+        else:
+            np.maximum(tables[i, 1:, p:], taken + scores[i], out=tables[i, 1:, p:])
+    return tables
+
 class PredictionFilter:
     def __init__(self, filters_str: str):
         """
@@ -67,3 +97,131 @@ class PredictionFilter:
                 return False
 
         return True
+
+    def _bounds(self, k: int) -> Tuple[Tuple[int, int], range]:
+        """Sum range and the feasible odd counts for a k-number combination."""
+        sum_range = self.filters.get('sum', (0, np.iinfo(np.int64).max))
+        odd_min, odd_max = self.filters.get('odd', (0, k))
+        even_min, even_max = self.filters.get('even', (0, k))
+        odd_counts = range(max(odd_min, k - even_max, 0), min(odd_max, k - even_min, k) + 1)
+        return sum_range, odd_counts
+
+    def _pools(self, range_min: int, range_max: int, k: int):
+        numbers = np.arange(range_min, range_max + 1)
+        (sum_min, sum_max), odd_counts = self._bounds(k)
+        # No part of a combination can exceed the sum cap or the sum of the k largest numbers
+        max_sum = int(min(sum_max, numbers[-k:].sum() if k else 0))
+        return numbers[numbers % 2 == 1], numbers[numbers % 2 == 0], max(sum_min, 0), max_sum, odd_counts
+
+    def count(self, range_min: int, range_max: int, k: int) -> int:
+        """
+        Counts the k-number combinations of [range_min, range_max] that satisfy all filters,
+        by combining per-parity subset-sum tables instead of enumerating combinations.
+        """
+        odd_pool, even_pool, sum_min, max_sum, odd_counts = self._pools(range_min, range_max, k)
+        if sum_min > max_sum:
+            return 0
+        odd_t = _subset_tables(odd_pool, k, max_sum)[0]
+        even_t = _subset_tables(even_pool, k, max_sum)[0]
+
+        total = 0.0
+        for a in odd_counts:
+            sums = np.convolve(odd_t[a], even_t[k - a])
+            total += sums[sum_min:max_sum + 1].sum()
+        return int(round(total))
+
+    def sample(self, range_min: int, range_max: int, k: int, seed: int = None, size: int = None):
+        """
+        Draws a k-number combination uniformly from those satisfying all filters, or a list of
+        `size` independent ones (the DP tables are built once). Raises ValueError if none exists.
+        """
+        rng = np.random.default_rng(seed)
+        odd_pool, even_pool, sum_min, max_sum, odd_counts = self._pools(range_min, range_max, k)
+        odd_all = _subset_tables(odd_pool, k, max_sum)
+        even_all = _subset_tables(even_pool, k, max_sum)
+        odd_t, even_t = odd_all[0], even_all[0]
+
+        # Weight of each odd count, then of each odd-part sum given it, then of the even-part sum
+        odd_counts = list(odd_counts)
+        weights = np.array([np.convolve(odd_t[a], even_t[k - a])[sum_min:max_sum + 1].sum() for a in odd_counts])
+        if sum_min > max_sum or not weights.sum():
+            raise ValueError(f"No {k}-number combination satisfies filters {self.filters}.")
+
+        s1_values = np.arange(max_sum + 1)
+        lo = np.clip(sum_min - s1_values, 0, max_sum + 1)
+        hi = np.clip(max_sum - s1_values + 1, 0, max_sum + 1)
+
+        def draw_one():
+            a = odd_counts[rng.choice(len(odd_counts), p=weights / weights.sum())]
+            b = k - a
+
+            even_cum = np.concatenate([[0.0], np.cumsum(even_t[b])])
+            s1_weights = odd_t[a] * np.maximum(even_cum[hi] - even_cum[lo], 0)
+            s1 = rng.choice(max_sum + 1, p=s1_weights / s1_weights.sum())
+
+            s2_weights = even_t[b].copy()
+            s2_weights[:lo[s1]] = 0
+            s2_weights[hi[s1]:] = 0
+            s2 = rng.choice(max_sum + 1, p=s2_weights / s2_weights.sum())
+
+            return sorted(self._walk(odd_pool, odd_all, a, s1, rng) + self._walk(even_pool, even_all, b, s2, rng))
+
+        if size is None:
+            return draw_one()
+        return [draw_one() for _ in range(size)]
+
+    def nearest(self, numbers: List[int], range_min: int, range_max: int) -> List[int]:
+        """
+        Returns the combination of len(numbers) satisfying all filters that keeps as many of
+        `numbers` as possible (ties are broken deterministically). Raises ValueError if none exists.
+        """
+        k = len(numbers)
+        chosen = set(numbers)
+        odd_pool, even_pool, sum_min, max_sum, odd_counts = self._pools(range_min, range_max, k)
+        odd_scores = np.isin(odd_pool, list(chosen)).astype(float)
+        even_scores = np.isin(even_pool, list(chosen)).astype(float)
+        odd_all = _subset_tables(odd_pool, k, max_sum, odd_scores)
+        even_all = _subset_tables(even_pool, k, max_sum, even_scores)
+        odd_t, even_t = odd_all[0], even_all[0]
+
+        best, best_key = -np.inf, None
+        s1_values = np.arange(max_sum + 1)
+        for a in odd_counts:
+            # scores[s1, s2] for every split of the sum between odd and even parts
+            scores = odd_t[a][:, None] + even_t[k - a][None, :]
+            total = s1_values[:, None] + s1_values[None, :]
+            scores[(total < sum_min) | (total > max_sum)] = -np.inf
+            idx = np.unravel_index(np.argmax(scores), scores.shape)
+            if scores[idx] > best:
+                best, best_key = scores[idx], (a, int(idx[0]), int(idx[1]))
+
+        if best_key is None or best == -np.inf:
+            raise ValueError(f"No {k}-number combination satisfies filters {self.filters}.")
+        a, s1, s2 = best_key
+        return sorted(self._walk(odd_pool, odd_all, a, s1, scores=odd_scores) +
+                      self._walk(even_pool, even_all, k - a, s2, scores=even_scores))
+
+    @staticmethod
+    def _walk(pool: np.ndarray, tables: np.ndarray, j: int, s: int, rng: np.random.Generator = None,
+              scores: np.ndarray = None) -> List[int]:
+        """
+        Rebuilds a j-number subset of `pool` summing to s from _subset_tables output.
+        With count tables and rng every such subset is equally likely; with score tables the
+        best-scoring subset is followed, taking a number whenever that keeps the optimum.
+        """
+        picked = []
+        for i, p in enumerate(pool.tolist()):
+            if j == 0:
+                break
+            if p > s:
+                continue
+            rest = tables[i + 1, j - 1, s - p]
+            if scores is None:
+                take = rng.random() * tables[i, j, s] < rest
+            else:
+                take = rest + scores[i] == tables[i, j, s]
+            if take:
+                picked.append(p)
+                j -= 1
+                s -= p
+        return picked
@@ -1,18 +1,172 @@
 import pandas as pd
 import os
+import sys
+import json
+import hashlib
+from datetime import datetime
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+def _env_float(name: str, default: float) -> float:
+    """Reads a numeric PRELOTO_* setting; unset, empty or malformed values fall back to `default`."""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Warning: Ignoring invalid {name}={value!r}; using {default:g}.", file=sys.stderr)
+        return default
 
 class DataManager:
     """Handles data fetching, caching, and export in multiple formats."""
     
+    # Local cache of downloaded CSVs, keyed by URL (override with PRELOTO_CACHE_DIR)
+    cache_dir = os.environ.get("PRELOTO_CACHE_DIR", os.path.join("data", "cache"))
+    # Offline mode never touches the network: only cached copies are used (PRELOTO_OFFLINE=1)
+    offline = os.environ.get("PRELOTO_OFFLINE", "").lower() in ("1", "true", "yes")
+    # Local directory or base URL replacing the remote host; files are looked up by name (PRELOTO_DATA_MIRROR)
+    mirror = os.environ.get("PRELOTO_DATA_MIRROR")
+    # Seconds a cached download is trusted without asking the server again (PRELOTO_CACHE_TTL)
+    ttl = _env_float("PRELOTO_CACHE_TTL", 6 * 3600)
+    
+    # Files already resolved (downloaded or revalidated) in this process: url -> local path
+    _fetched = {}
+    
     @staticmethod
-    def load_csv(url: str) -> pd.DataFrame:
-        """Loads a CSV from a URL."""
+    def load_csv(url: str, refresh: bool = False) -> pd.DataFrame:
+        """
+        Loads a CSV from a URL, a file:// URL or a local path.
+        
+        Remote files are cached under DataManager.cache_dir. The cached copy is used as is
+        while younger than DataManager.ttl; after that, or with refresh=True, it is revalidated
+        with ETag/Last-Modified. If the network fails the cached copy is used.
+        """
         try:
-            return pd.read_csv(url)
+            return pd.read_csv(DataManager.fetch(url, refresh=refresh))
         except Exception as e:
             print(f"Error loading data from {url}: {e}")
             raise e
 
+    @staticmethod
+    def fetch(url: str, refresh: bool = False) -> str:
+        """
+        Returns a local file path holding the contents of `url` (see load_csv).
+        The path is remembered per process and a cached download is not revalidated until its
+        TTL expires; pass refresh=True to revalidate the source now.
+        """
+        if not refresh and url in DataManager._fetched:
+            return DataManager._fetched[url]
+        
+        source = DataManager._resolve_source(url)
+        path = DataManager._local_path(source)
+        if path is None:
+            path = DataManager._fetch_cached(source, revalidate=refresh)
+        DataManager._fetched[url] = path
+        return path
+
+    @staticmethod
+    def file_checksum(path: str) -> str:
+        """SHA-256 of a file's contents, used to key caches derived from it."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _resolve_source(url: str) -> str:
+        """Applies the mirror override, keeping the file name of the original URL."""
+        if not DataManager.mirror:
+            return url
+        filename = os.path.basename(urlparse(url).path) or os.path.basename(url)
+        if "://" in DataManager.mirror:
+            return DataManager.mirror.rstrip("/") + "/" + filename
+        return os.path.join(DataManager.mirror, filename)
+
+    @staticmethod
+    def _local_path(source: str):
+        """Returns the filesystem path for file:// URLs and plain paths, None for remote URLs."""
+        parsed = urlparse(source)
+        if parsed.scheme == "file":
+            return url2pathname(parsed.path)
+        if parsed.scheme in ("http", "https"):
+            return None
+        return source
+
+    @staticmethod
+    def cache_paths(url: str):
+        """Returns the (data, metadata) cache file paths for a URL."""
+        key = hashlib.sha256(url.encode()).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(urlparse(url).path))[0] or "data"
+        base = os.path.join(DataManager.cache_dir, f"{name}_{key}")
+        return base + ".csv", base + ".json"
+
+    @staticmethod
+    def _fetch_cached(url: str, revalidate: bool = True) -> str:
+        """
+        Downloads `url` into the cache if it changed and returns the cached file path.
+        Without `revalidate`, a copy checked less than DataManager.ttl seconds ago is returned as is.
+        """
+        data_path, meta_path = DataManager.cache_paths(url)
+        cached = os.path.exists(data_path)
+        
+        if DataManager.offline:
+            if not cached:
+                raise FileNotFoundError(f"Offline mode: no cached copy of {url} in {DataManager.cache_dir}")
+            return data_path
+        
+        meta = {}
+        if cached and os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        
+        checked_at = meta.get("checked_at") or meta.get("fetched_at")
+        if cached and not revalidate and checked_at:
+            age = (datetime.now() - datetime.fromisoformat(checked_at)).total_seconds()
+            if 0 <= age < DataManager.ttl:
+                return data_path
+        
+        headers = {}
+        if cached and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if cached and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        
+        import requests
+        try:
+            response = requests.get(url, headers=headers, timeout=30)
+            if response.status_code == 304 and cached:
+                DataManager._write_meta(meta_path, {**meta, "url": url, "checked_at": datetime.now().isoformat()})
+                return data_path
+            response.raise_for_status()
+        except Exception as e:
+            if cached:
+                print(f"Warning: Could not refresh {url} ({e}). Using cached copy.", file=sys.stderr)
+                return data_path
+            raise
+        
+        os.makedirs(DataManager.cache_dir, exist_ok=True)
+        tmp_path = data_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, data_path)
+        
+        now = datetime.now().isoformat()
+        DataManager._write_meta(meta_path, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "checked_at": now
+        })
+        return data_path
+
+    @staticmethod
+    def _write_meta(meta_path: str, meta: dict):
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
     @staticmethod
     def export_parquet(df: pd.DataFrame, path: str) -> str:
         """Exports a DataFrame to Parquet format for interoperability.
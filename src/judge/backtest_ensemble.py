@@ -1,27 +1,32 @@
 import sys
-from core.base import Lottery
-from typing import Dict, Any
-from models.tree.rf import RandomForestModel
-from models.deep.lstm import LSTMModel
-from models.heuristic.monte_carlo import MonteCarloModel
-from models.tree.xgboost import XGBoostModel
-import tensorflow as tf
 import gc
+from collections import Counter
+from core.base import Lottery
+from typing import Dict, Any, List
+from judge.members import MEMBERS, resolve_members, create_member, train_member
 
 
 class EnsembleBacktester:
-    def __init__(self, lottery: Lottery, range_min: int, range_max: int, draw_count: int, model_args: Dict[str, Any] = None, snapshot_paths: Dict[str, str] = None):
+    def __init__(self, lottery: Lottery, range_min: int, range_max: int, draw_count: int, model_args: Dict[str, Any] = None, snapshot_paths: Dict[str, str] = None,
+                 members: List[str] = None):
         self.lottery = lottery
         self.range_min = range_min
         self.range_max = range_max
         self.draw_count = draw_count
         self.model_args = model_args or {}
         self.snapshot_paths = snapshot_paths or {}
+        # Voting members by name (see judge.members); defaults to MC, RF, XGB, LSTM, CatBoost
+        self.members = resolve_members(members)
         
-    def run(self, draws_to_test: int = 10, verbose: bool = True) -> Dict[str, Any]:
+    def run(self, draws_to_test: int = 10, verbose: bool = True, online: bool = False) -> Dict[str, Any]:
         """
         Runs the ensemble backtest.
-        Evaluates: MC, RF, LSTM, XGB, CatBoost vs Consensus.
+        Evaluates every member (default: MC, RF, LSTM, XGB, CatBoost) vs Consensus.
+        :param online: If True, members that support it (LSTM, Transformer) are trained (or their snapshot
+                       loaded) once and then fine-tuned with a few gradient steps on the newest window after
+                       each tested draw (see LSTMModel.update) instead of being retrained for full epochs every draw.
+                       A member whose update fails keeps that draw's prediction and is retrained (or its
+                       snapshot reloaded and primed) before the next draw.
         """
         # Ensure data is loaded
         df = self.lottery.preprocess_data()
@@ -38,55 +43,28 @@ class EnsembleBacktester:
         xgb_estimators = int(self.model_args.get('xgb_n_estimators', self.model_args.get('n_estimators', 100)))
 
         lstm_epochs = int(self.model_args.get('epochs', 10))
-        lstm_units = int(self.model_args.get('units', 128))
         
         if verbose:
             print(f"Starting Ensemble Backtest on {self.lottery.name} for last {draws_to_test} draws...")
-            print("Models: MC, RF, LSTM, XGB, CatBoost.")
+            print(f"Models: {', '.join(self.members)}.")
             print(f"Configuration: RF={rf_estimators} trees, XGB={xgb_estimators} trees, LSTM={lstm_epochs} epochs.")
             if self.snapshot_paths:
                 print(f"Snapshots loaded: {list(self.snapshot_paths.keys())} (Warm Start / Validation)")
+            if online:
+                online_members = [name for name in self.members if MEMBERS[name]['online']]
+                print(f"Online fine-tuning after each draw: {', '.join(online_members) or 'none'}.")
 
         # Initialize models ONCE (optimization)
         try:
-            mc = MonteCarloModel(self.range_min, self.range_max, self.draw_count)
-            rf = RandomForestModel(self.range_min, self.range_max, self.draw_count)
-            
-            # Loading RF Snapshot if exists
-            if 'rf' in self.snapshot_paths:
-                 rf.load(self.snapshot_paths['rf'])
-            
-            # XGB Setup
-            xgb_model = XGBoostModel(self.range_min, self.range_max, self.draw_count)
-            xgb_args = self.model_args.copy()
-            xgb_args['n_estimators'] = xgb_estimators
-            if 'rf_n_estimators' in xgb_args:
-                del xgb_args['rf_n_estimators']
-            
-            if 'xgb' in self.snapshot_paths:
-                 xgb_model.load(self.snapshot_paths['xgb'])
-            
-            # LSTM Setup
-            lstm = LSTMModel(self.range_min, self.range_max, self.draw_count)
-            lstm_args = self.model_args.copy()
-            if 'epochs' in lstm_args:
-                del lstm_args['epochs']
-            if 'units' in lstm_args:
-                del lstm_args['units']
-            
-            if 'lstm' in self.snapshot_paths:
-                 lstm.load(self.snapshot_paths['lstm'])
-                 
-            # CatBoost Setup
-            from models.tree.catboost import CatBoostModel
-            cat = CatBoostModel(self.range_min, self.range_max, self.draw_count)
-            if 'catboost' in self.snapshot_paths:
-                cat.load(self.snapshot_paths['catboost'])
-            
+            models = {name: create_member(name, self.range_min, self.range_max, self.draw_count) for name in self.members}
+            for name, model in models.items():
+                if name in self.snapshot_paths:
+                    model.load(self.snapshot_paths[name])
         except Exception as e:
             print(f"Critical Error initializing models: {e}", file=sys.stderr)
             return {}
 
+        stale = set() # Online members whose update() failed: retrained (or snapshot reloaded) next draw
         for i in range(start_index, total_draws):
             train_data = df.iloc[:i].copy()
             target_draw = df.iloc[i]
@@ -94,63 +72,35 @@ class EnsembleBacktester:
             
             # Predict with all models
             preds = {}
-            
-            # 1. Monte Carlo
-            try:
-                mc.train(train_data) 
-                preds['mc'] = set(mc.predict())
-            except Exception as e:
-                print(f"Error in MC: {e}", file=sys.stderr)
-                preds['mc'] = set()
-
-            # 2. Random Forest
-            try:
-                # If snapshot was loaded, 'train' might retrain or refine. 
-                # Scikit-learn Random Forest doesn't support incremental learning (partial_fit) easily.
-                # So calling train() will RETRAIN from scratch on train_data.
-                # IF the user wants to use the snapshot as is (Validation), we should SKIP train?
-                # But backtester usually implies re-training on available history.
-                # COMPROMISE: If snapshot exists, SKIP train (assume Fixed Model Validation).
-                # ELSE train normally.
-                if 'rf' not in self.snapshot_paths:
-                    rf.train(train_data, n_estimators=rf_estimators, **self.model_args)
-                preds['rf'] = set(rf.predict())
-            except Exception as e:
-                print(f"Error in RF: {e}", file=sys.stderr)
-                preds['rf'] = set()
-
-            # 3. XGBoost
-            try:
-                if 'xgb' not in self.snapshot_paths:
-                    xgb_model.train(train_data, **xgb_args) 
-                preds['xgb'] = set(xgb_model.predict())
-            except Exception as e:
-                print(f"Error in XGB: {e}", file=sys.stderr)
-                preds['xgb'] = set()
-
-            # 4. LSTM (Deep Learning)
-            try:
-                # LSTM supports incremental provided weights are preserved.
-                # But our LSTM.train() calls _build_model if self.model is None.
-                # If loaded, self.model is NOT None.
-                # However, calling fit() on existing model continues training (Fine Tuning).
-                # This seems desirable for LSTM (Online Learning). 
-                # But to keep consistent with "Frozen Snapshot Validation", let's skip if snapshot present.
-                if 'lstm' not in self.snapshot_paths:
-                    lstm.train(train_data, epochs=lstm_epochs, batch_size=32, verbose=0, units=lstm_units, **lstm_args) 
-                preds['lstm'] = set(lstm.predict())
-            except Exception as e:
-                print(f"Error in LSTM: {e}", file=sys.stderr)
-                preds['lstm'] = set()
+            for name, model in models.items():
+                # A loaded snapshot is validated as is (Frozen Snapshot Validation): sklearn-style models
+                # cannot learn incrementally, so train() would simply retrain it from scratch.
+                # Online members instead fine-tune the same weights draw by draw, starting from the snapshot
+                # (warm start) or from a single full training on the history before the first tested draw.
+                member_online = online and MEMBERS[name]['online']
+                try:
+                    if not member_online or i == start_index or name in stale:
+                        if name not in self.snapshot_paths:
+                            train_member(name, model, train_data, self.model_args)
+                        elif member_online:
+                            if name in stale:
+                                model.load(self.snapshot_paths[name])
+                            model.prime(train_data)
+                        stale.discard(name)
+                    preds[name] = set(model.predict())
+                except Exception as e:
+                    print(f"Error in {name}: {e}", file=sys.stderr)
+                    preds[name] = set()
+                    continue
                 
-            # 5. CatBoost
-            try:
-                if 'catboost' not in self.snapshot_paths:
-                    cat.train(train_data, verbose=0)
-                preds['catboost'] = set(cat.predict())
-            except Exception as e:
-                 print(f"Error in CatBoost: {e}", file=sys.stderr)
-                 preds['catboost'] = set()
+                if member_online:
+                    # The prediction above stands; a failed fine-tune only means the (possibly
+                    # half-updated) member is rebuilt from scratch for the next draw
+                    try:
+                        model.update(list(target_draw['dezenas']))
+                    except Exception as e:
+                        print(f"Error updating {name}: {e}. Retraining it for the next draw.", file=sys.stderr)
+                        stale.add(name)
 
             # Calculate Consensus
             all_votes = []
@@ -158,43 +108,37 @@ class EnsembleBacktester:
                 all_votes.extend(list(p))
             
             # Count frequency of each number
-            from collections import Counter
             vote_counts = Counter(all_votes)
             
-            # Consensus Sets
-            con_5 = {n for n, c in vote_counts.items() if c >= 5}
-            con_4 = {n for n, c in vote_counts.items() if c >= 4}
-            con_3 = {n for n, c in vote_counts.items() if c >= 3}
+            # Consensus Sets: numbers backed by all members, all but one and all but two
+            # (5/4/3 of the default five members)
+            n_members = len(preds)
+            thresholds = [t for t in (n_members, n_members - 1, n_members - 2) if t >= 1]
+            consensus = {t: {n for n, c in vote_counts.items() if c >= t} for t in thresholds}
             
             # Evaluation
             row_result = {
                 'draw_index': i,
                 'target': list(target_numbers),
                 'models': {k: list(v) for k, v in preds.items()},
-                'consensus': {
-                    '5_of_5': list(con_5), # Since we have 5 models now
-                    '4_of_5': list(con_4),
-                    '3_of_5': list(con_3)
-                },
+                'consensus': {f'{t}_of_{n_members}': list(con) for t, con in consensus.items()},
                 'hits': {
-                    'mc': len(preds['mc'].intersection(target_numbers)),
-                    'rf': len(preds['rf'].intersection(target_numbers)),
-                    'xgb': len(preds['xgb'].intersection(target_numbers)),
-                    'lstm': len(preds['lstm'].intersection(target_numbers)),
-                    'catboost': len(preds['catboost'].intersection(target_numbers)),
-                    'con_4': len(con_4.intersection(target_numbers)),
-                    'con_3': len(con_3.intersection(target_numbers)),
+                    **{k: len(v.intersection(target_numbers)) for k, v in preds.items()},
+                    **{f'con_{t}': len(consensus[t].intersection(target_numbers)) for t in thresholds[1:]},
                 }
             }
             results.append(row_result)
             
-            if verbose:
-                # Simplified output for brevity
-                print(f"Draw {i} | Consensus(3+): {len(con_3)} hits: {len(con_3.intersection(target_numbers))}")
+            if verbose and thresholds:
+                # Simplified output for brevity (widest consensus)
+                loosest = consensus[thresholds[-1]]
+                print(f"Draw {i} | Consensus({thresholds[-1]}+): {len(loosest)} hits: {len(loosest.intersection(target_numbers))}")
 
         # Cleanup at the END of backtest, not every loop
-        del lstm, rf, xgb_model, mc
-        tf.keras.backend.clear_session()
+        del models
+        if 'tensorflow' in sys.modules:
+            import tensorflow as tf
+            tf.keras.backend.clear_session()
         gc.collect()
 
         return {'draws': len(results), 'details': results}
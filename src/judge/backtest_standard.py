@@ -1,5 +1,66 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from core.base import ModelFactory, Lottery
-from typing import Dict, Any
+from data.features import build_incidence_matrix, extract_draws
+from typing import Dict, Any, List, Tuple
+
+# Per-process state for parallel workers (set once by _init_worker, reused by every shard)
+_WORKER_STATE = {}
+
+def _walk_forward(df: pd.DataFrame, incidence: np.ndarray, indices: List[int], model_type: str, model_args: Dict[str, Any],
+                  game: Tuple[int, int, int], prediction_size: int, incremental: bool, silent: bool) -> List[Tuple[int, list]]:
+    """
+    Predicts each draw in `indices` (ascending) from the history before it.
+    Returns (draw_index, prediction) pairs; draws where the model failed are skipped.
+    """
+    range_min, range_max, draw_count = game
+    predictions = []
+    model = None
+
+    for i in indices:
+        # Train on history up to i (exclusive) - iloc slices are not copied, models only read them
+        # Target draw is at i
+        try:
+            if model is None:
+                model = ModelFactory.create_model(model_type, range_min, range_max, draw_count)
+                model.train(df.iloc[:i], incidence=incidence[:i])
+            prediction = model.predict(count=prediction_size, **model_args)
+        except Exception:
+            # If model fails (e.g. not enough data), skip
+            model = None
+            continue
+
+        predictions.append((i, prediction))
+
+        # Advance the model past the target draw (incremental) or drop it to retrain next round
+        if incremental:
+            try:
+                model.update(list(df.iloc[i]['dezenas']))
+            except NotImplementedError:
+                if not silent:
+                    print(f"{model.name} does not support incremental updates. Retraining every draw.")
+                incremental = False
+                model = None
+            except Exception:
+                model = None
+        else:
+            model = None
+
+    return predictions
+
+def _init_worker(incidence_path: str):
+    # Map the shared history read-only; draws are rebuilt from it once per process, not per shard
+    incidence = np.load(incidence_path, mmap_mode='r')
+    _WORKER_STATE['incidence'] = incidence
+    _WORKER_STATE['df'] = pd.DataFrame({'dezenas': [np.flatnonzero(row).tolist() for row in incidence]})
+
+def _run_shard(indices: List[int], model_type: str, model_args: Dict[str, Any], game: Tuple[int, int, int],
+               prediction_size: int, incremental: bool) -> List[Tuple[int, list]]:
+    return _walk_forward(_WORKER_STATE['df'], _WORKER_STATE['incidence'], indices, model_type, model_args,
+                         game, prediction_size, incremental, silent=True)
 
 class Backtester:
     def __init__(self, lottery: Lottery, model_type: str, model_args: Dict[str, Any], range_min: int, range_max: int, draw_count: int):
@@ -9,75 +70,77 @@ class Backtester:
         self.range_min = range_min
         self.range_max = range_max
         self.draw_count = draw_count
-        
-    def run(self, draws_to_test: int = 100, prediction_size: int = None, silent: bool = False) -> Dict[str, Any]:
+
+    def run(self, draws_to_test: int = 100, prediction_size: int = None, silent: bool = False, incremental: bool = False,
+            jobs: int = 1) -> Dict[str, Any]:
         """
         Runs the backtest.
         :param draws_to_test: Number of most recent draws to test.
         :param prediction_size: Number of balls to predict per draw (bet size).
         :param silent: If True, suppresses print output.
+        :param incremental: If True, trains once and advances the model with update() after each tested draw
+                            instead of retraining from scratch. Models without update() fall back to retraining.
+        :param jobs: Number of worker processes. Tested draws are split into contiguous shards; results are
+                     merged by draw index so they match the serial run.
         """
         if prediction_size is None:
             prediction_size = self.draw_count # Default to drawing game size
-            
+
         # Ensure data is loaded and preprocessed
         df = self.lottery.preprocess_data()
-        
+
         total_draws = len(df)
         if draws_to_test > total_draws:
             draws_to_test = total_draws
-            
+
         start_index = total_draws - draws_to_test
-        
+
         results = []
         total_cost = 0.0
         hits_distribution = {}
-        
+
         if not silent:
             print(f"Starting backtest for {self.model_type} on {self.lottery.name}...")
             print(f"Testing last {draws_to_test} draws. Prediction size: {prediction_size}.")
-        
+
         # Iterating through history
         min_history = 100 # Safe margin
         if start_index < min_history:
              if not silent:
                 print(f"Warning: Start index {start_index} is low. Early predictions might be poor.")
-             
-        for i in range(start_index, total_draws):
-            # Split data
-            # Train on history up to i (exclusive)
-            train_data = df.iloc[:i].copy()
-            # Target draw is at i
+
+        # Encoded history: models slice it instead of re-parsing the 'dezenas' lists of each prefix
+        incidence = getattr(self.lottery, 'incidence', None)
+        if incidence is None or len(incidence) != total_draws:
+            incidence = build_incidence_matrix(extract_draws(df), self.range_max)
+
+        indices = list(range(start_index, total_draws))
+        game = (self.range_min, self.range_max, self.draw_count)
+        if jobs > 1 and len(indices) > 1:
+            predictions = self._run_parallel(incidence, indices, game, prediction_size, incremental, jobs)
+        else:
+            predictions = _walk_forward(df, incidence, indices, self.model_type, self.model_args,
+                                        game, prediction_size, incremental, silent)
+
+        for i, prediction in predictions:
             target_draw = df.iloc[i]
             target_numbers = set(target_draw['dezenas'])
-            
-            # Instantiate and train model
-            # We recreate model each time to prevent state leakage (unless model natively supports incremental, but clean slate is safer)
-            model = ModelFactory.create_model(self.model_type, self.range_min, self.range_max, self.draw_count)
-            try:
-                model.train(train_data)
-                prediction = model.predict(count=prediction_size, **self.model_args)
-            except Exception:
-                # If model fails (e.g. not enough data), skip
-                # print(f"Draw {i}: Model error {e}")
-                continue
-                
             prediction_set = set(prediction)
-            
+
             # Check hits
             hits = len(prediction_set.intersection(target_numbers))
-            
+
             # Calculate cost and prize
             # We need a Prize Calculator?
             # For now, let's just track hits. Prize logic is complex (split pots etc).
             # We can use fixed prize table approximation if available, or just Cost.
-            
+
             cost = self.lottery.get_price(prediction_size)
-            
+
             # Approximate Prize (Very rough, just to show mechanics)
             # MegaSena: 4 (Quadra), 5 (Quina), 6 (Sena)
             # TODO: Implement realistic prize lookup if possible, otherwise just track hits.
-            
+
             results.append({
                 'draw_index': i,
                 'draw_date': target_draw['data'],
@@ -86,13 +149,31 @@ class Backtester:
                 'hits': hits,
                 'cost': cost
             })
-            
+
             total_cost += cost
             hits_distribution[hits] = hits_distribution.get(hits, 0) + 1
-            
+
         return {
             'total_bets': len(results),
             'total_cost': total_cost,
             'hits_distribution': hits_distribution,
             'details': results
         }
+
+    def _run_parallel(self, incidence: np.ndarray, indices: List[int], game: Tuple[int, int, int],
+                      prediction_size: int, incremental: bool, jobs: int) -> List[Tuple[int, list]]:
+        """Shards the tested draws across a process pool that memory-maps the encoded history."""
+        shards = [shard.tolist() for shard in np.array_split(indices, min(jobs, len(indices)))]
+
+        with tempfile.TemporaryDirectory(prefix="preloto_backtest_") as tmp:
+            incidence_path = os.path.join(tmp, "incidence.npy")
+            np.save(incidence_path, np.ascontiguousarray(incidence))
+
+            with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker, initargs=(incidence_path,)) as pool:
+                futures = [
+                    pool.submit(_run_shard, shard, self.model_type, self.model_args, game, prediction_size, incremental)
+                    for shard in shards
+                ]
+                predictions = [p for future in futures for p in future.result()]
+
+        return sorted(predictions, key=lambda p: p[0])
@@ -1,27 +1,68 @@
 
 import sys
 import gc
-from typing import Dict, Any
+import time
+import glob
+import os
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, List, Tuple
 from collections import Counter
-import tensorflow as tf
-from core.base import Lottery
-from models.tree.rf import RandomForestModel
-from models.deep.lstm import LSTMModel
-from models.heuristic.monte_carlo import MonteCarloModel
-from models.tree.xgboost import XGBoostModel
+import pandas as pd
+from core.base import Lottery, ModelFactory
+from judge.members import MEMBERS, CANARIES, resolve_members, create_member, train_member
+
+def _predict_member(model_type: str, df: pd.DataFrame, game: Tuple[int, int, int], count: int,
+                    train_args: Dict[str, Any], snapshot_path: str = None) -> Tuple[list, float]:
+    """
+    Trains (or loads) one ensemble member and predicts `count` numbers. Returns (numbers, seconds).
+    Takes the resolved ModelFactory type and train() kwargs so it can run in a spawned worker.
+    """
+    start = time.perf_counter()
+    model = ModelFactory.create_model(model_type, *game)
+    
+    if snapshot_path:
+        model.load(snapshot_path)
+    else:
+        model.train(df, **train_args)
+    
+    return sorted(model.predict(count=count)), time.perf_counter() - start
+
+def _snapshot_stamp(path: str):
+    """Latest modification time of the files saved under a snapshot base path (None if absent)."""
+    if not path:
+        return None
+    files = glob.glob(path + '*')
+    return max(os.path.getmtime(f) for f in files) if files else None
 
 class EnsemblePredictor:
-    def __init__(self, lottery: Lottery, range_min: int, range_max: int, draw_count: int, model_args: Dict[str, Any] = None, snapshot_paths: Dict[str, str] = None):
+    def __init__(self, lottery: Lottery, range_min: int, range_max: int, draw_count: int, model_args: Dict[str, Any] = None, snapshot_paths: Dict[str, str] = None,
+                 parallel: bool = True, timeout: float = None, members: List[str] = None, canaries: List[str] = None,
+                 keep_models: bool = False):
         self.lottery = lottery
         self.range_min = range_min
         self.range_max = range_max
         self.draw_count = draw_count
         self.model_args = model_args or {}
         self.snapshot_paths = snapshot_paths or {}
+        # Voting members and ledger-only canaries, by name (see judge.members)
+        self.members = resolve_members(members)
+        self.canaries = resolve_members(CANARIES if canaries is None else canaries)
+        # Run members concurrently (see judge.members runners); members still running after `timeout` seconds are dropped
+        self.parallel = parallel
+        self.timeout = timeout
+        # Warm mode (long-running service): trained members stay in this process and are reused,
+        # advanced with update() when draws are appended and reloaded when their snapshot changes
+        self.keep_models = keep_models
+        self._warm = {} # name -> (model, draws seen, snapshot stamp)
+        self._logged = set() # (draw, count) already written to the ledger in warm mode
+        self._ledger = None
+        self._tf_futures = [] # Keras members of the last run; may still be running after a timeout
         
     def predict_next(self, count: int = None) -> Dict[str, Any]:
         """
         Trains with ALL available data (or loads snapshots) and predicts the next unknown draw.
+        Members run concurrently unless parallel=False; per-member wall times are returned in 'timings'.
         """
         final_count = count if count is not None else self.draw_count
         print(f"--- Starting FUTURE PREDICTION for {self.lottery.name} (Top {final_count} numbers) ---", file=sys.stderr)
@@ -29,133 +70,67 @@ class EnsemblePredictor:
         # Ensure data is loaded
         df = self.lottery.preprocess_data()
         
-        # Parameters
-        rf_estimators = int(self.model_args.get('rf_n_estimators', self.model_args.get('n_estimators', 100)))
-        xgb_estimators = int(self.model_args.get('xgb_n_estimators', self.model_args.get('n_estimators', 100)))
-        lstm_epochs = int(self.model_args.get('epochs', 10))
-        lstm_units = int(self.model_args.get('units', 128))
-        
         print(f"Using database with {len(df)} draws.", file=sys.stderr)
         
-        preds = {}
-        
-        # 1. Monte Carlo (Fast, no snapshot needed usually)
-        print(" > 1/5: Monte Carlo...", file=sys.stderr)
-        try:
-            mc = MonteCarloModel(self.range_min, self.range_max, self.draw_count)
-            mc.train(df)
-            preds['mc'] = set(mc.predict(count=final_count))
-        except Exception as e:
-            print(f"Error in MC: {e}", file=sys.stderr)
-            preds['mc'] = set()
-
-        # 2. Random Forest
-        print(" > 2/5: Random Forest...", file=sys.stderr)
-        try:
-            rf = RandomForestModel(self.range_min, self.range_max, self.draw_count)
-            # Check Snapshot
-            if 'rf' in self.snapshot_paths:
-                print(f"   [Snapshot] Loading RF from {self.snapshot_paths['rf']}...", file=sys.stderr)
-                rf.load(self.snapshot_paths['rf'])
-            else:
-                rf.train(df, n_estimators=rf_estimators, **self.model_args)
-                
-            preds['rf'] = set(rf.predict(count=final_count))
-        except Exception as e:
-            print(f"Error in RF: {e}", file=sys.stderr)
-            preds['rf'] = set()
-
-        # 3. XGBoost
-        print(" > 3/5: XGBoost...", file=sys.stderr)
-        try:
-            xgb_model = XGBoostModel(self.range_min, self.range_max, self.draw_count)
-            if 'xgb' in self.snapshot_paths:
-                print(f"   [Snapshot] Loading XGB from {self.snapshot_paths['xgb']}...", file=sys.stderr)
-                xgb_model.load(self.snapshot_paths['xgb'])
-            else:
-                xgb_args = self.model_args.copy()
-                xgb_args['n_estimators'] = xgb_estimators
-                if 'rf_n_estimators' in xgb_args:
-                    del xgb_args['rf_n_estimators']
-                xgb_model.train(df, **xgb_args)
-                
-            preds['xgb'] = set(xgb_model.predict(count=final_count))
-        except Exception as e:
-            print(f"Error in XGB: {e}", file=sys.stderr)
-            preds['xgb'] = set()
-
-        # 4. LSTM
-        print(" > 4/5: LSTM (Deep Learning)...", file=sys.stderr)
-        try:
-            lstm = LSTMModel(self.range_min, self.range_max, self.draw_count)
-            if 'lstm' in self.snapshot_paths:
-                print(f"   [Snapshot] Loading LSTM from {self.snapshot_paths['lstm']}...", file=sys.stderr)
-                lstm.load(self.snapshot_paths['lstm'])
-            else:
-                lstm_args = self.model_args.copy()
-                if 'epochs' in lstm_args:
-                    del lstm_args['epochs']
-                if 'units' in lstm_args:
-                    del lstm_args['units']
-                lstm.train(df, epochs=lstm_epochs, batch_size=32, verbose=0, units=lstm_units, **lstm_args)
-            
-            preds['lstm'] = set(lstm.predict(count=final_count))
-        except Exception as e:
-            print(f"Error in LSTM: {e}", file=sys.stderr)
-            preds['lstm'] = set()
+        outputs, timings = self._run_members(df, final_count)
+        preds = {name: set(outputs.get(name, [])) for name in self.members}
+        canary_preds = {name: set(outputs[name]) for name in self.canaries if name in outputs}
 
-        # 5. CatBoost (New)
-        print(" > 5/5: CatBoost...", file=sys.stderr)
-        try:
-            from models.tree.catboost import CatBoostModel
-            cat = CatBoostModel(self.range_min, self.range_max, self.draw_count)
-            if 'catboost' in self.snapshot_paths:
-                print(f"   [Snapshot] Loading CatBoost from {self.snapshot_paths['catboost']}...", file=sys.stderr)
-                cat.load(self.snapshot_paths['catboost'])
-            else:
-                # Default training if no snapshot
-                cat.train(df, verbose=0)
-            
-            preds['catboost'] = set(cat.predict(count=final_count))
-        except Exception as e:
-            print(f"Error in CatBoost: {e}", file=sys.stderr)
-            preds['catboost'] = set()
-
-        # 6. Canary Models (Fast Heuristics) - For Ledger Only
-        print(" > 6/6: Running Canaries (Analysis)...", file=sys.stderr)
-        canary_preds = {}
-        try:
-            from models.heuristic.frequency import FrequencyModel
-            from models.heuristic.gap import GapModel
-            from models.heuristic.surfing import SurfingModel
+        # Logging to Ledger
+        self._log_predictions(df, preds, canary_preds, final_count)
 
-            # Frequency
-            freq = FrequencyModel(self.range_min, self.range_max, self.draw_count)
-            freq.train(df)
-            canary_preds['frequency'] = set(freq.predict(count=final_count))
+        # Consensus
+        all_votes = []
+        for p in preds.values():
+            all_votes.extend(list(p))
+        
+        vote_counts = Counter(all_votes)
+        
+        # Create Result Object
+        result = {
+            'models': {k: sorted(list(v)) for k, v in preds.items()},
+            'canaries': {k: sorted(list(v)) for k, v in canary_preds.items()}, 
+            'consensus_ranking': [],
+            'timings': timings
+        }
+        
+        common = vote_counts.most_common()
+        for num, votes in common:
+            result['consensus_ranking'].append({'number': num, 'votes': votes})
 
-            # Gap
-            gap = GapModel(self.range_min, self.range_max, self.draw_count)
-            gap.train(df)
-            canary_preds['gap'] = set(gap.predict(count=final_count))
+        # Suggestion: Top N based on requested count
+        suggestion = [num for num, _ in common[:final_count]]
+        result['suggestion'] = sorted(suggestion)
 
-            # Surfing
-            surf = SurfingModel(self.range_min, self.range_max, self.draw_count)
-            surf.train(df)
-            canary_preds['surfing'] = set(surf.predict(count=final_count))
-            
-        except Exception as e:
-            print(f"Error in Canaries: {e}", file=sys.stderr)
+        # Cleanup (Keras members ran in this process); warm models must keep their session, and a
+        # timed-out Keras member may still be training on the TF thread
+        tf_busy = any(not future.done() for future in self._tf_futures)
+        if not self.keep_models:
+            if 'tensorflow' in sys.modules and not tf_busy:
+                import tensorflow as tf
+                tf.keras.backend.clear_session()
+            gc.collect()
+        
+        return result
 
-        # Logging to Ledger
+    def _log_predictions(self, df: pd.DataFrame, preds: Dict[str, set], canary_preds: Dict[str, set], count: int):
+        """Writes member and canary predictions for the next draw to the PredictionLedger."""
         try:
             from judge.ledger import PredictionLedger
-            ledger = PredictionLedger() # Default path
+            # Opened once per predictor (a warm predictor keeps it across calls)
+            if self._ledger is None:
+                self._ledger = PredictionLedger() # Default path
+            ledger = self._ledger
             
-            # Log Heavy Models
             draw_col = 'Concurso' if 'Concurso' in df.columns else 'concurso'
             last_draw = int(df[draw_col].max())
+            if self.keep_models:
+                # Warm members answer repeated requests identically: log each draw/bet size once
+                if (last_draw, count) in self._logged:
+                    return
+                self._logged.add((last_draw, count))
             
+            entries = []
             for model_name, p_set in preds.items():
                 # Extract metadata (snapshot path or config)
                 meta = {}
@@ -165,58 +140,149 @@ class EnsemblePredictor:
                 else:
                     meta['type'] = 'trained_on_fly'
                 
-                ledger.log_prediction(
-                    model_name=model_name, 
-                    game=self.lottery.slug, 
-                    draw_number=last_draw + 1, 
-                    predicted_numbers=sorted(list(p_set)),
-                    metadata=meta
-                )
+                entries.append({
+                    'model_name': model_name, 
+                    'game': self.lottery.slug, 
+                    'draw_number': last_draw + 1, 
+                    'predicted_numbers': sorted(list(p_set)),
+                    'metadata': meta
+                })
             
             # Log Canaries
             for model_name, p_set in canary_preds.items():
-                ledger.log_prediction(
-                    model_name=f"{model_name}_canary", 
-                    game=self.lottery.slug, 
-                    draw_number=last_draw + 1, 
-                    predicted_numbers=sorted(list(p_set)),
-                    metadata={'type': 'heuristic_canary'}
-                )
-                
+                entries.append({
+                    'model_name': f"{model_name}_canary", 
+                    'game': self.lottery.slug, 
+                    'draw_number': last_draw + 1, 
+                    'predicted_numbers': sorted(list(p_set)),
+                    'metadata': {'type': 'heuristic_canary'}
+                })
+            
+            # One transaction for the whole ensemble
+            ledger.log_predictions(entries)
             print("   [Ledger] Predictions logged successfully.", file=sys.stderr)
         except Exception as e:
             print(f"   [Ledger] Failed to log: {e}", file=sys.stderr)
 
-        # Consensus
-        all_votes = []
-        for p in preds.values():
-            all_votes.extend(list(p))
+    def _run_members(self, df: pd.DataFrame, count: int) -> Tuple[Dict[str, list], Dict[str, float]]:
+        """
+        Runs every member and canary, returning ({name: numbers}, {name: seconds}).
+        Failed or timed-out members are reported and left out of the first dict (timing None).
         
-        vote_counts = Counter(all_votes)
+        On timeout, 'process' members are stopped by terminating their worker pool, which this method
+        owns (multiprocessing Pool.terminate(); nothing relies on executor internals). Members on
+        the TF thread or the thread pool cannot be interrupted: they run to completion in the
+        background (and the interpreter waits for them at exit); their results are discarded.
+        """
+        game = (self.range_min, self.range_max, self.draw_count)
+        members = {name: MEMBERS[name] for name in dict.fromkeys(self.members + self.canaries)}
+        if self.keep_models:
+            # Warm models live in this process: process-bound members run on threads instead
+            jobs = {name: (self._warm_member, (name, df, count)) for name in members}
+            members = {name: {**spec, 'runner': 'thread' if spec['runner'] == 'process' else spec['runner']}
+                       for name, spec in members.items()}
+        else:
+            jobs = {
+                name: (_predict_member, (spec['model'], df, game, count, spec['train_args'](self.model_args),
+                                         self.snapshot_paths.get(name)))
+                for name, spec in members.items()
+            }
+        outputs, timings = {}, {}
         
-        # Create Result Object
-        result = {
-            'models': {k: sorted(list(v)) for k, v in preds.items()},
-            'canaries': {k: sorted(list(v)) for k, v in canary_preds.items()}, 
-            'consensus_ranking': []
-        }
+        def collect(name, run):
+            try:
+                outputs[name], seconds = run()
+                timings[name] = round(seconds, 3)
+                print(f" > {name}: done in {seconds:.1f}s", file=sys.stderr)
+            except (FutureTimeout, multiprocessing.TimeoutError):
+                timings[name] = None
+                print(f"Timeout in {name} after {self.timeout}s", file=sys.stderr)
+            except Exception as e:
+                timings[name] = None
+                print(f"Error in {name}: {e}", file=sys.stderr)
         
-        common = vote_counts.most_common()
-        for num, votes in common:
-            result['consensus_ranking'].append({'number': num, 'votes': votes})
-
-        # Suggestion: Top N based on requested count
-        suggestion = [num for num, _ in common[:final_count]]
-        result['suggestion'] = sorted(suggestion)
-
-        # Cleanup
-        del lstm, rf, xgb_model, mc
+        if not self.parallel:
+            for name in members:
+                collect(name, lambda name=name: jobs[name][0](*jobs[name][1]))
+            return outputs, timings
+        
+        kinds = Counter(spec['runner'] for spec in members.values())
+        # Import in-process members up front: concurrent first imports from worker threads can deadlock
+        for spec in members.values():
+            if spec['runner'] != 'process':
+                try:
+                    ModelFactory.model_class(spec['model'])
+                except Exception:
+                    pass # Reported by collect() when the member runs
+        executors, pool = {}, None
+        if kinds['process']:
+            # Spawned (not forked) workers: the parent may already hold TensorFlow threads
+            pool = multiprocessing.get_context('spawn').Pool(processes=kinds['process'])
+        if kinds['tf']:
+            executors['tf'] = ThreadPoolExecutor(max_workers=1)
+        if kinds['thread']:
+            executors['thread'] = ThreadPoolExecutor(max_workers=kinds['thread'])
         try:
-            del cat
-        except Exception:
-            pass
+            # name -> callable(timeout) returning the member's result
+            pending = {}
+            self._tf_futures = []
+            for name, spec in members.items():
+                func, args = jobs[name]
+                if spec['runner'] == 'process':
+                    result = pool.apply_async(func, args)
+                    pending[name] = lambda timeout, result=result: result.get(timeout=timeout)
+                else:
+                    future = executors[spec['runner']].submit(func, *args)
+                    pending[name] = lambda timeout, future=future: future.result(timeout=timeout)
+                    if spec['runner'] == 'tf':
+                        self._tf_futures.append(future)
+            deadline = None if self.timeout is None else time.perf_counter() + self.timeout
+            for name, wait in pending.items():
+                remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                collect(name, lambda wait=wait, remaining=remaining: wait(remaining))
+        finally:
+            # Every result is collected or timed out: stop the tree workers instead of letting the
+            # timed-out ones finish (and keep the interpreter alive) in the background
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            # Do not block on in-process members that timed out; queued work is cancelled
+            for executor in executors.values():
+                executor.shutdown(wait=self.timeout is None, cancel_futures=True)
+        
+        return outputs, timings
+
+    def _warm_member(self, name: str, df: pd.DataFrame, count: int) -> Tuple[list, float]:
+        """
+        keep_models counterpart of _predict_member: reuses the member trained on an earlier call.
+        Appended draws are fed to update() (retraining when unsupported); a changed snapshot is reloaded.
+        """
+        start = time.perf_counter()
+        snapshot_path = self.snapshot_paths.get(name)
+        stamp = _snapshot_stamp(snapshot_path)
+        model, seen, loaded = self._warm.get(name, (None, 0, None))
         
-        tf.keras.backend.clear_session()
-        gc.collect()
+        if model is not None and (stamp != loaded or seen > len(df)):
+            model = None
+        elif model is not None and seen < len(df):
+            new_draws = [list(draw) for draw in df['dezenas'].iloc[seen:]]
+            try:
+                if snapshot_path:
+                    # Snapshots stay frozen; online members only move their input window forward
+                    if MEMBERS[name]['online']:
+                        model.prime(df)
+                else:
+                    for draw in new_draws:
+                        model.update(draw)
+            except Exception:
+                model = None
         
-        return result
+        if model is None:
+            model = create_member(name, self.range_min, self.range_max, self.draw_count)
+            if snapshot_path:
+                model.load(snapshot_path)
+            else:
+                train_member(name, model, df, self.model_args)
+        self._warm[name] = (model, len(df), stamp)
+        
+        return sorted(model.predict(count=count)), time.perf_counter() - start
@@ -1,91 +1,135 @@
 import os
+import sqlite3
 import pandas as pd
 from datetime import datetime
 import json
 from typing import List, Dict, Any
 
+COLUMNS = [
+    "timestamp", "game", "draw_number", "model_name",
+    "predicted_numbers", "outcome", "metadata"
+]
+_INSERT = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
 class PredictionLedger:
-    def __init__(self, filepath: str = "data/ledger.csv"):
-        self.filepath = filepath
+    """
+    Prediction history stored in SQLite, indexed by game/draw and model/game so lookups and
+    appends stay cheap as the ledger grows.
+
+    A path ending in '.csv' (the former storage) is mapped to the '.db' next to it. An existing
+    CSV ledger is imported once into the database; the CSV itself is left untouched.
+    """
+
+    def __init__(self, filepath: str = "data/ledger.db"):
+        base, ext = os.path.splitext(filepath)
+        self.filepath = base + ".db" if ext == ".csv" else filepath
+        self.legacy_csv = base + ".csv"
+        self._conn = None
         self._ensure_file_exists()
 
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        return self._conn
+
     def _ensure_file_exists(self):
-        """Ensures the CSV file exists with the correct headers."""
-        columns = [
-            "timestamp", "game", "draw_number", "model_name", 
-            "predicted_numbers", "outcome", "metadata"
-        ]
-        
-        if not os.path.exists(self.filepath):
-            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-            df = pd.DataFrame(columns=columns)
-            df.to_csv(self.filepath, index=False)
-        else:
-            # Migration check: Append metadata column if missing
+        """Creates the schema (idempotent) and migrates the legacy CSV ledger on first use."""
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS predictions (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT, game TEXT, draw_number INTEGER, model_name TEXT,
+                    predicted_numbers TEXT, outcome TEXT, metadata TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_game_draw ON predictions (game, draw_number)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_model_game ON predictions (model_name, game)")
+            conn.execute("CREATE TABLE IF NOT EXISTS ledger_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        migrated = conn.execute("SELECT value FROM ledger_meta WHERE key = 'migrated_csv'").fetchone()
+        if migrated is None and os.path.exists(self.legacy_csv):
             try:
-                df = pd.read_csv(self.filepath)
-                if 'metadata' not in df.columns:
-                    df['metadata'] = None
-                    df.to_csv(self.filepath, index=False)
+                self._migrate_csv()
             except Exception as e:
-                print(f"Warning: Could not check schema migration: {e}")
+                print(f"Warning: Could not migrate {self.legacy_csv}: {e}")
+
+    def _migrate_csv(self):
+        """Imports the CSV ledger in chunks (older files may lack the metadata column); empty cells become NULL."""
+        conn = self._connect()
+        with conn:
+            try:
+                for chunk in pd.read_csv(self.legacy_csv, chunksize=100_000, dtype=str, keep_default_na=False):
+                    # Values stay text; the INTEGER column affinity converts draw_number on insert
+                    chunk = chunk.reindex(columns=COLUMNS, fill_value="")
+                    conn.executemany(_INSERT, [tuple(value or None for value in row)
+                                               for row in chunk.itertuples(index=False, name=None)])
+            except pd.errors.EmptyDataError:
+                pass
+            conn.execute("INSERT OR REPLACE INTO ledger_meta (key, value) VALUES ('migrated_csv', ?)",
+                         (datetime.now().isoformat(),))
 
-    def log_prediction(self, 
-                       model_name: str, 
-                       game: str, 
-                       draw_number: int, 
+    def log_prediction(self,
+                       model_name: str,
+                       game: str,
+                       draw_number: int,
                        predicted_numbers: List[int],
                        outcome: str = None,
                        metadata: Dict[str, Any] = None):
         """
         Logs a single prediction to the ledger.
         """
-        # Format predicted_numbers as simplified string/json for storage
-        pred_str = json.dumps(sorted(list(predicted_numbers)))
-        meta_str = json.dumps(metadata) if metadata else None
-        
-        new_row = {
-            "timestamp": datetime.now().isoformat(),
+        self.log_predictions([{
+            "model_name": model_name,
             "game": game,
             "draw_number": draw_number,
-            "model_name": model_name,
-            "predicted_numbers": pred_str,
+            "predicted_numbers": predicted_numbers,
             "outcome": outcome,
-            "metadata": meta_str
-        }
-        
-        # Append to CSV
-        df = pd.DataFrame([new_row])
-        # Force column order if possible, but append mode handles it usually or we use full write if header mismatch
-        # Simpler to just append to existing file
-        if os.path.exists(self.filepath):
-             df.to_csv(self.filepath, mode='a', header=False, index=False)
-        else:
-             df.to_csv(self.filepath, mode='w', header=True, index=False)
+            "metadata": metadata
+        }])
+
+    def log_predictions(self, entries: List[Dict[str, Any]]):
+        """
+        Logs several predictions in one transaction. Each entry takes the log_prediction
+        arguments as keys (outcome and metadata are optional).
+        """
+        timestamp = datetime.now().isoformat()
+        rows = [(
+            timestamp,
+            entry["game"],
+            int(entry["draw_number"]),
+            entry["model_name"],
+            # Format predicted_numbers as simplified string/json for storage
+            json.dumps(sorted(int(n) for n in entry["predicted_numbers"])),
+            entry.get("outcome"),
+            json.dumps(entry["metadata"]) if entry.get("metadata") else None
+        ) for entry in entries]
+
+        with self._connect() as conn:
+            conn.executemany(_INSERT, rows)
 
     def fetch_history(self, model_name: str = None, game: str = None) -> pd.DataFrame:
         """
         Retrieves prediction history, optionally filtering by model or game.
         """
-        if not os.path.exists(self.filepath):
-            return pd.DataFrame()
-            
-        try:
-            df = pd.read_csv(self.filepath)
-        except pd.errors.EmptyDataError:
-             return pd.DataFrame()
-
+        clauses, params = [], []
         if model_name:
-            df = df[df['model_name'] == model_name]
-        
+            clauses.append("model_name = ?")
+            params.append(model_name)
         if game:
-            df = df[df['game'] == game]
-            
-        return df
+            clauses.append("game = ?")
+            params.append(game)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM predictions{where} ORDER BY id",
+                                 self._connect(), params=params)
 
     def get_last_draw_number(self, game: str) -> int:
         """Returns the last draw number logged for a specific game."""
-        df = self.fetch_history(game=game)
-        if df.empty:
-            return 0
-        return int(df['draw_number'].max())
+        row = self._connect().execute("SELECT MAX(draw_number) FROM predictions WHERE game = ?", (game,)).fetchone()
+        return int(row[0]) if row[0] is not None else 0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,66 @@
+from typing import Dict, Any, List, Callable
+from core.base import ModelFactory, Model
+
+# Ensemble members, declared by name. Each entry names the ModelFactory type (imported only when the
+# member is built), where EnsemblePredictor runs it ('process' for CPU-bound tree models, 'tf' for
+# Keras models sharing one thread, 'thread' for cheap heuristics), a function turning the shared
+# --model-args into its train() kwargs, and whether it supports online prime()/update().
+MEMBERS: Dict[str, Dict[str, Any]] = {}
+
+def register_member(name: str, model_type: str, runner: str = 'thread',
+                    train_args: Callable[[Dict[str, Any]], Dict[str, Any]] = None, online: bool = False):
+    """Declares (or replaces) an ensemble member."""
+    if runner not in ('process', 'tf', 'thread'):
+        raise ValueError(f"Unknown runner '{runner}' for member {name}")
+    MEMBERS[name] = {
+        'model': model_type,
+        'runner': runner,
+        'train_args': train_args or (lambda model_args: {}),
+        'online': online,
+    }
+
+def _rf_args(model_args: Dict[str, Any]) -> Dict[str, Any]:
+    args = {k: v for k, v in model_args.items() if k != 'n_estimators'}
+    args['n_estimators'] = int(model_args.get('rf_n_estimators', model_args.get('n_estimators', 100)))
+    return args
+
+def _xgb_args(model_args: Dict[str, Any]) -> Dict[str, Any]:
+    args = {k: v for k, v in model_args.items() if k != 'rf_n_estimators'}
+    args['n_estimators'] = int(model_args.get('xgb_n_estimators', model_args.get('n_estimators', 100)))
+    return args
+
+def _deep_args(model_args: Dict[str, Any]) -> Dict[str, Any]:
+    args = dict(model_args)
+    args['epochs'] = int(args.get('epochs', 10))
+    args['units'] = int(args.get('units', 128))
+    args.update(batch_size=32, verbose=0)
+    return args
+
+register_member('mc', 'mc')
+register_member('rf', 'rf', runner='process', train_args=_rf_args)
+register_member('xgb', 'xgb', runner='process', train_args=_xgb_args)
+register_member('lstm', 'lstm', runner='tf', train_args=_deep_args, online=True)
+register_member('catboost', 'catboost', runner='process', train_args=lambda model_args: {'verbose': 0})
+register_member('transformer', 'transformer', runner='tf', train_args=_deep_args, online=True)
+
+# Canaries: fast heuristics logged to the ledger, never voting in the consensus
+register_member('frequency', 'frequency')
+register_member('gap', 'gap')
+register_member('surfing', 'surfing')
+
+DEFAULT_MEMBERS = ['mc', 'rf', 'xgb', 'lstm', 'catboost']
+CANARIES = ['frequency', 'gap', 'surfing']
+
+def resolve_members(names: List[str] = None) -> List[str]:
+    """Validates a member selection; None means DEFAULT_MEMBERS."""
+    names = list(DEFAULT_MEMBERS if names is None else names)
+    unknown = [name for name in names if name not in MEMBERS]
+    if unknown:
+        raise ValueError(f"Unknown ensemble member(s): {', '.join(unknown)}. Available: {', '.join(MEMBERS)}")
+    return names
+
+def create_member(name: str, range_min: int, range_max: int, draw_count: int) -> Model:
+    return ModelFactory.create_model(MEMBERS[name]['model'], range_min, range_max, draw_count)
+
+def train_member(name: str, model: Model, data, model_args: Dict[str, Any]):
+    model.train(data, **MEMBERS[name]['train_args'](model_args))
@@ -1,12 +1,25 @@
-from .heuristic.random_model import RandomModel as RandomModel
-from .heuristic.frequency import FrequencyModel as FrequencyModel
-from .heuristic.gap import GapModel as GapModel
-from .heuristic.surfing import SurfingModel as SurfingModel
-from .heuristic.monte_carlo import MonteCarloModel as MonteCarloModel
-from .tree.rf import RandomForestModel as RandomForestModel
-from .tree.xgboost import XGBoostModel as XGBoostModel
-from .tree.catboost import CatBoostModel as CatBoostModel
-from .deep.lstm import LSTMModel as LSTMModel
-from .deep.transformer import TransformerModel as TransformerModel
-from .deep.autoencoder import AutoEncoderModel as AutoEncoderModel
-from .ensemble.hybrid import HybridModel as HybridModel
+from importlib import import_module
+
+# Public model classes, imported on first access so that loading one model
+# (e.g. in a worker process) does not pull TensorFlow in with the others.
+_EXPORTS = {
+    'RandomModel': '.heuristic.random_model',
+    'FrequencyModel': '.heuristic.frequency',
+    'GapModel': '.heuristic.gap',
+    'SurfingModel': '.heuristic.surfing',
+    'MonteCarloModel': '.heuristic.monte_carlo',
+    'RandomForestModel': '.tree.rf',
+    'XGBoostModel': '.tree.xgboost',
+    'CatBoostModel': '.tree.catboost',
+    'LSTMModel': '.deep.lstm',
+    'TransformerModel': '.deep.transformer',
+    'AutoEncoderModel': '.deep.autoencoder',
+    'HybridModel': '.ensemble.hybrid',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
@@ -3,6 +3,8 @@ import pandas as pd
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import Dense, Input, Dropout
 from core.base import Model
+from data.features import build_incidence_matrix, extract_draws
+from models.deep.sequences import pipeline_options, row_dataset
 import pickle
 import os
 
@@ -29,14 +31,8 @@ class AutoEncoderModel(Model):
         return vec
 
     def _prepare_data(self, data: pd.DataFrame):
-        ball_cols = [c for c in data.columns if 'bola' in c.lower() or 'dezenas' in c.lower()]
-        draws = data[ball_cols].values.tolist()
-        
-        X = []
-        for d in draws:
-            X.append(self._draw_to_onehot(d))
-            
-        return np.array(X)
+        # float32 one-hot rows, encoded in one pass (same encoding as validate_batch)
+        return build_incidence_matrix(extract_draws(data), self.range_max).astype(np.float32)
 
     def _build_model(self):
         # Dense AutoEncoder
@@ -69,7 +65,13 @@ class AutoEncoderModel(Model):
         # AutoEncoder trains to reconstruct input (X -> X)
         print(f"Training AutoEncoder: epochs={epochs}, batch={batch_size}, latent={self.encoding_dim}")
         callbacks = kwargs.get('callbacks', [])
-        history = self.model.fit(X, X, epochs=epochs, batch_size=batch_size, verbose=1, shuffle=True, callbacks=callbacks)
+        options = pipeline_options(kwargs)
+        if options['pipeline'] == 'numpy':
+            history = self.model.fit(X, X, epochs=epochs, batch_size=batch_size, verbose=1, shuffle=True, callbacks=callbacks)
+        else:
+            # The dataset reshuffles its rows every epoch; fit() must not try to shuffle it again
+            dataset = row_dataset(X, batch_size, seed=options['seed'])
+            history = self.model.fit(dataset, epochs=epochs, verbose=1, shuffle=False, callbacks=callbacks)
         return history
 
     def predict(self, **kwargs) -> list:
@@ -95,15 +97,25 @@ class AutoEncoderModel(Model):
         Lower score = More "normal" (better reconstruction).
         Higher score = Anomaly.
         """
+        return float(self.validate_batch([numbers])[0])
+
+    def validate_batch(self, candidates: list, batch_size: int = 4096) -> np.ndarray:
+        """
+        Anomaly scores (reconstruction MSE) for many candidate draws at once.
+        Candidates are stacked into one-hot rows and scored with direct model calls in
+        chunks of `batch_size`, avoiding the per-call setup cost of Keras predict().
+        """
         if self.model is None:
             raise ValueError("Model not trained.")
-            
-        vec = self._draw_to_onehot(numbers)
-        reconstruction = self.model.predict(np.array([vec]), verbose=0)[0]
         
-        # Calculate reconstruction error (MSE)
-        mse = np.mean(np.power(vec - reconstruction, 2))
-        return float(mse)
+        X = build_incidence_matrix([[int(n) for n in c] for c in candidates], self.range_max).astype(np.float32)
+        scores = np.empty(len(X))
+        for start in range(0, len(X), batch_size):
+            chunk = X[start:start + batch_size]
+            reconstruction = np.asarray(self.model(chunk, training=False))
+            # Calculate reconstruction error (MSE)
+            scores[start:start + batch_size] = np.mean(np.power(chunk - reconstruction, 2), axis=1)
+        return scores
 
     def save(self, path: str):
         keras_path = path + ".keras"
@@ -0,0 +1,71 @@
+import numpy as np
+import tensorflow as tf
+from data.features import build_sequence_windows
+
+# Training input pipelines shared by the deep models. Selected with the `pipeline` model arg:
+#   'tfdata' (default): float32 tf.data batches sliced from the encoded draws, prefetched
+#   'numpy': fully materialized arrays handed to fit() (the original behaviour, for debugging)
+PIPELINES = ('tfdata', 'numpy')
+
+def pipeline_options(kwargs: dict) -> dict:
+    """Reads the input-pipeline model args (pipeline, shuffle_seed) passed to train()."""
+    pipeline = str(kwargs.get('pipeline', 'tfdata')).lower()
+    if pipeline not in PIPELINES:
+        raise ValueError(f"Unknown pipeline '{pipeline}'. Expected one of {PIPELINES}.")
+    seed = kwargs.get('shuffle_seed')
+    return {'pipeline': pipeline, 'seed': int(seed) if seed is not None else None}
+
+def _finish(indices: tf.data.Dataset, count: int, batch_size: int, shuffle: bool, seed: int, gather) -> tf.data.Dataset:
+    # Only indices are shuffled and batched; rows are gathered per batch from the in-memory
+    # encoded matrix, which acts as the cache (nothing is re-encoded between epochs)
+    if shuffle:
+        indices = indices.shuffle(count, seed=seed, reshuffle_each_iteration=True)
+    return (indices.batch(batch_size)
+            .map(gather, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+            .prefetch(tf.data.AUTOTUNE))
+
+def window_dataset(vectors: np.ndarray, window_size: int, target_size: int, batch_size: int = 32,
+                   shuffle: bool = True, seed: int = None) -> tf.data.Dataset:
+    """
+    Batches of (window, next draw) pairs for the sequence models, sliced lazily from the encoded
+    draws (see data.features.build_draw_vectors), so memory scales with n_draws instead of
+    n_draws * window_size. The target is the first `target_size` columns (the multi-hot numbers)
+    of the draw right after each window; windows are reshuffled every epoch when `shuffle` is set.
+    """
+    data = tf.constant(vectors, dtype=tf.float32)
+    offsets = tf.range(window_size, dtype=tf.int64)
+    count = len(vectors) - window_size
+
+    def gather(starts):
+        windows = tf.gather(data, starts[:, None] + offsets[None, :])
+        targets = tf.gather(data, starts + window_size)[:, :target_size]
+        return windows, targets
+
+    return _finish(tf.data.Dataset.range(count), count, batch_size, shuffle, seed, gather)
+
+def row_dataset(rows: np.ndarray, batch_size: int = 32, shuffle: bool = True, seed: int = None) -> tf.data.Dataset:
+    """Batches of (row, row) pairs for reconstruction models such as the AutoEncoder."""
+    data = tf.constant(rows, dtype=tf.float32)
+
+    def gather(idx):
+        batch = tf.gather(data, idx)
+        return batch, batch
+
+    return _finish(tf.data.Dataset.range(len(rows)), len(rows), batch_size, shuffle, seed, gather)
+
+def fine_tune(model, vectors: np.ndarray, window_size: int, target_size: int, windows: int = 1, steps: int = 1):
+    """
+    Online update for the sequence models: runs `steps` gradient steps on the newest `windows`
+    (window, next draw) pairs of the encoded draws only. Returns the last loss, or None when
+    there is no complete window yet.
+    """
+    X = build_sequence_windows(vectors, window_size)[:-1][-windows:]
+    if not len(X):
+        return None
+    y = vectors[window_size:, :target_size][-windows:]
+    
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    loss = None
+    for _ in range(steps):
+        loss = model.train_on_batch(X, y)
+    return loss
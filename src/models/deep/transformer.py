@@ -1,9 +1,11 @@
 import numpy as np
 import pandas as pd
+import tensorflow as tf
 from tensorflow.keras.models import Model as KerasModel
 from tensorflow.keras.layers import Dense, Input, MultiHeadAttention, LayerNormalization, Dropout, GlobalAveragePooling1D
 from core.base import Model
-from data.features import calculate_sum, count_odds, count_evens, calculate_spread
+from models.deep.sequences import fine_tune, pipeline_options, window_dataset
+from data.features import build_incidence_matrix, build_draw_vectors, build_sequence_windows, extract_draws
 
 class TransformerModel(Model):
     def __init__(self, range_min: int, range_max: int, draw_count: int):
@@ -22,64 +24,50 @@ class TransformerModel(Model):
         
         # Feature vector size: (range_max + 1) + 4 extra features (Sum, Odd, Even, Spread)
         self.input_size = (self.range_max + 1) + 4
-
-    def _prepare_sequences(self, data: pd.DataFrame):
-        ball_cols = [c for c in data.columns if 'bola' in c.lower() or 'dezenas' in c.lower()]
-        
-        
-        draws = data[ball_cols].values.tolist()
-        
-        X = []
-        y = []
-        
-        rows = len(draws)
+        # Compiled inference function, built lazily (see _inference_fn)
+        self._infer = None
+        # Online learning (see update): gradient steps on the newest windows after each new draw
+        self.fine_tune_steps = 1
+        self.fine_tune_windows = 1
+        self.recent_draws = None
+
+    def _encode(self, data: pd.DataFrame, incidence: np.ndarray = None) -> np.ndarray:
+        # A precomputed incidence matrix (e.g. Lottery.incidence[:i]) skips re-parsing the draws
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
+        return build_draw_vectors(incidence, self.draw_count)
+
+    def _prepare_sequences(self, data: pd.DataFrame, incidence: np.ndarray = None):
+        vectors = self._encode(data, incidence)
+        
+        rows = len(vectors)
         if rows <= self.window_size:
             return np.array([]), np.array([])
 
-        for i in range(rows - self.window_size):
-            window = draws[i : i + self.window_size]
-            target = draws[i + self.window_size]
-            
-            X.append(self._draws_to_multihot(window))
-            y.append(self._draw_to_multihot(target, include_features=False)) # Target is just the numbers
-            
-        return np.array(X), np.array(y)
-
-    def _draw_to_multihot(self, draw, include_features=True):
-        # Base vector: One-hot for numbers
-        vec = np.zeros(self.range_max + 1)
-        valid_numbers = []
-        for num in draw:
-            try:
-                n = int(num)
-                if 0 <= n <= self.range_max:
-                    vec[n] = 1.0
-                    valid_numbers.append(n)
-            except Exception:
-                pass
-        
-        if not include_features:
-            return vec
-
-        # 1. Sum Normalize: Max possible sum approx RangeMax * DrawCount
-        max_sum_theoretical = self.range_max * self.draw_count
-        s = calculate_sum(valid_numbers) / max_sum_theoretical
-        
-        # 2. Odd Normalize: Max is DrawCount
-        o = count_odds(valid_numbers) / self.draw_count
-        
-        # 3. Even Normalize: Max is DrawCount
-        e = count_evens(valid_numbers) / self.draw_count
-        
-        # 4. Spread Normalize: Max is RangeMax
-        sp = calculate_spread(valid_numbers) / self.range_max
-        
-        # Append features
-        features = np.array([s, o, e, sp])
-        return np.concatenate([vec, features])
-
-    def _draws_to_multihot(self, draws):
-        return np.array([self._draw_to_multihot(d, include_features=True) for d in draws])
+        # Each window predicts the draw right after it; the target is just the numbers.
+        # X is a zero-copy view over the encoded draws (training streams it via window_dataset)
+        X = build_sequence_windows(vectors, self.window_size)[:-1]
+        y = vectors[self.window_size:, :self.range_max + 1]
+        return X, y
+
+    def _inference_fn(self):
+        """
+        Compiled forward pass with a fixed (batch, window_size, input_size) float32 signature,
+        traced once per model and reused by every predict() call.
+        """
+        if getattr(self, '_infer', None) is None:
+            model = self.model
+            self._infer = tf.function(
+                lambda x: model(x, training=False),
+                input_signature=[tf.TensorSpec([None, self.window_size, self.input_size], tf.float32)]
+            )
+        return self._infer
+
+    def __getstate__(self):
+        # Traced functions are not picklable; they are rebuilt on demand
+        state = self.__dict__.copy()
+        state['_infer'] = None
+        return state
 
     def _build_model(self):
         # Define Input
@@ -113,6 +101,7 @@ class TransformerModel(Model):
         model.compile(loss='binary_crossentropy', optimizer='adam', metrics=['accuracy'])
         
         self.model = model
+        self._infer = None
 
     def train(self, data: pd.DataFrame, epochs: int = 50, batch_size: int = 32, **kwargs):
         # Cast to int
@@ -129,45 +118,78 @@ class TransformerModel(Model):
              self._build_model()
 
         print(f"Training Transformer: epochs={epochs}, batch={batch_size}, window={self.window_size}")
-        X, y = self._prepare_sequences(data)
+        vectors = self._encode(data, kwargs.get('incidence'))
+
+        if 'fine_tune_steps' in kwargs:
+            self.fine_tune_steps = int(kwargs['fine_tune_steps'])
+        if 'fine_tune_windows' in kwargs:
+            self.fine_tune_windows = int(kwargs['fine_tune_windows'])
 
         # Store last window for prediction
-        ball_cols = [c for c in data.columns if 'bola' in c.lower() or 'dezenas' in c.lower()]
-        draws = data[ball_cols].values.tolist()
-        if len(draws) >= self.window_size:
-            self.last_window = draws[-self.window_size:]
-        else:
-            self.last_window = None
+        self.prime(data)
         
-        if len(X) == 0:
+        if len(vectors) <= self.window_size:
             print("Not enough data to train Transformer.")
             return
 
         callbacks = kwargs.get('callbacks', [])
-        history = self.model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=1, callbacks=callbacks)
+        options = pipeline_options(kwargs)
+        if options['pipeline'] == 'numpy':
+            X = np.ascontiguousarray(build_sequence_windows(vectors, self.window_size)[:-1])
+            y = vectors[self.window_size:, :self.range_max + 1]
+            history = self.model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=1, callbacks=callbacks)
+        else:
+            dataset = window_dataset(vectors, self.window_size, self.range_max + 1, batch_size, seed=options['seed'])
+            # The dataset reshuffles its windows every epoch; fit() must not try to shuffle it again
+            history = self.model.fit(dataset, epochs=epochs, verbose=1, shuffle=False, callbacks=callbacks)
         return history
 
+    def prime(self, data: pd.DataFrame):
+        """Sets the context used by predict() and update() to the latest draws of `data`, without training."""
+        draws = extract_draws(data)
+        self.recent_draws = draws[-(self.window_size + self.fine_tune_windows):]
+        if len(draws) >= self.window_size:
+            self.last_window = draws[-self.window_size:]
+        else:
+            self.last_window = None
+
+    def update(self, draw: list):
+        """
+        Online learning: appends the draw to the context and fine-tunes the current weights with
+        fine_tune_steps gradient steps on the newest fine_tune_windows windows, instead of
+        retraining for full epochs over the whole history.
+        """
+        if self.model is None or self.recent_draws is None:
+            raise ValueError("Model has not been trained yet.")
+        
+        keep = self.window_size + self.fine_tune_windows
+        self.recent_draws = (list(self.recent_draws) + [[int(x) for x in draw]])[-keep:]
+        if len(self.recent_draws) >= self.window_size:
+            self.last_window = self.recent_draws[-self.window_size:]
+        
+        vectors = build_draw_vectors(build_incidence_matrix(self.recent_draws, self.range_max), self.draw_count)
+        fine_tune(self.model, vectors, self.window_size, self.range_max + 1, self.fine_tune_windows, self.fine_tune_steps)
+
     def predict(self, **kwargs) -> list:
         # Check if data is provided in kwargs, otherwise use stored last_window
         data = kwargs.get('data')
         current_window = None
 
         if data is not None and not data.empty:
-            ball_cols = [c for c in data.columns if 'bola' in c.lower() or 'dezenas' in c.lower()]
-            draws = data[ball_cols].values.tolist()
+            draws = extract_draws(data)
             if len(draws) >= self.window_size:
                 current_window = draws[-self.window_size:]
         elif hasattr(self, 'last_window') and self.last_window is not None:
              current_window = self.last_window
 
         if current_window:
-            X_input = np.array([self._draws_to_multihot(current_window)])
+            X_input = build_draw_vectors(build_incidence_matrix(current_window, self.range_max), self.draw_count)[None, :, :]
             
             if self.model is None:
                 return []
             
-            # Optimization: Use __call__ for faster inference
-            prediction_tensor = self.model(X_input, training=False)
+            # Single graph call through the cached tf.function (no per-call Keras overhead or retracing)
+            prediction_tensor = self._inference_fn()(X_input)
             probs = prediction_tensor.numpy()[0]
             
             # Mask out numbers below range_min (e.g. 0)
@@ -216,6 +238,7 @@ class TransformerModel(Model):
             
         if os.path.exists(keras_path):
             self.model = load_model(keras_path)
+            self._infer = None
             # Compile logic is usually embedded in save/load for keras
         else:
              print(f"Warning: Keras model {keras_path} not found.")
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from core.base import Model
+from data.features import build_incidence_matrix, extract_draws
 from models.heuristic.frequency import FrequencyModel
 from models.heuristic.gap import GapModel
 from models.heuristic.surfing import SurfingModel
@@ -18,12 +20,41 @@ class HybridModel(Model):
         
         self.trained = False
 
-    def train(self, data: pd.DataFrame):
-        self.gap_model.train(data)
-        self.freq_model.train(data)
-        self.surf_model.train(data)
+    def train(self, data: pd.DataFrame, **kwargs):
+        # Encode the draws once and share the incidence matrix with the sub-models
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
+        
+        self.gap_model.train(data, incidence=incidence)
+        self.freq_model.train(data, incidence=incidence)
+        self.surf_model.train(data, incidence=incidence)
         self.trained = True
 
+    def update(self, draw: list):
+        if not self.trained:
+             raise ValueError("Model has not been trained yet.")
+        self.gap_model.update(draw)
+        self.freq_model.update(draw)
+        self.surf_model.update(draw)
+
+    def component_scores(self, window: int = None) -> np.ndarray:
+        """
+        Returns the normalized sub-model scores as a (3, n_numbers) array, one row each for
+        gap, frequency and surfing (score / max score, all zero if the max is 0).
+        predict() weights and sums these rows; GeneticOptimizer caches them per backtest draw.
+        """
+        # Handle surfing window override
+        if window:
+             self.surf_model._calculate_frequencies(int(window))
+        
+        # Gaps (draws since last seen), frequency probabilities and recent-window counts
+        rows = []
+        for series in (self.gap_model.gaps, self.freq_model.weights, self.surf_model.frequencies):
+            peak = series.max()
+            rows.append((series / peak if peak > 0 else series * 0).to_numpy(dtype=np.float64))
+        return np.vstack(rows)
+
     def predict(self, count: int = None, **kwargs) -> list:
         if not self.trained:
              raise ValueError("Model has not been trained yet.")
@@ -36,46 +67,12 @@ class HybridModel(Model):
         w_freq = float(kwargs.get('w_freq', 1.0))
         w_surf = float(kwargs.get('w_surf', 1.0))
         
-        # --- 1. Gap Scores ---
-        # Gaps are in self.gap_model.gaps (Series: index=number, value=gap)
-        gap_series = self.gap_model.gaps.copy()
-        # Normalize: Score = gap / max_gap
-        max_gap = gap_series.max()
-        if max_gap > 0:
-            gap_scores = gap_series / max_gap
-        else:
-            gap_scores = gap_series * 0 # All zero if max is 0
-            
-        # --- 2. Frequency Scores ---
-        # Weights are in self.freq_model.weights (Series: index=number, value=probability)
-        freq_series = self.freq_model.weights.copy()
-        # Normalize: Score = prob / max_prob
-        max_prob = freq_series.max()
-        if max_prob > 0:
-            freq_scores = freq_series / max_prob
-        else:
-            freq_scores = freq_series * 0
-            
-        # --- 3. Surfing Scores ---
-        # Counts are in self.surf_model.frequencies (Series: index=number, value=count)
-        # Handle surfing window override
-        surf_window = kwargs.get('window') 
-        if surf_window:
-             self.surf_model._calculate_frequencies(int(surf_window))
-             
-        surf_series = self.surf_model.frequencies.copy()
-        # Normalize: Score = count / max_count
-        max_count = surf_series.max()
-        if max_count > 0:
-            surf_scores = surf_series / max_count
-        else:
-            surf_scores = surf_series * 0
+        gap_scores, freq_scores, surf_scores = self.component_scores(window=kwargs.get('window'))
             
         # --- Combine Scores ---
-        # Ensure all series are aligned by index (they should be, as models reindex to range)
-        
-        # Weighted Combination
-        total_score = (w_gap * gap_scores) + (w_freq * freq_scores) + (w_surf * surf_scores)
+        # Weighted Combination (aligned by position: range_min..range_max)
+        total_score = pd.Series((w_gap * gap_scores) + (w_freq * freq_scores) + (w_surf * surf_scores),
+                                index=pd.Index(range(self.range_min, self.range_max + 1), name='dezenas'))
         
         # --- Select Winners ---
         # Sort by total_score (descending), then number (ascending) for determinism
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
-from core.base import Model
+from core.base import Model, IncompatibleSnapshotError
+from data.features import build_incidence_matrix, extract_draws, draw_positions
 
 class FrequencyModel(Model):
     def __init__(self, range_min: int, range_max: int, draw_count: int):
@@ -7,22 +9,45 @@ class FrequencyModel(Model):
         self.range_min = range_min
         self.range_max = range_max
         self.draw_count = draw_count
-        self.weights = None
+        self.counts = None # Appearances per number (range_min..range_max)
 
     def train(self, data: pd.DataFrame, **kwargs):
         # Calculate frequency of each number
-        all_numbers = data['dezenas'].explode()
-        frequency = all_numbers.value_counts().sort_index()
+        # A precomputed incidence matrix (e.g. Lottery.incidence[:i]) skips re-parsing data['dezenas']
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
         
-        # Ensure all numbers in range are present
-        full_index = pd.Index(range(self.range_min, self.range_max + 1), name='dezenas')
-        frequency = frequency.reindex(full_index, fill_value=0)
+        self.counts = incidence[:, self.range_min:self.range_max + 1].sum(axis=0).astype(np.int64)
+
+    def update(self, draw: list):
+        if self.counts is None:
+            raise ValueError("Model has not been trained yet.")
+        self.counts[draw_positions(draw, self.range_min, self.range_max)] += 1
+
+    def __setstate__(self, state):
+        # Pickles from before the array state also stored `weights` (now a derived property).
+        # The oldest ones stored only the normalized weights: the draw counts update() adds to
+        # cannot be recovered from them, so they are refused rather than silently mis-scaled.
+        weights = state.pop('weights', None)
+        if state.get('counts') is None and weights is not None:
+            raise IncompatibleSnapshotError(
+                f"{state.get('name', 'Frequency Model')} snapshot only holds normalized weights; retrain it.")
+        state.setdefault('counts', None)
+        self.__dict__.update(state)
+
+    @property
+    def weights(self) -> pd.Series:
+        if self.counts is None:
+            return None
+        full_index = pd.RangeIndex(self.range_min, self.range_max + 1, name='dezenas')
+        frequency = pd.Series(self.counts, index=full_index)
         
         # Normalize to get probabilities (weights)
-        self.weights = frequency / frequency.sum()
+        return frequency / frequency.sum()
 
     def predict(self, count: int = None, **kwargs) -> list:
-        if self.weights is None:
+        if self.counts is None:
             raise ValueError("Model has not been trained yet.")
             
         final_count = count if count is not None else self.draw_count
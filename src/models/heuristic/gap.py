@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from core.base import Model
+from data.features import build_incidence_matrix, extract_draws, draw_positions
 
 class GapModel(Model):
     def __init__(self, range_min: int, range_max: int, draw_count: int):
@@ -8,49 +9,56 @@ class GapModel(Model):
         self.range_min = range_min
         self.range_max = range_max
         self.draw_count = draw_count
-        self.gaps = None
+        # State: draws seen and, per number, the position of its last appearance (-1 if never drawn)
+        self.total_draws = 0
+        self.last_seen = None
 
-    def train(self, data: pd.DataFrame):
+    def train(self, data: pd.DataFrame, **kwargs):
         # Calculate gaps (draws since last appearance) for each number
-        # data['dezenas'] is a Series of lists
+        # A precomputed incidence matrix (e.g. Lottery.incidence[:i]) skips re-parsing data['dezenas']
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
         
-        last_indices = {}
-        total_draws = len(data)
+        total_draws = len(incidence)
+        hits = incidence[:, self.range_min:self.range_max + 1].astype(bool)
         
-        # Iterate over all possible numbers
-        for n in range(self.range_min, self.range_max + 1):
-            # Find all draws where n appeared
-            # This is a bit slow but robust
-            is_in_draw = data['dezenas'].apply(lambda x: n in x)
-            # Get indices where true
-            indices = is_in_draw.index[is_in_draw].tolist()
-            
-            if indices:
-                # Use implicit index (assuming data is sorted by date/draw, or at least sequential index)
-                # But safer to use position
-                total_draws - 1 # Current (imaginary) draw index
-                
-                # Finding the last occurrence in the provided dataframe
-                # Let's rely on position:
-                # Convert to boolean numpy array
-                mask = is_in_draw.to_numpy() # Boolean array
-                true_indices = np.where(mask)[0]
-                
-                if len(true_indices) > 0:
-                    last_pos = true_indices[-1]
-                    current_gap = total_draws - 1 - last_pos
-                else:
-                    current_gap = total_draws # Never appeared
-                    
-                last_indices[n] = current_gap
-            else:
-                last_indices[n] = total_draws
-        
-        self.gaps = pd.Series(last_indices, name='gap')
-        self.gaps.index.name = 'dezenas'
+        # Position of the last appearance (by row position, oldest first)
+        if total_draws:
+            seen = hits.any(axis=0)
+            self.last_seen = np.where(seen, total_draws - 1 - np.argmax(hits[::-1], axis=0), -1)
+        else:
+            self.last_seen = np.full(hits.shape[1], -1, dtype=np.int64)
+        self.total_draws = total_draws
+
+    def update(self, draw: list):
+        if self.last_seen is None:
+            raise ValueError("Model has not been trained yet.")
+        self.last_seen[draw_positions(draw, self.range_min, self.range_max)] = self.total_draws
+        self.total_draws += 1
+
+    def __setstate__(self, state):
+        # Pickles from before the array state stored the `gaps` Series (now a derived property).
+        # With total_draws = max gap + 1 every gap, and every later update, comes out the same.
+        gaps = state.pop('gaps', None)
+        if 'last_seen' not in state:
+            state['total_draws'], state['last_seen'] = 0, None
+            if gaps is not None and len(gaps):
+                gaps = gaps.reindex(range(state['range_min'], state['range_max'] + 1)).to_numpy(dtype=np.int64)
+                state['total_draws'] = int(gaps.max()) + 1
+                state['last_seen'] = state['total_draws'] - 1 - gaps
+        self.__dict__.update(state)
+
+    @property
+    def gaps(self) -> pd.Series:
+        """Draws since each number last appeared; numbers never drawn get gap = total draws."""
+        if self.last_seen is None:
+            return None
+        gaps = np.where(self.last_seen >= 0, self.total_draws - 1 - self.last_seen, self.total_draws)
+        return pd.Series(gaps, index=pd.RangeIndex(self.range_min, self.range_max + 1, name='dezenas'), name='gap')
 
     def predict(self, count: int = None, **kwargs) -> list:
-        if self.gaps is None:
+        if self.last_seen is None:
             raise ValueError("Model has not been trained yet.")
         
         final_count = count if count is not None else self.draw_count
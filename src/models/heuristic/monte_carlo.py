@@ -1,8 +1,7 @@
 import pandas as pd
-import random
-import statistics
+import numpy as np
 from core.base import Model
-from data.features import calculate_sum, count_odds, calculate_spread
+from data.features import build_incidence_matrix, draw_statistics, extract_draws
 
 class MonteCarloModel(Model):
     def __init__(self, range_min: int, range_max: int, draw_count: int):
@@ -11,69 +10,71 @@ class MonteCarloModel(Model):
         self.range_max = range_max
         self.draw_count = draw_count
         
-        # Learned Stats
+        # Learned Stats (histograms are indexed by value: sum_hist[s] = draws whose sum was s)
+        self.sum_hist = None
+        self.odd_hist = None
+        self.spread_hist = None
         self.sum_stats = {}
         self.odd_probs = {}
         self.spread_stats = {}
         self.trained = False
 
-    def train(self, data: pd.DataFrame):
-        sums = []
-        odds = []
-        spreads = []
+    def train(self, data: pd.DataFrame, **kwargs):
+        # A precomputed incidence matrix (e.g. Lottery.incidence[:i]) skips re-parsing data['dezenas']
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
         
-        # Prefer 'dezenas' column (list of ints) if available
-        if 'dezenas' in data.columns:
-             for _, row in data.iterrows():
-                try:
-                    draw = row['dezenas']
-                    if not isinstance(draw, list):
-                        continue
-                    # Ensure ints
-                    draw = [int(x) for x in draw]
-                    
-                    sums.append(calculate_sum(draw))
-                    odds.append(count_odds(draw))
-                    spreads.append(calculate_spread(draw))
-                except Exception:
-                    continue
-        else:
-            # Fallback to column scraping
-            ball_cols = [c for c in data.columns if 'bola' in c.lower()]
-            for _, row in data.iterrows():
-                draw = []
-                try:
-                    for c in ball_cols:
-                        draw.append(int(row[c]))
-                except Exception:
-                    continue
-                if not draw:
-                    continue
-                sums.append(calculate_sum(draw))
-                odds.append(count_odds(draw))
-                spreads.append(calculate_spread(draw))
-            
-        if not sums:
+        # (sum, odd, even, spread) of every non-empty draw
+        stats = draw_statistics(incidence)[incidence.any(axis=1)]
+        if not len(stats):
             print("Warning: No data for Monte Carlo training.")
             return
 
+        # Empirical histograms, indexed by value
+        self.sum_hist = np.bincount(stats[:, 0])
+        self.odd_hist = np.bincount(stats[:, 1])
+        self.spread_hist = np.bincount(stats[:, 3])
+        self._fit_stats()
+
+    def update(self, draw: list):
+        if not self.trained:
+            raise ValueError("Model has not been trained yet.")
+        incidence = build_incidence_matrix([[int(x) for x in draw]], self.range_max)
+        if not incidence.any():
+            return
+        s, o, _, sp = draw_statistics(incidence)[0]
+        self.sum_hist = self._add(self.sum_hist, s)
+        self.odd_hist = self._add(self.odd_hist, o)
+        self.spread_hist = self._add(self.spread_hist, sp)
+        self._fit_stats()
+
+    @staticmethod
+    def _add(hist: np.ndarray, value: int) -> np.ndarray:
+        if value >= len(hist):
+            hist = np.pad(hist, (0, value + 1 - len(hist)))
+        hist[value] += 1
+        return hist
+
+    @staticmethod
+    def _moments(hist: np.ndarray) -> dict:
+        """Mean and sample standard deviation of a histogram (matches statistics.mean/stdev)."""
+        values = np.arange(len(hist))
+        n = hist.sum()
+        mean = (values * hist).sum() / n
+        var = (hist * (values - mean) ** 2).sum() / (n - 1) if n > 1 else 0.0
+        return {"mean": float(mean), "stdev": float(np.sqrt(var))}
+
+    def _fit_stats(self):
         # Learn Sum Distribution (Normal Approximation)
-        self.sum_stats = {
-            "mean": statistics.mean(sums),
-            "stdev": statistics.stdev(sums) if len(sums) > 1 else 0
-        }
+        self.sum_stats = self._moments(self.sum_hist)
         
         # Learn Odd Distribution (Probability Map)
-        total = len(odds)
-        self.odd_probs = {}
-        for o in set(odds):
-            self.odd_probs[o] = odds.count(o) / total
+        total = self.odd_hist.sum()
+        self.odd_probs = {int(o): c / total for o, c in enumerate(self.odd_hist) if c}
             
         # Learn Spread
-        self.spread_stats = {
-            "mean": statistics.mean(spreads),
-            "stdev": statistics.stdev(spreads) if len(spreads) > 1 else 0
-        }
+        self.spread_stats = self._moments(self.spread_hist)
         
         self.trained = True
 
@@ -84,12 +85,14 @@ class MonteCarloModel(Model):
         final_count = count if count is not None else self.draw_count
         
         # Simulation Parameters
-        # We simulate N random games.
+        # We simulate N random games in NumPy batches of `chunk_size`.
         # We keep only those that are statistically "normal" (within bounds).
         # We count number frequency in the valid pool.
         
-        simulations = 10000 
-        valid_draws = []
+        simulations = int(kwargs.get('simulations', 200_000))
+        chunk_size = int(kwargs.get('chunk_size', 100_000))
+        seed = kwargs.get('seed')
+        rng = np.random.default_rng(int(seed) if seed is not None else None)
         
         # Validation Bounds (e.g., Mean +/- 1.5 StdDev covering ~87% of cases)
         min_sum = self.sum_stats['mean'] - 1.5 * self.sum_stats['stdev']
@@ -101,41 +104,47 @@ class MonteCarloModel(Model):
         # Probability Threshold for discrete features (Odd/Even)
         # We accept if the pattern appeared at least 5% of time in history
         min_prob = 0.05
+        odd_ok = np.array([self.odd_probs.get(o, 0) >= min_prob for o in range(self.draw_count + 1)])
         
-        rng = list(range(self.range_min, self.range_max + 1))
+        numbers = np.arange(self.range_min, self.range_max + 1)
+        freqs = np.zeros(len(numbers), dtype=np.int64)
+        valid_total = 0
         
-        for _ in range(simulations):
-            # Generate Random Draw
-            draw = random.sample(rng, self.draw_count)
+        for start in range(0, simulations, chunk_size):
+            draws = self._simulate(rng, min(chunk_size, simulations - start))
+            
+            # Check Features (on offsets from range_min, then shifted back)
+            s = draws.sum(axis=1) + self.draw_count * self.range_min
+            sp = draws.max(axis=1) - draws.min(axis=1)
+            o = ((draws + self.range_min) % 2).sum(axis=1)
+            valid = (s >= min_sum) & (s <= max_sum) & (sp >= min_spread) & (sp <= max_spread) & odd_ok[o]
             
-            # Check Features
-            s = calculate_sum(draw)
-            if not (min_sum <= s <= max_sum):
-                continue
-                
-            sp = calculate_spread(draw)
-            if not (min_spread <= sp <= max_spread):
-                continue
-                
-            o = count_odds(draw)
-            if self.odd_probs.get(o, 0) < min_prob:
-                continue
-                
-            valid_draws.append(draw)
+            valid_total += int(valid.sum())
+            freqs += np.bincount(draws[valid].ravel(), minlength=len(numbers))
             
-        if not valid_draws:
+        if not valid_total:
             print("Warning: Monte Carlo simulation too strict, no valid draws found.")
             # Fallback: Validation failed, return random
-            return sorted(random.sample(rng, final_count))
+            return sorted(rng.choice(numbers, final_count, replace=False).tolist())
             
-        # Select most frequent numbers from Valid Pool
-        freqs = {n: 0 for n in rng}
-        for draw in valid_draws:
-            for n in draw:
-                freqs[n] += 1
-                
-        # Sort by likelihood
-        sorted_nums = sorted(freqs.items(), key=lambda x: x[1], reverse=True)
-        top_numbers = [n for n, c in sorted_nums[:final_count]]
+        # Select most frequent numbers from Valid Pool (ties keep ascending number order)
+        top_numbers = numbers[np.argsort(-freqs, kind='stable')[:final_count]]
+        
+        return sorted(top_numbers.tolist())
+
+    def _simulate(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """
+        Draws up to `size` uniform random games as an (m, draw_count) array of offsets from range_min.
+        Sparse games (Mega Sena, Quina) sample with replacement and drop rows with repeats, which is
+        O(draw_count) per game; dense ones (Lotofácil) take the first draw_count of a random ordering.
+        """
+        n_numbers = self.range_max - self.range_min + 1
+        # Probability that draw_count samples with replacement are all distinct
+        distinct = np.prod(1 - np.arange(self.draw_count) / n_numbers)
+        
+        if distinct >= 0.5:
+            draws = np.sort(rng.integers(0, n_numbers, (size, self.draw_count)), axis=1)
+            return draws[(np.diff(draws, axis=1) > 0).all(axis=1)]
         
-        return sorted(top_numbers)
+        keys = rng.random((size, n_numbers), dtype=np.float32)
+        return np.argpartition(keys, self.draw_count - 1, axis=1)[:, :self.draw_count]
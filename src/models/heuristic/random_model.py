@@ -9,10 +9,14 @@ class RandomModel(Model):
         self.range_max = range_max
         self.draw_count = draw_count
 
-    def train(self, data: pd.DataFrame):
+    def train(self, data: pd.DataFrame, **kwargs):
         # Random model doesn't need training
         pass
 
+    def update(self, draw: list):
+        # Nothing to learn from new draws
+        pass
+
     def predict(self, count: int = None, **kwargs) -> list:
         final_count = count if count is not None else self.draw_count
         seed = kwargs.get('seed')
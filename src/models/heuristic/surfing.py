@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from core.base import Model
+from data.features import build_incidence_matrix, extract_draws, draw_positions
 
 class SurfingModel(Model):
     def __init__(self, range_min: int, range_max: int, draw_count: int):
@@ -7,31 +9,87 @@ class SurfingModel(Model):
         self.range_min = range_min
         self.range_max = range_max
         self.draw_count = draw_count
-        self.frequencies = None
+        # Prefix sums over draws, grown by doubling: row t holds the appearances in draws [0, t)
+        self._prefix = None
+        self.total_draws = 0
         self.window_size = 30 # Default window size
+        self.window = self.window_size # Window behind `frequencies`
 
-    def train(self, data: pd.DataFrame):
-        self.data = data
-        # Pre-calculate default frequencies
-        self._calculate_frequencies(self.window_size)
-
-    def _calculate_frequencies(self, window: int):
-        subset = self.data.tail(window)
+    def train(self, data: pd.DataFrame, **kwargs):
+        # A precomputed incidence matrix (e.g. Lottery.incidence[:i]) skips re-parsing data['dezenas']
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
         
-        all_numbers = subset['dezenas'].explode()
-        if all_numbers.empty:
-            self.frequencies = pd.Series(0, index=pd.Index(range(self.range_min, self.range_max + 1), name='dezenas'))
-            return
-
-        counts = all_numbers.value_counts().sort_index()
+        # Prefix sums over draws: any window is then a single subtraction
+        hits = incidence[:, self.range_min:self.range_max + 1]
+        self._prefix = np.zeros((len(hits) + 1, hits.shape[1]), dtype=np.int64)
+        np.cumsum(hits, axis=0, out=self._prefix[1:])
+        self.total_draws = len(hits)
         
-        full_index = pd.Index(range(self.range_min, self.range_max + 1), name='dezenas')
-        counts = counts.reindex(full_index, fill_value=0)
+        # Default frequencies
+        self.window = self.window_size
+
+    def update(self, draw: list):
+        if self._prefix is None:
+            raise ValueError("Model has not been trained yet.")
+        if self.total_draws + 1 == len(self._prefix):
+            # Out of rows: double the capacity (amortized O(1) copies per draw)
+            grown = np.empty((2 * len(self._prefix), self._prefix.shape[1]), dtype=np.int64)
+            grown[:len(self._prefix)] = self._prefix
+            self._prefix = grown
         
-        self.frequencies = counts
+        last = self._prefix[self.total_draws + 1]
+        last[:] = self._prefix[self.total_draws]
+        last[draw_positions(draw, self.range_min, self.range_max)] += 1
+        self.total_draws += 1
+        self.window = self.window_size
+
+    def __getstate__(self):
+        # Spare rows of the doubling buffer are not worth pickling
+        state = self.__dict__.copy()
+        state['_prefix'] = self.prefix_counts
+        return state
+
+    def __setstate__(self, state):
+        # Pickles from before the array state stored `prefix_counts` and `frequencies` (now derived
+        # properties); the oldest ones kept the training DataFrame as `data` instead.
+        prefix = state.pop('prefix_counts', None)
+        data = state.pop('data', None)
+        state.pop('frequencies', None)
+        if '_prefix' not in state:
+            if prefix is None and data is not None:
+                hits = build_incidence_matrix(extract_draws(data), state['range_max'])[:, state['range_min']:state['range_max'] + 1]
+                prefix = np.zeros((len(hits) + 1, hits.shape[1]), dtype=np.int64)
+                np.cumsum(hits, axis=0, out=prefix[1:])
+            state['_prefix'] = prefix
+            state['total_draws'] = 0 if prefix is None else len(prefix) - 1
+            state.setdefault('window_size', 30)
+            state['window'] = state['window_size']
+        self.__dict__.update(state)
+
+    @property
+    def prefix_counts(self) -> np.ndarray:
+        return None if self._prefix is None else self._prefix[:self.total_draws + 1]
+
+    def window_counts(self, window: int) -> np.ndarray:
+        """Appearances per number in the last `window` draws (all draws if larger, none if window <= 0)."""
+        start = max(self.total_draws - window, 0) if window > 0 else self.total_draws
+        return self._prefix[self.total_draws] - self._prefix[start]
+
+    def _calculate_frequencies(self, window: int):
+        # Frequencies are derived on access from the prefix sums; only the window is stored
+        self.window = window
+
+    @property
+    def frequencies(self) -> pd.Series:
+        if self._prefix is None:
+            return None
+        full_index = pd.RangeIndex(self.range_min, self.range_max + 1, name='dezenas')
+        return pd.Series(self.window_counts(self.window), index=full_index)
 
     def predict(self, count: int = None, **kwargs) -> list:
-        if self.data is None:
+        if self._prefix is None:
              raise ValueError("Model has not been trained yet.")
         
         final_count = count if count is not None else self.draw_count
@@ -43,8 +101,6 @@ class SurfingModel(Model):
                 self._calculate_frequencies(window)
             except ValueError:
                 pass # Ignore invalid window
-        elif self.frequencies is None:
-             self._calculate_frequencies(self.window_size)
             
         # Sort by frequency (descending) -> "Hot" numbers
         df = self.frequencies.reset_index(name='count')
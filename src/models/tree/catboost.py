@@ -1,9 +1,8 @@
 import pandas as pd
-import numpy as np
 import catboost as cb
 from sklearn.preprocessing import StandardScaler
-from core.base import Model
-from data.features import calculate_sum, count_odds, count_evens, calculate_spread
+from core.base import Model, IncompatibleSnapshotError
+from data.features import IncrementalTrainingSet, build_incidence_matrix, extract_draws
 import sys
 
 class CatBoostModel(Model):
@@ -24,6 +23,7 @@ class CatBoostModel(Model):
         )
         self.scaler = StandardScaler()
         self.trained = False
+        self.features = None # IncrementalTrainingSet over the draws seen (see train/update)
 
     def train(self, data: pd.DataFrame, **kwargs):
         # Allow configuring hyperparameters via model-args
@@ -49,85 +49,49 @@ class CatBoostModel(Model):
         if params:
             self.model.set_params(**params)
 
-        # Feature Engineering (Identical to Random Forest/XGBoost for consistency)
-        X = []
-        y = []
-        
-        # Stats trackers
-        current_gaps = {n: 0 for n in range(self.range_min, self.range_max + 1)}
-        freq_total = {n: 0 for n in range(self.range_min, self.range_max + 1)}
-        freq_10 = {n: [] for n in range(self.range_min, self.range_max + 1)} 
-        
-        start_training_idx = 50
-        last_draw_features = [0, 0, 0, 0] # Sum, Odd, Even, Spread
-        
-        # Determine number columns
-        [col for col in data.columns if 'bola' in col or 'dezenas' in col]
-
-        for i, row in data.iterrows():
-            drawn_numbers = []
-            try:
-                drawn_set = set(row['dezenas'])
-            except Exception:
-                drawn_set = set()
+        # Unscaled samples and running feature state, kept so update() only adds the new draw's rows
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
+        self.features = IncrementalTrainingSet(incidence, self.range_min, self.range_max, warmup=50)
+        self._fit()
 
-            for col in data.columns:
-                 if 'bola' in col or 'dezenas' in col:
-                     try:
-                         val = int(row[col])
-                         drawn_numbers.append(val)
-                     except Exception:
-                         pass
-            
-            # Fallback: if dezenas column was not usable but we found numbers in columns
-            if not drawn_set and drawn_numbers:
-                drawn_set = set(drawn_numbers)
-            
-            if i >= start_training_idx:
-                ctx_sum, ctx_odd, ctx_even, ctx_spread = last_draw_features
-                
-                for n in range(self.range_min, self.range_max + 1):
-                    feat_gap = current_gaps[n]
-                    feat_freq = freq_total[n]
-                    feat_freq10 = sum(freq_10[n][-10:])
-                    
-                    X.append([feat_gap, feat_freq, feat_freq10, ctx_sum, ctx_odd, ctx_even, ctx_spread])
-                    y.append(1 if n in drawn_set else 0)
-            
-            for n in range(self.range_min, self.range_max + 1):
-                if n in drawn_set:
-                    current_gaps[n] = 0
-                    freq_total[n] += 1
-                    freq_10[n].append(1)
-                else:
-                    current_gaps[n] += 1
-                    freq_10[n].append(0)
-            
-            last_draw_features = [
-                calculate_sum(drawn_numbers),
-                count_odds(drawn_numbers),
-                count_evens(drawn_numbers),
-                calculate_spread(drawn_numbers)
-            ]
+    def _fit(self):
+        # Feature Engineering (shared with Random Forest/XGBoost for consistency)
+        X_array, y_array, next_features = self.features.X, self.features.y, self.features.next_features
         
-        if not X:
+        if len(X_array) == 0:
             print("Warning: Not enough data to train CatBoost.", file=sys.stderr)
             return
 
-        X_array = np.array(X)
-        y_array = np.array(y)
-        
-        # CatBoost handles scaling well, but we stick to the pattern
         X_scaled = self.scaler.fit_transform(X_array)
         
-        print(f"Training CatBoost with {len(X)} samples...", file=sys.stderr)
+        print(f"Training CatBoost with {len(X_array)} samples...", file=sys.stderr)
         self.model.fit(X_scaled, y_array)
         self.trained = True
         
-        self.final_gaps = current_gaps
-        self.final_freq = freq_total
-        self.final_freq10 = freq_10
-        self.last_draw_features = last_draw_features
+        self.next_features = next_features.copy()
+        self.final_gaps = dict(zip(range(self.range_min, self.range_max + 1), next_features[:, 0].astype(int)))
+
+    def __setstate__(self, state):
+        # Snapshots from before the shared feature engine only hold final_gaps/final_freq/... and were
+        # fit with context features that were always zero: there is nothing valid to score, so refuse them
+        if state.get('trained') and 'next_features' not in state:
+            raise IncompatibleSnapshotError(
+                f"{state.get('name', 'Tree model')} snapshot predates the feature engine; retrain it.")
+        # Snapshots that kept the raw incidence history get its incremental training set back
+        history = state.pop('history', None)
+        if 'features' not in state:
+            state['features'] = None if history is None else IncrementalTrainingSet(
+                history, state['range_min'], state['range_max'], warmup=50)
+        self.__dict__.update(state)
+
+    def update(self, draw: list):
+        # Trees cannot be grown in place: append the new draw's samples and refit on the cached set
+        if self.features is None:
+            raise ValueError("Model has not been trained yet.")
+        self.features.append(draw)
+        self._fit()
 
     def predict(self, count: int = None, **kwargs) -> list:
         if not self.trained:
@@ -135,21 +99,8 @@ class CatBoostModel(Model):
         
         final_count = count if count is not None else self.draw_count
         
-        X_next = []
-        numbers = []
-        
-        ctx_sum, ctx_odd, ctx_even, ctx_spread = self.last_draw_features
-        
-        for n in range(self.range_min, self.range_max + 1):
-            feat_gap = self.final_gaps[n]
-            feat_freq = self.final_freq[n]
-            feat_freq10 = sum(self.final_freq10[n][-10:])
-             
-            X_next.append([feat_gap, feat_freq, feat_freq10, ctx_sum, ctx_odd, ctx_even, ctx_spread])
-            numbers.append(n)
-            
-        X_next_array = np.array(X_next)
-        X_next_scaled = self.scaler.transform(X_next_array)
+        numbers = list(range(self.range_min, self.range_max + 1))
+        X_next_scaled = self.scaler.transform(self.next_features)
         
         probs = self.model.predict_proba(X_next_scaled)[:, 1]
         
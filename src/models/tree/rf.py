@@ -1,9 +1,8 @@
 import pandas as pd
-import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
-from core.base import Model
-from data.features import calculate_sum, count_odds, count_evens, calculate_spread
+from core.base import Model, IncompatibleSnapshotError
+from data.features import IncrementalTrainingSet, build_incidence_matrix, extract_draws
 
 class RandomForestModel(Model):
     def __init__(self, range_min: int, range_max: int, draw_count: int):
@@ -15,6 +14,7 @@ class RandomForestModel(Model):
         self.model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
         self.scaler = StandardScaler()
         self.trained = False
+        self.features = None # IncrementalTrainingSet over the draws seen (see train/update)
 
     def train(self, data: pd.DataFrame, **kwargs):
         # Allow configuring n_estimators and n_jobs via model-args
@@ -33,89 +33,24 @@ class RandomForestModel(Model):
             self.model.n_jobs = n_jobs
 
 
+        # Unscaled samples and running feature state, kept so update() only adds the new draw's rows
+        incidence = kwargs.get('incidence')
+        if incidence is None:
+            incidence = build_incidence_matrix(extract_draws(data), self.range_max)
+        self.features = IncrementalTrainingSet(incidence, self.range_min, self.range_max, warmup=50)
+        self._fit()
+
+    def _fit(self):
         # We need to transform the time-series data into a supervised learning problem.
-        # X: Features of previous draw state
+        # X: Features of previous draw state (gap, frequency, frequency in last 10 draws, previous draw context)
         # y: Whether number N appeared in current draw
-        
-        # Features per number:
-        # 1. Gap (current gap)
-        # 2. Frequency (total frequency)
-        # 3. Frequency (last 10 draws)
-        
-        X = []
-        y = []
-        
-        # Pre-calculation structures
-        len(data)
-        
-        # Efficiently iterating is hard. Let's do a simplified approach.
-        # We process draw by draw.
-        
-        # Stats trackers
-        current_gaps = {n: 0 for n in range(self.range_min, self.range_max + 1)}
-        freq_total = {n: 0 for n in range(self.range_min, self.range_max + 1)}
-        freq_10 = {n: [] for n in range(self.range_min, self.range_max + 1)} # Queue of last 10 appearances (1 or 0)
-        
         # We skip the first 50 draws to build up history stats
-        start_training_idx = 50
+        X_array, y_array, next_features = self.features.X, self.features.y, self.features.next_features
         
-        # Context of *previous* draw (features)
-        # We need to store features of row i-1 to use for predicting row i
-        last_draw_features = [0, 0, 0, 0] # Sum, Odd, Even, Spread
-        
-        for i, row in data.iterrows():
-            # Get current draw numbers
-            drawn_numbers = []
-            drawn_set = set(row['dezenas'])
-            for col in data.columns:
-                 if 'bola' in col or 'dezenas' in col:
-                     try:
-                         drawn_numbers.append(int(row[col]))
-                     except Exception:
-                         pass
-            
-            # If we are past warm-up, we record this state as a training example
-            if i >= start_training_idx:
-                # Features from global context (previous draw state)
-                ctx_sum, ctx_odd, ctx_even, ctx_spread = last_draw_features
-                
-                for n in range(self.range_min, self.range_max + 1):
-                    # Features
-                    feat_gap = current_gaps[n]
-                    feat_freq = freq_total[n]
-                    feat_freq10 = sum(freq_10[n][-10:])
-                    
-                    # Augmented Features: "What was the context when this number appeared/didn't appear?"
-                    # We are asking: Does High Sum yesterday affect Number 5 today?
-                    
-                    X.append([feat_gap, feat_freq, feat_freq10, ctx_sum, ctx_odd, ctx_even, ctx_spread])
-                    y.append(1 if n in drawn_set else 0)
-            
-            # Update stats AFTER the draw
-            for n in range(self.range_min, self.range_max + 1):
-                if n in drawn_set:
-                    current_gaps[n] = 0
-                    freq_total[n] += 1
-                    freq_10[n].append(1)
-                else:
-                    current_gaps[n] += 1
-                    freq_10[n].append(0)
-            
-            # Update last draw features for NEXT iteration
-            last_draw_features = [
-                calculate_sum(drawn_numbers),
-                count_odds(drawn_numbers),
-                count_evens(drawn_numbers),
-                calculate_spread(drawn_numbers)
-            ]
-        
-        if not X:
+        if len(X_array) == 0:
             print("Warning: Not enough data to train Random Forest.")
             return
 
-        X_array = np.array(X)
-        y_array = np.array(y)
-        
         # Scale features
         X_scaled = self.scaler.fit_transform(X_array)
         
@@ -124,10 +59,28 @@ class RandomForestModel(Model):
         self.trained = True
         
         # Store final state for prediction
-        self.final_gaps = current_gaps
-        self.final_freq = freq_total
-        self.final_freq10 = freq_10
-        self.last_draw_features = last_draw_features
+        self.next_features = next_features.copy()
+        self.final_gaps = dict(zip(range(self.range_min, self.range_max + 1), next_features[:, 0].astype(int)))
+
+    def __setstate__(self, state):
+        # Snapshots from before the shared feature engine only hold final_gaps/final_freq/... and were
+        # fit with context features that were always zero: there is nothing valid to score, so refuse them
+        if state.get('trained') and 'next_features' not in state:
+            raise IncompatibleSnapshotError(
+                f"{state.get('name', 'Tree model')} snapshot predates the feature engine; retrain it.")
+        # Snapshots that kept the raw incidence history get its incremental training set back
+        history = state.pop('history', None)
+        if 'features' not in state:
+            state['features'] = None if history is None else IncrementalTrainingSet(
+                history, state['range_min'], state['range_max'], warmup=50)
+        self.__dict__.update(state)
+
+    def update(self, draw: list):
+        # Trees cannot be grown in place: append the new draw's samples and refit on the cached set
+        if self.features is None:
+            raise ValueError("Model has not been trained yet.")
+        self.features.append(draw)
+        self._fit()
 
     def predict(self, count: int = None, **kwargs) -> list:
         if not self.trained:
@@ -135,23 +88,9 @@ class RandomForestModel(Model):
         
         final_count = count if count is not None else self.draw_count
         
-        # Build features for "next" draw
-        X_next = []
-        numbers = []
-        
-        # Context is the features of the VERY LAST draw seen
-        ctx_sum, ctx_odd, ctx_even, ctx_spread = self.last_draw_features
-        
-        for n in range(self.range_min, self.range_max + 1):
-            feat_gap = self.final_gaps[n]
-            feat_freq = self.final_freq[n]
-            feat_freq10 = sum(self.final_freq10[n][-10:])
-             
-            X_next.append([feat_gap, feat_freq, feat_freq10, ctx_sum, ctx_odd, ctx_even, ctx_spread])
-            numbers.append(n)
-            
-        X_next_array = np.array(X_next)
-        X_next_scaled = self.scaler.transform(X_next_array)
+        # Features for the "next" draw (state after the VERY LAST draw seen)
+        numbers = list(range(self.range_min, self.range_max + 1))
+        X_next_scaled = self.scaler.transform(self.next_features)
         
         # Predict Proba (Class 1)
         probs = self.model.predict_proba(X_next_scaled)[:, 1]
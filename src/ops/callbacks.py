@@ -1,13 +1,38 @@
+import time
 import tensorflow as tf
 from typing import Dict, Any
 
 class TrainingLoggerCallback(tf.keras.callbacks.Callback):
-    def __init__(self, logger, model_type: str, params_hash: str = None, metadata: Dict[str, Any] = None):
+    def __init__(self, logger, model_type: str, params_hash: str = None, metadata: Dict[str, Any] = None,
+                 batch_size: int = None):
         super().__init__()
         self.logger = logger
         self.model_type = model_type
         self.params_hash = params_hash
         self.metadata = metadata
+        # Used to report samples/s alongside batches/s (last batch may be smaller, so it is approximate)
+        self.batch_size = batch_size
+        self._epoch_start = None
+        self._batches = 0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._batches = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._batches += 1
+
+    def _throughput(self) -> Dict[str, Any]:
+        if self._epoch_start is None:
+            return {}
+        seconds = time.perf_counter() - self._epoch_start
+        stats = {
+            "epoch_seconds": round(seconds, 4),
+            "batches_per_second": round(self._batches / seconds, 2) if seconds > 0 else None
+        }
+        if self.batch_size and seconds > 0:
+            stats["samples_per_second"] = round(self._batches * self.batch_size / seconds, 2)
+        return stats
 
     def on_epoch_end(self, epoch, logs=None):
         logs = logs or {}
@@ -22,5 +47,10 @@ class TrainingLoggerCallback(tf.keras.callbacks.Callback):
                 "val_accuracy": logs.get("val_accuracy")
             },
             params_hash=self.params_hash,
-            metadata=self.metadata
+            # Throughput goes into the metadata JSON so the log keeps its columns
+            metadata={**(self.metadata or {}), **self._throughput()}
         )
+
+    def on_train_end(self, logs=None):
+        # The logger buffers epochs; write this run out before the model is saved or inspected
+        self.logger.flush()
@@ -1,144 +1,175 @@
 import pandas as pd
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Tuple
 import os
+import pickle
 
 class TrainingInspector:
-    def __init__(self, log_path: str = "data/training_log.csv"):
+    """
+    Groups the training log into runs and summarizes them.
+
+    Parsing is incremental: the inspector remembers how far it read, the summaries of finished
+    runs and the rows of the last (possibly still growing) run, so the next get_runs() only reads
+    rows appended since. With `cache_path` that state is pickled between processes
+    (`preloto inspect` uses data/training_log.runs.pkl). Appended rows are assumed to be newer
+    than the ones already read; a log that shrinks (rewritten or replaced) is parsed again.
+    """
+
+    def __init__(self, log_path: str = "data/training_log.db", cache_path: str = None):
         self.log_path = log_path
-        
+        self.cache_path = cache_path
+        self._state = None
+
+    def _is_csv(self) -> bool:
+        return self.log_path.endswith(".csv")
+
+    def _log_end(self) -> int:
+        """Position of the end of the log: file size for CSV exports, last row id for the SQLite store."""
+        if self._is_csv():
+            return os.path.getsize(self.log_path)
+
+        from ops.logger import TrainingLogger
+        logger = TrainingLogger(self.log_path)
+        try:
+            return logger.last_id()
+        finally:
+            logger.close()
+
+    def _read_appended(self, cursor: int) -> Tuple[pd.DataFrame, int]:
+        """Returns the rows after `cursor` (data rows read for CSV, row id for SQLite) and the new cursor."""
+        if self._is_csv():
+            df = pd.read_csv(self.log_path, skiprows=range(1, cursor + 1))
+            return df, cursor + len(df)
+
+        from ops.logger import TrainingLogger
+        logger = TrainingLogger(self.log_path)
+        try:
+            df = logger.get_appended(cursor)
+        finally:
+            logger.close()
+        return df.drop(columns="id"), int(df["id"].max()) if len(df) else cursor
+
+    def _load_state(self) -> Dict[str, Any]:
+        state = self._state
+        if state is None and self.cache_path and os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path, "rb") as f:
+                    state = pickle.load(f)
+            except Exception:
+                state = None
+
+        end = self._log_end()
+        if state is None or state["log_path"] != self.log_path or end < state["end"]:
+            state = {"log_path": self.log_path, "end": 0, "cursor": 0, "closed": [], "tail": None}
+        state["end"] = end
+        return state
+
+    def _save_state(self, state: Dict[str, Any]):
+        self._state = state
+        if self.cache_path:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+                with open(self.cache_path, "wb") as f:
+                    pickle.dump(state, f)
+            except Exception as e:
+                print(f"Warning: Could not write inspection cache {self.cache_path}: {e}")
+
     def get_runs(self, model_filter: str = None) -> List[Dict[str, Any]]:
         """
         Parses the training log and groups records into 'Runs'.
         Returns a list of run summaries, sorted by recency (newest first).
         """
-        if not os.path.exists(self.log_path):
+        legacy_csv = os.path.splitext(self.log_path)[0] + ".csv"
+        if not os.path.exists(self.log_path) and not os.path.exists(legacy_csv):
             return []
-            
+
         try:
-            df = pd.read_csv(self.log_path)
+            state = self._load_state()
+            new_rows, cursor = self._read_appended(state["cursor"])
         except pd.errors.EmptyDataError:
             return []
-            
-        if df.empty:
-            return []
-            
-        # Convert timestamp
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
-        
-        runs = []
-        current_run = None
-        
-        for _, row in df.iterrows():
-            # Check if this row belongs to current run
-            is_continuation = False
-            if current_run:
-                # Continuation criteria:
-                # Same Model Type
-                # Epoch is Next (or close enough, but for now simple +1 check)
-                if (row['model_type'] == current_run['model_type'] and 
-                    row['epoch'] > current_run['metrics'][-1]['epoch']): 
-                       # Relaxed check: epoch just needs to be greater, usually +1
-                       is_continuation = True
-            
-            if is_continuation:
-                current_run['metrics'].append({
-                    'epoch': row['epoch'],
-                    'loss': row['loss'],
-                    'val_loss': row['val_loss'],
-                    'accuracy': row['accuracy'],
-                    'val_accuracy': row['val_accuracy'],
-                    'timestamp': row['timestamp']
-                })
-                # Update End Time
-                current_run['end_time'] = row['timestamp']
-            else:
-                # Close previous run if exists
-                if current_run:
-                    runs.append(self._summarize_run(current_run))
-                    
-                # Start new run
-                current_run = {
-                    'model_type': row['model_type'],
-                    'params_hash': row['params_hash'],
-                    'start_time': row['timestamp'],
-                    'end_time': row['timestamp'],
-                    'metadata': row['metadata'],
-                    'metrics': [{
-                        'epoch': row['epoch'],
-                        'loss': row['loss'],
-                        'val_loss': row['val_loss'],
-                        'accuracy': row['accuracy'],
-                        'val_accuracy': row['val_accuracy'],
-                        'timestamp': row['timestamp']
-                    }]
-                }
-                
-        # Append last
-        if current_run:
-            runs.append(self._summarize_run(current_run))
-            
+
+        new_rows = new_rows.assign(timestamp=pd.to_datetime(new_rows["timestamp"]))
+        frame = new_rows if state["tail"] is None else pd.concat([state["tail"], new_rows], ignore_index=True)
+        open_run = []
+        if not frame.empty:
+            frame = frame.sort_values("timestamp", kind="stable").reset_index(drop=True)
+            run_ids = self._segment(frame)
+            summaries = self._summarize_runs(frame, run_ids)
+            # Only the last run can still grow: keep its rows for the next call
+            state["closed"].extend(summaries[:-1])
+            state["tail"] = frame[run_ids == run_ids.iloc[-1]].reset_index(drop=True)
+            open_run = summaries[-1:]
+        state["cursor"] = cursor
+        self._save_state(state)
+
+        runs = state["closed"] + open_run
+
         # Filter
         if model_filter:
             runs = [r for r in runs if r['model_type'] == model_filter]
-            
+
         # Sort by Recency (Newest first)
-        runs.sort(key=lambda x: x['start_time'], reverse=True)
-            
-        return runs
-
-    def _summarize_run(self, run_raw: Dict) -> Dict:
-        """Calculates aggregate stats for a run."""
-        metrics = run_raw['metrics']
-        
-        # Valid Loss (might be NaN if not validation)
-        val_losses = [m['val_loss'] for m in metrics if pd.notnull(m['val_loss'])]
-        val_accs = [m['val_accuracy'] for m in metrics if pd.notnull(m['val_accuracy'])]
-        losses = [m['loss'] for m in metrics if pd.notnull(m['loss'])]
-        
-        if not val_losses:
-             best_epoch = -1
-             min_val_loss = None
-             status = "Unknown (No Val Data)"
-        else:
-             min_val_loss = min(val_losses)
-             # Find epoch of min val loss
-             val_losses.index(min_val_loss)
-             # Map back to real epoch number (since we filtered Nones, careful)
-             # Actually let's assume all have it for now or iterate
-             # Safer:
-             best_metric = min(metrics, key=lambda x: x['val_loss'] if pd.notnull(x['val_loss']) else float('inf'))
-             best_epoch = best_metric['epoch']
-             min_val_loss = best_metric['val_loss']
-             
-             # Status Detection
-             # Look at last 5 epochs
-             recent = metrics[-5:]
-             if len(recent) < 3:
-                 status = "Insufficient Data"
-             else:
-                 # Trend of val_loss
-                 recent_vals = [m['val_loss'] for m in recent if pd.notnull(m['val_loss'])]
-                 if len(recent_vals) < 2:
-                     status = "Insufficient Val Data"
-                 else:
-                     # Simple logic: Is average of last 2 > average of previous 2?
-                     if recent_vals[-1] > min_val_loss * 1.01: # 1% tolerance
-                        # If current loss is significantly worse than best -> Overfitting
-                        status = "OVERFITTING (Probable)"
-                     elif recent_vals[-1] < recent_vals[0]:
-                        status = "Learning (Improving)"
-                     else:
-                        status = "Plateau (Stable)"
-
-        return {
-            'model_type': run_raw['model_type'],
-            'start_time': run_raw['start_time'],
-            'duration': run_raw['end_time'] - run_raw['start_time'],
-            'total_epochs': len(metrics),
-            'best_epoch': best_epoch,
-            'min_val_loss': min_val_loss,
-            'best_val_acc': max(val_accs) if val_accs else 0.0,
-            'final_loss': losses[-1] if losses else 0.0,
-            'status': status
-        }
+        return sorted(runs, key=lambda x: x['start_time'], reverse=True)
+
+    @staticmethod
+    def _segment(frame: pd.DataFrame) -> pd.Series:
+        """Run id per row: a run continues while the model type is unchanged and the epoch increases."""
+        new_run = (frame['model_type'] != frame['model_type'].shift()) | ~(frame['epoch'].diff() > 0)
+        return new_run.cumsum()
+
+    def _summarize_runs(self, frame: pd.DataFrame, run_ids: pd.Series) -> List[Dict]:
+        """Calculates aggregate stats for every run, in run order."""
+        runs = frame.groupby(run_ids, sort=True)
+        summary = runs.agg(
+            model_type=('model_type', 'first'),
+            start_time=('timestamp', 'first'),
+            end_time=('timestamp', 'last'),
+            total_epochs=('epoch', 'size'),
+            min_val_loss=('val_loss', 'min'),
+            best_val_acc=('val_accuracy', 'max'),
+            final_loss=('loss', 'last'), # last non-null
+        )
+
+        # Best epoch: first epoch reaching the minimum validation loss
+        with_val = frame[frame['val_loss'].notna()]
+        best_rows = with_val.groupby(run_ids[with_val.index])['val_loss'].idxmin()
+        summary['best_epoch'] = pd.Series(frame.loc[best_rows, 'epoch'].values, index=best_rows.index)
+
+        # Status Detection: look at the last 5 epochs of each run
+        recent = runs.tail(5)
+        recent_runs = recent.groupby(run_ids[recent.index])
+        n_recent = recent_runs.size()
+        n_recent_val = recent_runs['val_loss'].count()
+        first_val = recent_runs['val_loss'].first()
+        last_val = recent_runs['val_loss'].last()
+
+        summary['status'] = np.select(
+            [
+                summary['min_val_loss'].isna(),
+                n_recent < 3,
+                n_recent_val < 2,
+                last_val > summary['min_val_loss'] * 1.01, # 1% tolerance: clearly worse than best
+                last_val < first_val,
+            ],
+            [
+                "Unknown (No Val Data)",
+                "Insufficient Data",
+                "Insufficient Val Data",
+                "OVERFITTING (Probable)",
+                "Learning (Improving)",
+            ],
+            default="Plateau (Stable)"
+        )
+
+        return [{
+            'model_type': row.model_type,
+            'start_time': row.start_time,
+            'duration': row.end_time - row.start_time,
+            'total_epochs': int(row.total_epochs),
+            'best_epoch': int(row.best_epoch) if pd.notnull(row.best_epoch) else -1,
+            'min_val_loss': float(row.min_val_loss) if pd.notnull(row.min_val_loss) else None,
+            'best_val_acc': float(row.best_val_acc) if pd.notnull(row.best_val_acc) else 0.0,
+            'final_loss': float(row.final_loss) if pd.notnull(row.final_loss) else 0.0,
+            'status': row.status
+        } for row in summary.itertuples()]
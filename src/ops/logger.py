@@ -1,66 +1,137 @@
 import os
+import atexit
+import sqlite3
+import time
 import pandas as pd
 from datetime import datetime
 import json
 from typing import Dict, Any
 
+COLUMNS = [
+    "timestamp", "model_type", "epoch",
+    "loss", "accuracy", "val_loss", "val_accuracy",
+    "params_hash", "metadata"
+]
+_INSERT = f"INSERT INTO epochs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
 class TrainingLogger:
-    def __init__(self, filepath: str = "data/training_log.csv"):
-        self.filepath = filepath
+    """
+    Per-epoch training metrics, kept in a SQLite table indexed by (model_type, params_hash).
+
+    log_epoch() only buffers the row; the buffer is written in one transaction every
+    `flush_interval` seconds (checked when an epoch is logged), on flush() (called by
+    TrainingLoggerCallback at the end of training), before get_history() and at interpreter exit.
+
+    A '.csv' path (the former format) selects the '.db' beside it; an existing CSV log is
+    imported on first open.
+    """
+
+    def __init__(self, filepath: str = "data/training_log.db", flush_interval: float = 30.0):
+        base, ext = os.path.splitext(filepath)
+        self.filepath = base + ".db" if ext == ".csv" else filepath
+        self.legacy_csv = base + ".csv"
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._conn = None
         self._ensure_file_exists()
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        return self._conn
 
     def _ensure_file_exists(self):
-        """Ensures the CSV file exists with the correct headers."""
-        columns = [
-            "timestamp", "model_type", "epoch", 
-            "loss", "accuracy", "val_loss", "val_accuracy", 
-            "params_hash", "metadata"
-        ]
-        
-        if not os.path.exists(self.filepath):
-            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-            df = pd.DataFrame(columns=columns)
-            df.to_csv(self.filepath, index=False)
+        """Creates the table and index if needed, importing the legacy CSV log once."""
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS epochs (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT, model_type TEXT, epoch INTEGER,
+                    loss REAL, accuracy REAL, val_loss REAL, val_accuracy REAL,
+                    params_hash TEXT, metadata TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_epochs_model_hash ON epochs (model_type, params_hash)")
+            conn.execute("CREATE TABLE IF NOT EXISTS log_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        migrated = conn.execute("SELECT value FROM log_meta WHERE key = 'migrated_csv'").fetchone()
+        if migrated is None and os.path.exists(self.legacy_csv):
+            try:
+                with conn:
+                    try:
+                        for chunk in pd.read_csv(self.legacy_csv, chunksize=100_000):
+                            chunk = chunk.reindex(columns=COLUMNS).astype(object)
+                            conn.executemany(_INSERT, chunk.where(chunk.notna(), None).itertuples(index=False, name=None))
+                    except pd.errors.EmptyDataError:
+                        pass
+                    conn.execute("INSERT OR REPLACE INTO log_meta (key, value) VALUES ('migrated_csv', ?)",
+                                 (datetime.now().isoformat(),))
+            except Exception as e:
+                print(f"Warning: Could not migrate {self.legacy_csv}: {e}")
 
-    def log_epoch(self, 
-                  model_type: str, 
-                  epoch: int, 
+    def log_epoch(self,
+                  model_type: str,
+                  epoch: int,
                   metrics: Dict[str, float],
                   params_hash: str = None,
                   metadata: Dict[str, Any] = None):
         """
-        Logs a single epoch's metrics.
+        Logs a single epoch's metrics (buffered, see flush()).
         """
-        row = {
-            "timestamp": datetime.now().isoformat(),
-            "model_type": model_type,
-            "epoch": epoch,
-            "loss": metrics.get('loss'),
-            "accuracy": metrics.get('accuracy'),
-            "val_loss": metrics.get('val_loss'),
-            "val_accuracy": metrics.get('val_accuracy'),
-            "params_hash": params_hash,
-            "metadata": json.dumps(metadata) if metadata else None
-        }
-        
-        df = pd.DataFrame([row])
-        # robust append
-        if os.path.exists(self.filepath):
-             df.to_csv(self.filepath, mode='a', header=False, index=False)
-        else:
-             df.to_csv(self.filepath, mode='w', header=True, index=False)
-             
+        self._buffer.append((
+            datetime.now().isoformat(),
+            model_type,
+            int(epoch),
+            metrics.get('loss'),
+            metrics.get('accuracy'),
+            metrics.get('val_loss'),
+            metrics.get('val_accuracy'),
+            params_hash,
+            json.dumps(metadata) if metadata else None
+        ))
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered epochs in one transaction."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        with self._connect() as conn:
+            conn.executemany(_INSERT, rows)
+
     def get_history(self, model_type: str = None, params_hash: str = None) -> pd.DataFrame:
-        if not os.path.exists(self.filepath):
-            return pd.DataFrame()
-        try:
-            df = pd.read_csv(self.filepath)
-        except Exception:
-            return pd.DataFrame()
-            
+        self.flush()
+        clauses, params = [], []
         if model_type:
-            df = df[df['model_type'] == model_type]
+            clauses.append("model_type = ?")
+            params.append(model_type)
         if params_hash:
-            df = df[df['params_hash'] == params_hash]
-            
-        return df
+            clauses.append("params_hash = ?")
+            params.append(params_hash)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM epochs{where} ORDER BY id",
+                                 self._connect(), params=params)
+
+    def get_appended(self, after_id: int = 0) -> pd.DataFrame:
+        """Rows stored after row id `after_id`, in insertion order, with their 'id' column."""
+        self.flush()
+        return pd.read_sql_query(f"SELECT id, {', '.join(COLUMNS)} FROM epochs WHERE id > ? ORDER BY id",
+                                 self._connect(), params=(after_id,))
+
+    def last_id(self) -> int:
+        self.flush()
+        row = self._connect().execute("SELECT MAX(id) FROM epochs").fetchone()
+        return row[0] or 0
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.flush)
@@ -1,15 +1,32 @@
 import random
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, Tuple
 from judge.backtest_standard import Backtester
 from core.base import Lottery
+from data.features import build_incidence_matrix, extract_draws
 
 class GeneticOptimizer:
-    def __init__(self, lottery: Lottery, game_config: Dict, population_size: int = 20, generations: int = 10, mutation_rate: float = 0.1):
+    """
+    Evolves Hybrid weights [w_gap, w_freq, w_surf] against a walk-forward backtest of the last
+    `draws_to_test` draws.
+
+    The sub-model scores of every tested draw do not depend on the weights, so they are computed
+    once (HybridModel.component_scores on the history before each draw, as Backtester trains it)
+    and each generation is scored in one vectorized pass (evaluate_weights, also behind
+    grid_search). Fitness is memoized by the weights
+    rounded to `cache_decimals`, so the elite and repeated children are never re-evaluated.
+    """
+
+    def __init__(self, lottery: Lottery, game_config: Dict, population_size: int = 20, generations: int = 10, mutation_rate: float = 0.1,
+                 draws_to_test: int = 50, cache_decimals: int = 4):
         self.lottery = lottery
         self.game_config = game_config
         self.population_size = population_size
         self.generations = generations
         self.mutation_rate = mutation_rate
+        # We test on fewer draws for speed during evolution, e.g., last 50
+        self.draws_to_test = draws_to_test
+        self.cache_decimals = cache_decimals
         
         # Ranges for weights: 0.0 to 10.0
         self.gene_min = 0.0
@@ -17,6 +34,9 @@ class GeneticOptimizer:
         
         # Determine prize tiers for fitness
         self.prize_tiers = self._get_prize_tiers(lottery.slug)
+        
+        self._fitness_cache = {}
+        self._scores = None # (component scores, target hits) per tested draw
 
     def _get_prize_tiers(self, slug: str) -> List[int]:
         if slug == 'megasena':
@@ -31,14 +51,29 @@ class GeneticOptimizer:
         # Gene: [w_gap, w_freq, w_surf]
         return [random.uniform(self.gene_min, self.gene_max) for _ in range(3)]
 
+    def _hit_value(self, hits: int) -> float:
+        """Fitness contributed by one tested draw with `hits` hits."""
+        # Base value: hit count itself (reward getting closer)
+        score = float(hits)
+        
+        # Tier Bonus
+        if hits in self.prize_tiers:
+            # Big bonus for reaching minimum prize
+            # e.g. Quadra (4) in MegaSena.
+            # If we get 1 quadra, that's worth WAY more than 100 ternos.
+            
+            # Index in prize_tiers: 0 is min prize, -1 is jackpot.
+            tier_index = self.prize_tiers.index(hits)
+            score += 100 * (10 ** tier_index) # 100, 1000, 10000...
+        return score
+
+    def _score_distribution(self, hits_distribution: Dict[int, int]) -> float:
+        return sum(self._hit_value(hits) * count for hits, count in hits_distribution.items())
+
     def _calculate_fitness(self, individual: List[float]) -> float:
+        """Reference fitness: a full hybrid Backtester run (what the cached evaluation reproduces)."""
         w_gap, w_freq, w_surf = individual
         
-        # Setup Backtester
-        # We test on fewer draws for speed during evolution, e.g., last 50
-        # User said "don't pity the computer", so let's do 50 decent draws.
-        draws_to_test = 50 
-        
         backtester = Backtester(
             lottery=self.lottery,
             model_type='hybrid',
@@ -50,38 +85,75 @@ class GeneticOptimizer:
         
         # Suppress prints
         try:
-            results = backtester.run(draws_to_test=draws_to_test, prediction_size=self.game_config['default_play'], silent=True)
+            results = backtester.run(draws_to_test=self.draws_to_test, prediction_size=self.game_config['default_play'], silent=True)
         except Exception as e:
             import sys
             print(f"Error evaluating individual {individual}: {e}", file=sys.stderr)
             return 0.0
 
-        # Calculate Score
-        total_score = 0.0
-        hits_dist = results.get('hits_distribution', {})
-        
-        # Base score: sum of all hits (reward getting closer)
-        # However, we want to prioritize Prize Tiers.
-        
-        for hits, count in hits_dist.items():
-            # Base value: hit count itself
-            score = hits * count 
-            
-            # Tier Bonus
-            if hits in self.prize_tiers:
-                # Big bonus for reaching minimum prize
-                # e.g. Quadra (4) in MegaSena.
-                # If we get 1 quadra, that's worth WAY more than 100 ternos.
-                
-                # Exponential scaling for higher tiers?
-                # Index in prize_tiers: 0 is min prize, -1 is jackpot.
-                tier_index = self.prize_tiers.index(hits)
-                bonus = 100 * (10 ** tier_index) # 100, 1000, 10000...
-                score += bonus * count
-            
-            total_score += score
-            
-        return total_score
+        return self._score_distribution(results.get('hits_distribution', {}))
+
+    def _component_scores(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (scores, targets) for the tested draws that the hybrid model can predict:
+        scores is (n_draws, 3, n_numbers), targets the matching (n_draws, n_numbers) hit mask.
+        """
+        if self._scores is not None:
+            return self._scores
+        from models.ensemble.hybrid import HybridModel
+
+        range_min, range_max = self.game_config['min'], self.game_config['max']
+        df = self.lottery.preprocess_data()
+        incidence = getattr(self.lottery, 'incidence', None)
+        if incidence is None or len(incidence) != len(df):
+            incidence = build_incidence_matrix(extract_draws(df), range_max)
+
+        scores, targets = [], []
+        for i in range(max(len(df) - self.draws_to_test, 0), len(df)):
+            try:
+                model = HybridModel(range_min, range_max, self.game_config['draw'])
+                model.train(df.iloc[:i], incidence=incidence[:i])
+                scores.append(model.component_scores())
+            except Exception:
+                # Backtester skips draws the model cannot predict
+                continue
+            targets.append(incidence[i, range_min:range_max + 1].astype(bool))
+
+        n_numbers = range_max - range_min + 1
+        self._scores = (np.array(scores, dtype=np.float64).reshape(-1, 3, n_numbers),
+                        np.array(targets, dtype=bool).reshape(-1, n_numbers))
+        return self._scores
+
+    def evaluate_weights(self, weights, chunk_size: int = 2048) -> np.ndarray:
+        """
+        Fitness of every row of an (n, 3) array of [w_gap, w_freq, w_surf] weights, as the hybrid
+        backtest would score them. Pure NumPy over the cached component scores, so thousands of
+        weight vectors (grids, external search strategies) can be scored at once; rows are
+        processed in chunks of `chunk_size` to bound memory.
+        """
+        weights = np.asarray(weights, dtype=np.float64).reshape(-1, 3)
+        scores, targets = self._component_scores()
+        values = np.array([self._hit_value(h) for h in range(self.game_config['default_play'] + 1)])
+
+        fitness = np.empty(len(weights))
+        for start in range(0, len(weights), chunk_size):
+            w = weights[start:start + chunk_size, :, None, None]
+            # Same arithmetic as HybridModel.predict: (w_gap * gap) + (w_freq * freq) + (w_surf * surf)
+            total = (w[:, 0] * scores[None, :, 0]) + (w[:, 1] * scores[None, :, 1]) + (w[:, 2] * scores[None, :, 2])
+            # Highest score first, lowest number on ties (stable sort of the negated scores)
+            picks = np.argsort(-total, axis=-1, kind='stable')[..., :self.game_config['default_play']]
+            hits = np.take_along_axis(np.broadcast_to(targets, total.shape), picks, axis=-1).sum(axis=-1)
+            fitness[start:start + len(w)] = values[hits].sum(axis=-1)
+        return fitness
+
+    def _fitness(self, population: List[List[float]]) -> List[float]:
+        """Memoized fitness of a population: only weight vectors not seen before are evaluated."""
+        keys = [tuple(round(gene, self.cache_decimals) for gene in ind) for ind in population]
+        pending = {key: ind for key, ind in zip(keys, population) if key not in self._fitness_cache}
+        if pending:
+            for key, fitness in zip(pending, self.evaluate_weights(list(pending.values()))):
+                self._fitness_cache[key] = float(fitness)
+        return [self._fitness_cache[key] for key in keys]
 
     def optimize(self):
         print(f"Starting Genetic Optimization for {self.lottery.name}...")
@@ -91,9 +163,7 @@ class GeneticOptimizer:
         
         for gen in range(self.generations):
             # Evaluate Fitness
-            fitness_scores = []
-            for ind in population:
-                fitness_scores.append((ind, self._calculate_fitness(ind)))
+            fitness_scores = list(zip(population, self._fitness(population)))
             
             # Sort by fitness (descending)
             fitness_scores.sort(key=lambda x: x[1], reverse=True)
@@ -130,3 +200,16 @@ class GeneticOptimizer:
             population = new_population
             
         return population[0] # Return best of last gen (elitism ensures it's good)
+
+    def grid_search(self, steps: int = 11) -> List[float]:
+        """Exhaustive search: scores every combination of `steps` evenly spaced values per weight."""
+        axis = np.linspace(self.gene_min, self.gene_max, steps)
+        grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+
+        print(f"Starting Grid Search for {self.lottery.name}...")
+        print(f"Grid: {steps} values per weight ({len(grid)} combinations)")
+
+        fitness = self.evaluate_weights(grid)
+        best_ind = grid[int(np.argmax(fitness))].tolist()
+        print(f"Best Score = {fitness.max():.2f} | Weights: Gap={best_ind[0]:.2f}, Freq={best_ind[1]:.2f}, Surf={best_ind[2]:.2f}")
+        return best_ind
@@ -1,13 +1,8 @@
 import os
-import tensorflow as tf
 import pandas as pd
 from typing import List, Callable, Dict, Any
 from core.base import Lottery
 from core.games.megasena import MegaSena
-from models.deep.transformer import TransformerModel
-from models.deep.lstm import LSTMModel
-from models.deep.autoencoder import AutoEncoderModel
-from models.tree.catboost import CatBoostModel
 
 class SnapshotManager:
     """
@@ -17,11 +12,19 @@ class SnapshotManager:
     def __init__(self, lottery: Lottery = None, base_dir: str = "snapshots"):
         self.lottery = lottery if lottery else MegaSena()
         self.base_dir = base_dir
-        self.gpu_enabled = len(tf.config.list_physical_devices('GPU')) > 0
+        self._gpu_enabled = None
         
         print(f"SnapshotManager initialized for {self.lottery.name}")
         print(f"Base Directory: {self.base_dir}")
-        print(f"GPU Acceleration: {'ENABLED' if self.gpu_enabled else 'DISABLED'}")
+
+    @property
+    def gpu_enabled(self) -> bool:
+        # Queried on first use rather than at construction: it has to initialize TensorFlow
+        if self._gpu_enabled is None:
+            import tensorflow as tf
+            self._gpu_enabled = len(tf.config.list_physical_devices('GPU')) > 0
+            print(f"GPU Acceleration: {'ENABLED' if self._gpu_enabled else 'DISABLED'}")
+        return self._gpu_enabled
 
     def _ensure_dir(self, path: str):
         os.makedirs(path, exist_ok=True)
@@ -74,6 +77,10 @@ class SnapshotManager:
     def _train_batch(self, df: pd.DataFrame, context: str, models: List[str], epochs: int):
         from ops.logger import TrainingLogger
         from ops.callbacks import TrainingLoggerCallback
+        from models.deep.transformer import TransformerModel
+        from models.deep.lstm import LSTMModel
+        from models.deep.autoencoder import AutoEncoderModel
+        from models.tree.catboost import CatBoostModel
         
         logger = TrainingLogger()
         
@@ -88,7 +95,8 @@ class SnapshotManager:
                     logger=logger, 
                     model_type="transformer", 
                     params_hash="snapshot_run", 
-                    metadata={'context': context}
+                    metadata={'context': context},
+                    batch_size=64
                 )
                 
                 model.train(df, epochs=epochs, batch_size=64, verbose=0, callbacks=[cb])
@@ -112,7 +120,8 @@ class SnapshotManager:
                     logger=logger, 
                     model_type="lstm", 
                     params_hash="snapshot_run",
-                    metadata={'context': context}
+                    metadata={'context': context},
+                    batch_size=32
                 )
                 
                 model.train(df, epochs=epochs, batch_size=32, verbose=0, callbacks=[cb])
@@ -164,3 +173,5 @@ class SnapshotManager:
                 print(f"    Saved: {path_with_ext}")
             except Exception as e:
                 print(f"    Error: {e}")
+
+        logger.close()
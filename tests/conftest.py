@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.base import Lottery
+
+class FakeLottery(Lottery):
+    """
+    In-memory lottery of `n_draws` seeded random draws of `draw_count` numbers out of 1..range_max,
+    preprocessed like the real games ('concurso', 'data', 'dezenas') and indexed (incidence/prefix sums).
+    """
+
+    def __init__(self, n_draws: int = 80, range_max: int = 20, draw_count: int = 4, seed: int = 5,
+                 name: str = "Fake", slug: str = "fake"):
+        super().__init__(name=name, data_url="", slug=slug)
+        self.range_min = 1
+        self.range_max = range_max
+        self.draw_count = draw_count
+        rng = np.random.default_rng(seed)
+        self.draws = [sorted(rng.choice(np.arange(1, range_max + 1), draw_count, replace=False).tolist())
+                      for _ in range(n_draws)]
+
+    def load_data(self) -> pd.DataFrame:
+        self.data = pd.DataFrame({
+            'concurso': np.arange(1, len(self.draws) + 1),
+            'data': pd.date_range('2024-01-01', periods=len(self.draws)),
+            'dezenas': self.draws,
+        })
+        return self.data
+
+    def preprocess_data(self) -> pd.DataFrame:
+        df = self.load_data()
+        self._index_draws(df)
+        return df
+
+@pytest.fixture
+def fake_lottery():
+    """Factory for FakeLottery instances, e.g. fake_lottery(n_draws=120, range_max=60, draw_count=6, seed=3)."""
+    return FakeLottery
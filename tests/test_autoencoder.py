@@ -68,3 +68,16 @@ def test_autoencoder_save_load(mock_data):
     finally:
         if os.path.exists(test_dir):
             shutil.rmtree(test_dir)
+
+def test_autoencoder_validate_batch_matches_single(mock_data):
+    model = AutoEncoderModel(1, 10, 6)
+    model.train(mock_data, epochs=1)
+    
+    candidates = [[1, 2, 3, 4, 5, 6], [5, 6, 7, 8, 9, 10], [1, 3, 5, 7, 9, 10]]
+    scores = model.validate_batch(candidates, batch_size=2)
+    assert scores.shape == (3,)
+    
+    for candidate, score in zip(candidates, scores):
+        vec = model._draw_to_onehot(candidate)
+        expected = np.mean((vec - model.model.predict(np.array([vec]), verbose=0)[0]) ** 2)
+        assert score == pytest.approx(expected, rel=1e-5)
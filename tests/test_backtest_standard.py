@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from judge.backtest_standard import Backtester
+
+@pytest.mark.parametrize("model_type", ['frequency', 'gap', 'surfing', 'hybrid'])
+def test_incremental_matches_full_retrain(model_type, fake_lottery):
+    lottery = fake_lottery(seed=3)
+    args = {'w_gap': 1.5, 'w_freq': 0.5, 'w_surf': 1.0} if model_type == 'hybrid' else {}
+
+    full = Backtester(lottery, model_type, args, 1, 20, 4).run(draws_to_test=20, prediction_size=6, silent=True)
+    incremental = Backtester(lottery, model_type, args, 1, 20, 4).run(
+        draws_to_test=20, prediction_size=6, silent=True, incremental=True
+    )
+
+    assert full['total_bets'] == 20
+    assert [d['prediction'] for d in full['details']] == [d['prediction'] for d in incremental['details']]
+    assert full['hits_distribution'] == incremental['hits_distribution']
+
+def test_incremental_falls_back_without_update(monkeypatch, fake_lottery):
+    from models.heuristic.gap import GapModel
+
+    def no_update(self, draw):
+        raise NotImplementedError
+
+    monkeypatch.setattr(GapModel, 'update', no_update)
+    lottery = fake_lottery(seed=3)
+    full = Backtester(lottery, 'gap', {}, 1, 20, 4).run(draws_to_test=10, silent=True)
+    incremental = Backtester(lottery, 'gap', {}, 1, 20, 4).run(draws_to_test=10, silent=True, incremental=True)
+
+    assert [d['prediction'] for d in full['details']] == [d['prediction'] for d in incremental['details']]
+
+def test_tree_update_matches_retrain(fake_lottery):
+    from models.tree.rf import RandomForestModel
+    lottery = fake_lottery(seed=3)
+    df = lottery.preprocess_data()
+
+    updated = RandomForestModel(1, 20, 4)
+    updated.train(df.iloc[:70], n_estimators=5)
+    updated.update(df.iloc[70]['dezenas'])
+
+    retrained = RandomForestModel(1, 20, 4)
+    retrained.train(df.iloc[:71], n_estimators=5)
+
+    np.testing.assert_array_equal(updated.next_features, retrained.next_features)
+    assert updated.predict() == retrained.predict()
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_parallel_matches_serial(incremental, fake_lottery):
+    lottery = fake_lottery(seed=3)
+    args = {'w_gap': 2.0, 'w_freq': 1.0, 'w_surf': 0.5}
+
+    serial = Backtester(lottery, 'hybrid', args, 1, 20, 4).run(
+        draws_to_test=15, prediction_size=6, silent=True, incremental=incremental
+    )
+    parallel = Backtester(lottery, 'hybrid', args, 1, 20, 4).run(
+        draws_to_test=15, prediction_size=6, silent=True, incremental=incremental, jobs=3
+    )
+
+    assert parallel == serial
@@ -1,7 +1,15 @@
 import unittest
 import subprocess
 import sys
+import os
 import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Import-time budget (seconds) for a heuristic prediction: pandas/numpy only, no ML frameworks
+STARTUP_BUDGET = 2.0
+HEAVY_MODULES = ('tensorflow', 'keras', 'xgboost', 'catboost', 'sklearn')
 
 class TestCLIFlow(unittest.TestCase):
     
@@ -36,5 +44,61 @@ class TestCLIFlow(unittest.TestCase):
         # CLI injects 'epochs' by default (from args.epochs=50)
         self.assertEqual(data['parameters'], {"order": "asc", "epochs": 50})
 
+    def test_frequency_startup_budget(self):
+        # preloto megasena --model frequency, served from a local mirror so only imports are measured
+        with tempfile.TemporaryDirectory() as tmp:
+            rng = np.random.default_rng(0)
+            draws = [sorted(rng.choice(np.arange(1, 61), 6, replace=False)) for _ in range(50)]
+            pd.DataFrame({
+                'Concurso': range(1, 51),
+                'Data do Sorteio': ['01/01/2024'] * 50,
+                **{f'Bola{j + 1}': [int(d[j]) for d in draws] for j in range(6)},
+            }).to_csv(os.path.join(tmp, 'megasena.csv'), index=False)
+
+            src = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+            env = {**os.environ, 'PYTHONPATH': src, 'PRELOTO_DATA_MIRROR': tmp,
+                   'PRELOTO_CACHE_DIR': os.path.join(tmp, 'cache')}
+            cmd = [sys.executable, "-X", "importtime", "-m", "cli.main", "megasena", "--model", "frequency"]
+            result = subprocess.run(cmd, capture_output=True, text=True, cwd=tmp, env=env)
+        self.assertEqual(result.returncode, 0, f"CLI failed: {result.stderr}")
+
+        # "import time: self [us] | cumulative | package"; top-level imports have no indentation
+        imports = [line.split('|') for line in result.stderr.splitlines() if line.startswith('import time:')][1:]
+        modules = {name.strip() for _, _, name in imports}
+        total = sum(int(cumulative) for _, cumulative, name in imports if not name.startswith('  ')) / 1e6
+
+        loaded = sorted(m for m in modules if m.split('.')[0] in HEAVY_MODULES)
+        self.assertEqual(loaded, [], "heavy frameworks imported by a heuristic prediction")
+        self.assertLess(total, STARTUP_BUDGET, f"imports took {total:.2f}s")
+
+    def test_empty_prediction_with_filters_exits_cleanly(self):
+        # A model returning no numbers (e.g. an untrained XGBoost) cannot be filtered: error, not traceback
+        import io
+        from contextlib import redirect_stderr
+        from unittest.mock import patch
+        from cli.main import main
+        from data.manager import DataManager
+        from models.heuristic.gap import GapModel
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rng = np.random.default_rng(0)
+            draws = [sorted(rng.choice(np.arange(1, 61), 6, replace=False)) for _ in range(20)]
+            pd.DataFrame({
+                'Concurso': range(1, 21),
+                'Data do Sorteio': ['01/01/2024'] * 20,
+                **{f'Bola{j + 1}': [int(d[j]) for d in draws] for j in range(6)},
+            }).to_csv(os.path.join(tmp, 'megasena.csv'), index=False)
+
+            stderr = io.StringIO()
+            with patch.object(DataManager, 'mirror', tmp), patch.object(DataManager, 'cache_dir', os.path.join(tmp, 'cache')), \
+                 patch.object(DataManager, '_fetched', {}), patch.object(GapModel, 'predict', return_value=[]), \
+                 patch.object(sys, 'argv', ['preloto', 'megasena', '--model', 'gap', '--filters', 'odd:3']), \
+                 redirect_stderr(stderr):
+                with self.assertRaises(SystemExit) as exit_info:
+                    main()
+
+        self.assertEqual(exit_info.exception.code, 1)
+        self.assertIn("Error: Could not generate a prediction satisfying constraints", stderr.getvalue())
+
 if __name__ == '__main__':
     unittest.main()
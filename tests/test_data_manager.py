@@ -1,6 +1,8 @@
 import os
 import pytest
+import numpy as np
 import pandas as pd
+from unittest.mock import MagicMock, patch
 from data.manager import DataManager
 
 
@@ -36,3 +38,216 @@ class TestDataManagerParquet:
         DataManager.export_parquet(sample_df, path)
         loaded = DataManager.load_parquet(path)
         assert loaded["concurso"].dtype == sample_df["concurso"].dtype
+
+
+class TestDataManagerCache:
+    URL = "https://example.com/data/megasena.csv"
+
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(DataManager, "cache_dir", str(tmp_path / "cache"))
+        monkeypatch.setattr(DataManager, "offline", False)
+        monkeypatch.setattr(DataManager, "mirror", None)
+        monkeypatch.setattr(DataManager, "_fetched", {})
+
+    @staticmethod
+    def _response(status, content=b"", headers=None):
+        response = MagicMock()
+        response.status_code = status
+        response.content = content
+        response.headers = headers or {}
+        return response
+
+    def test_local_path_and_file_url(self, sample_df, tmp_path):
+        path = tmp_path / "local.csv"
+        sample_df.to_csv(path, index=False)
+        pd.testing.assert_frame_equal(DataManager.load_csv(str(path)), sample_df)
+        pd.testing.assert_frame_equal(DataManager.load_csv(path.as_uri()), sample_df)
+
+    def test_mirror_override(self, sample_df, tmp_path, monkeypatch):
+        sample_df.to_csv(tmp_path / "megasena.csv", index=False)
+        monkeypatch.setattr(DataManager, "mirror", str(tmp_path))
+        with patch("requests.get") as get:
+            loaded = DataManager.load_csv(self.URL)
+        get.assert_not_called()
+        pd.testing.assert_frame_equal(loaded, sample_df)
+
+    def test_download_then_conditional_refresh(self, sample_df):
+        body = sample_df.to_csv(index=False).encode()
+        with patch("requests.get", return_value=self._response(200, body, {"ETag": '"v1"'})):
+            pd.testing.assert_frame_equal(DataManager.load_csv(self.URL), sample_df)
+
+        with patch("requests.get", return_value=self._response(304)) as get:
+            pd.testing.assert_frame_equal(DataManager.load_csv(self.URL, refresh=True), sample_df)
+        assert get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+    def test_cached_copy_is_trusted_until_ttl(self, sample_df, monkeypatch):
+        body = sample_df.to_csv(index=False).encode()
+        with patch("requests.get", return_value=self._response(200, body, {"ETag": '"v1"'})):
+            DataManager.load_csv(self.URL)
+
+        # A new process within the TTL reads the cached copy without asking the server
+        monkeypatch.setattr(DataManager, "_fetched", {})
+        with patch("requests.get") as get:
+            pd.testing.assert_frame_equal(DataManager.load_csv(self.URL), sample_df)
+        get.assert_not_called()
+
+        monkeypatch.setattr(DataManager, "_fetched", {})
+        monkeypatch.setattr(DataManager, "ttl", 0)
+        with patch("requests.get", return_value=self._response(304)) as get:
+            pd.testing.assert_frame_equal(DataManager.load_csv(self.URL), sample_df)
+        get.assert_called_once()
+
+    def test_malformed_ttl_falls_back_to_default(self, monkeypatch, capsys):
+        from data.manager import _env_float
+
+        monkeypatch.setenv("PRELOTO_CACHE_TTL", "6h")
+        assert _env_float("PRELOTO_CACHE_TTL", 21600) == 21600
+        assert "PRELOTO_CACHE_TTL" in capsys.readouterr().err
+        monkeypatch.setenv("PRELOTO_CACHE_TTL", " 60 ")
+        assert _env_float("PRELOTO_CACHE_TTL", 21600) == 60
+        monkeypatch.delenv("PRELOTO_CACHE_TTL")
+        assert _env_float("PRELOTO_CACHE_TTL", 21600) == 21600
+
+    def test_network_failure_uses_cache(self, sample_df):
+        body = sample_df.to_csv(index=False).encode()
+        with patch("requests.get", return_value=self._response(200, body)):
+            DataManager.load_csv(self.URL)
+        with patch("requests.get", side_effect=ConnectionError("down")):
+            pd.testing.assert_frame_equal(DataManager.load_csv(self.URL, refresh=True), sample_df)
+
+    def test_preprocessed_cache_loads_without_network(self, monkeypatch):
+        from core.games.quina import Quina
+
+        game = Quina()
+        body = pd.DataFrame({
+            "Concurso": [1, 2], "Data Sorteio": ["01/01/2024", "02/01/2024"],
+            "Bola1": [1, 2], "Bola2": [5, 6], "Bola3": [10, 11], "Bola4": [20, 21], "Bola5": [80, 79],
+        }).to_csv(index=False).encode()
+        with patch("requests.get", return_value=self._response(200, body)):
+            game.preprocess_data()
+
+        monkeypatch.setattr(DataManager, "_fetched", {})
+        with patch("requests.get", side_effect=ConnectionError("slow network")) as get:
+            assert len(Quina().preprocess_data()) == 2
+        get.assert_not_called()
+
+    def test_offline_mode(self, sample_df, monkeypatch):
+        monkeypatch.setattr(DataManager, "offline", True)
+        with patch("requests.get") as get:
+            with pytest.raises(FileNotFoundError):
+                DataManager.load_csv(self.URL)
+            data_path, _ = DataManager.cache_paths(self.URL)
+            os.makedirs(os.path.dirname(data_path))
+            sample_df.to_csv(data_path, index=False)
+            pd.testing.assert_frame_equal(DataManager.load_csv(self.URL), sample_df)
+        get.assert_not_called()
+
+
+class TestPreprocessedCache:
+    @pytest.fixture(autouse=True)
+    def mirror_dir(self, tmp_path, monkeypatch):
+        pd.DataFrame({
+            "Concurso": [1, 2],
+            "Data Sorteio": ["01/01/2024", "02/01/2024"],
+            "Bola1": [1, 2], "Bola2": [5, 6], "Bola3": [10, 11], "Bola4": [20, 21], "Bola5": [80, 79],
+        }).to_csv(tmp_path / "quina.csv", index=False)
+        monkeypatch.setattr(DataManager, "cache_dir", str(tmp_path / "cache"))
+        monkeypatch.setattr(DataManager, "mirror", str(tmp_path))
+        monkeypatch.setattr(DataManager, "_fetched", {})
+        return tmp_path
+
+    def test_second_load_reads_parquet(self):
+        from core.games.quina import Quina
+
+        first = Quina().preprocess_data()
+        with patch("pandas.read_csv") as read_csv:
+            game = Quina()
+            second = game.preprocess_data()
+        read_csv.assert_not_called()
+
+        assert second["dezenas"].tolist() == first["dezenas"].tolist()
+        assert second["data"].tolist() == first["data"].tolist()
+        assert game.incidence.shape == (2, 81)
+
+    def test_source_change_invalidates_cache(self, mirror_dir):
+        from core.games.quina import Quina
+
+        Quina().preprocess_data()
+        df = pd.read_csv(mirror_dir / "quina.csv")
+        pd.concat([df, df.tail(1).assign(Concurso=3)]).to_csv(mirror_dir / "quina.csv", index=False)
+
+        assert len(Quina().preprocess_data()) == 3
+        assert len(os.listdir(DataManager.cache_dir)) == 1
+        parts = [f for f in os.listdir(Quina()._preprocessed_cache_dir()) if f.endswith(".parquet")]
+        assert len(parts) == 1
+
+    def test_ingest_appends_only_new_draws(self, mirror_dir):
+        from core.games.quina import Quina
+
+        game = Quina()
+        game.preprocess_data()
+        events = []
+        game.subscribe(lambda lottery, rows: events.append(rows["Concurso"].tolist()))
+        assert game.ingest().empty
+
+        df = pd.read_csv(mirror_dir / "quina.csv")
+        new = pd.DataFrame({
+            "Concurso": [3, 4], "Data Sorteio": ["03/01/2024", "04/01/2024"],
+            "Bola1": [1, 3], "Bola2": [7, 8], "Bola3": [12, 13], "Bola4": [22, 23], "Bola5": [78, 77],
+        })
+        pd.concat([df, new]).to_csv(mirror_dir / "quina.csv", index=False)
+
+        cache_dir = game._preprocessed_cache_dir()
+        first_part = os.path.join(cache_dir, game._read_manifest()["parts"][0])
+        first_mtime = os.stat(first_part).st_mtime_ns
+
+        added = game.ingest()
+        assert added["Concurso"].tolist() == [3, 4]
+        assert events == [[3, 4]]
+
+        # Only the new draws are written, as a second part next to the untouched first one
+        manifest = game._read_manifest()
+        assert manifest["rows"] == 4 and len(manifest["parts"]) == 2
+        assert os.stat(first_part).st_mtime_ns == first_mtime
+        assert DataManager.load_parquet(os.path.join(cache_dir, manifest["parts"][1]))["Concurso"].tolist() == [3, 4]
+
+        rebuilt = Quina()
+        rebuilt.data = pd.read_csv(mirror_dir / "quina.csv")
+        rebuilt.preprocess_data()
+        np.testing.assert_array_equal(game.incidence, rebuilt.incidence)
+        np.testing.assert_array_equal(game.prefix_counts, rebuilt.prefix_counts)
+        assert Quina().preprocess_data()["dezenas"].tolist() == game.data["dezenas"].tolist()
+
+    def test_game_only_defines_prepare(self, mirror_dir):
+        from core.base import Lottery
+
+        class Minimal(Lottery):
+            def __init__(self):
+                super().__init__(name="Minimal", data_url="https://example.com/quina.csv", slug="minimal")
+                self.range_min, self.range_max, self.draw_count = 1, 80, 5
+
+            def _prepare(self, raw):
+                return raw.assign(dezenas=raw[[f"Bola{i}" for i in range(1, 6)]].values.tolist())
+
+        first = Minimal().preprocess_data()
+        with patch("pandas.read_csv") as read_csv:
+            second = Minimal().preprocess_data()
+        read_csv.assert_not_called()
+        assert second["dezenas"].tolist() == first["dezenas"].tolist() == [[1, 5, 10, 20, 80], [2, 6, 11, 21, 79]]
+
+    def test_ingest_compacts_parts(self, mirror_dir, monkeypatch):
+        from core.games.quina import Quina
+
+        monkeypatch.setattr(Quina, "_MAX_CACHE_PARTS", 2)
+        game = Quina()
+        game.preprocess_data()
+        for concurso in (3, 4):
+            df = pd.read_csv(mirror_dir / "quina.csv")
+            df = pd.concat([df, df.tail(1).assign(Concurso=concurso)])
+            df.to_csv(mirror_dir / "quina.csv", index=False)
+            game.ingest()
+
+        assert len(game._read_manifest()["parts"]) == 1
+        assert len(os.listdir(game._preprocessed_cache_dir())) == 2 # manifest + one part
+        assert Quina().preprocess_data()["Concurso"].tolist() == [1, 2, 3, 4]
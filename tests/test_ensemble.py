@@ -0,0 +1,159 @@
+import os
+import subprocess
+import sys
+import time
+import types
+import pytest
+import judge.ensemble as ensemble
+from judge.ensemble import EnsemblePredictor
+from judge.backtest_ensemble import EnsembleBacktester
+from judge.ledger import PredictionLedger
+from judge.members import MEMBERS, register_member, resolve_members
+
+def test_parallel_matches_sequential_for_heuristics(tmp_path, monkeypatch, fake_lottery):
+    monkeypatch.chdir(tmp_path) # ledger.db
+
+    sequential = EnsemblePredictor(fake_lottery(), 1, 20, 4, parallel=False, members=['mc']).predict_next(count=6)
+    parallel = EnsemblePredictor(fake_lottery(), 1, 20, 4, members=['mc']).predict_next(count=6)
+
+    # Deterministic members must agree regardless of where they ran
+    assert parallel['canaries'] == sequential['canaries']
+    assert set(parallel['timings']) == {'mc', 'frequency', 'gap', 'surfing'}
+    assert all(t is not None and t >= 0 for t in parallel['timings'].values())
+    assert len(parallel['models']['mc']) == 6
+
+def test_timed_out_member_is_dropped(tmp_path, monkeypatch, fake_lottery):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(MEMBERS, 'slow', {**MEMBERS['surfing'], 'runner': 'tf'})
+
+    def fake_member(model_type, df, game, count, train_args, snapshot_path=None):
+        if model_type == 'surfing':
+            time.sleep(2)
+        return list(range(1, count + 1)), 0.0
+
+    monkeypatch.setattr(ensemble, '_predict_member', fake_member)
+
+    # The Keras session must not be cleared while the timed-out member still runs on the TF thread
+    cleared = []
+    fake_tf = types.SimpleNamespace(keras=types.SimpleNamespace(backend=types.SimpleNamespace(
+        clear_session=lambda: cleared.append(True))))
+    monkeypatch.setitem(sys.modules, 'tensorflow', fake_tf)
+
+    start = time.perf_counter()
+    predictor = EnsemblePredictor(fake_lottery(), 1, 20, 4, timeout=0.5, members=['mc', 'slow'], canaries=[])
+    result = predictor.predict_next(count=4)
+
+    assert time.perf_counter() - start < 2
+    assert result['models'] == {'mc': [1, 2, 3, 4], 'slow': []}
+    assert result['timings']['slow'] is None
+    assert result['suggestion'] == [1, 2, 3, 4]
+    assert cleared == []
+
+def test_timed_out_process_member_is_terminated(tmp_path):
+    # A tree member that would train for minutes: the run (and the interpreter) must end at the deadline
+    code = (
+        "import time\n"
+        "from judge.ensemble import EnsemblePredictor\n"
+        "from tests.conftest import FakeLottery\n"
+        "predictor = EnsemblePredictor(FakeLottery(), 1, 20, 4, model_args={'rf_n_estimators': 1000000},\n"
+        "                              timeout=1, members=['mc', 'rf'], canaries=[])\n"
+        "print(predictor.predict_next(count=4)['timings']['rf'])\n"
+    )
+    root = os.path.join(os.path.dirname(__file__), '..')
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=120, cwd=tmp_path,
+                         env={**os.environ, 'PYTHONPATH': os.pathsep.join([os.path.join(root, 'src'), root])})
+
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == 'None'
+    assert time.perf_counter() - start < 60
+
+def test_member_registry(monkeypatch):
+    monkeypatch.setitem(MEMBERS, 'gap_vote', dict(MEMBERS['gap']))
+    assert resolve_members(['mc', 'gap_vote']) == ['mc', 'gap_vote']
+    with pytest.raises(ValueError, match="transformr"):
+        resolve_members(['mc', 'transformr'])
+    with pytest.raises(ValueError):
+        register_member('bad', 'gap', runner='gpu')
+
+    # XGBoost takes its own estimator count and never sees the RF one
+    xgb_args = MEMBERS['xgb']['train_args']({'n_estimators': 5, 'rf_n_estimators': 7, 'xgb_n_estimators': 9})
+    assert xgb_args == {'n_estimators': 9, 'xgb_n_estimators': 9}
+
+def test_backtest_with_selected_members(tmp_path, monkeypatch, fake_lottery):
+    monkeypatch.chdir(tmp_path)
+    result = EnsembleBacktester(fake_lottery(), 1, 20, 4, members=['mc', 'frequency', 'gap']).run(draws_to_test=3, verbose=False)
+
+    assert result['draws'] == 3
+    row = result['details'][0]
+    assert set(row['models']) == {'mc', 'frequency', 'gap'}
+    # Thresholds follow the member count: all three, two and one of three
+    assert set(row['consensus']) == {'3_of_3', '2_of_3', '1_of_3'}
+    assert set(row['hits']) == {'mc', 'frequency', 'gap', 'con_2', 'con_1'}
+    votes = [n for member in row['models'].values() for n in member]
+    assert sorted(row['consensus']['3_of_3']) == sorted(n for n in set(votes) if votes.count(n) == 3)
+    assert set(row['consensus']['1_of_3']) == set(votes)
+
+def test_backtest_default_consensus_keys(tmp_path, monkeypatch, fake_lottery):
+    monkeypatch.chdir(tmp_path)
+    # Five voters keep the historical 5/4/3-of-5 keys
+    for name in ('gap_a', 'gap_b'):
+        monkeypatch.setitem(MEMBERS, name, dict(MEMBERS['gap']))
+    result = EnsembleBacktester(fake_lottery(), 1, 20, 4, members=['mc', 'frequency', 'gap', 'gap_a', 'gap_b']).run(
+        draws_to_test=1, verbose=False)
+
+    row = result['details'][0]
+    assert set(row['consensus']) == {'5_of_5', '4_of_5', '3_of_5'}
+    assert {'con_4', 'con_3'} <= set(row['hits']) and 'con_5' not in row['hits']
+
+def test_failed_online_update_keeps_prediction(tmp_path, monkeypatch, capsys, fake_lottery):
+    monkeypatch.chdir(tmp_path)
+    from models.heuristic.gap import GapModel
+    monkeypatch.setitem(MEMBERS, 'gap_online', {**MEMBERS['gap'], 'online': True})
+    trains = []
+    original_train = GapModel.train
+    monkeypatch.setattr(GapModel, 'train', lambda self, data, **kw: (trains.append(len(data)), original_train(self, data, **kw)))
+    def failing_update(self, draw):
+        raise RuntimeError("update failed")
+    monkeypatch.setattr(GapModel, 'update', failing_update)
+
+    result = EnsembleBacktester(fake_lottery(), 1, 20, 4, members=['gap_online']).run(
+        draws_to_test=3, verbose=False, online=True)
+
+    # Every draw keeps its prediction, and the member is retrained before the next one
+    assert all(len(row['models']['gap_online']) == 4 for row in result['details'])
+    assert len(trains) == 3
+    assert "Error updating gap_online" in capsys.readouterr().err
+
+def test_tree_and_heuristic_members_do_not_import_tensorflow():
+    code = (
+        "import sys\n"
+        "from judge.members import create_member\n"
+        "import judge.ensemble, judge.backtest_ensemble, loterias\n"
+        "for name in ['mc', 'rf', 'frequency', 'gap', 'surfing']:\n"
+        "    create_member(name, 1, 20, 4)\n"
+        "print('tensorflow' in sys.modules)\n"
+    )
+    src = os.path.join(os.path.dirname(__file__), '..', 'src')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         env={**os.environ, 'PYTHONPATH': src})
+    assert out.stdout.strip() == 'False'
+
+def test_warm_members_are_reused(tmp_path, monkeypatch, fake_lottery):
+    monkeypatch.chdir(tmp_path)
+    lottery = fake_lottery()
+    predictor = EnsemblePredictor(lottery, 1, 20, 4, members=['gap'], canaries=[], keep_models=True)
+    predictor.predict_next(count=6)
+    model = predictor._warm['gap'][0]
+
+    lottery.draws.append([1, 2, 3, 4])
+    second = predictor.predict_next(count=6)
+    predictor.predict_next(count=6)
+    assert predictor._warm['gap'][:2] == (model, 81)
+
+    fresh = EnsemblePredictor(lottery, 1, 20, 4, members=['gap'], canaries=[], parallel=False).predict_next(count=6)
+    assert second['models'] == fresh['models']
+
+    # Repeated answers for the same draw are logged once (the fresh predictor logged draw 82 again)
+    ledger = PredictionLedger().fetch_history()
+    assert ledger['draw_number'].tolist() == [81, 82, 82]
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from data.features import (
+    build_incidence_matrix, build_number_features, build_training_set, draw_statistics,
+    build_draw_vectors, build_sequence_windows, IncrementalTrainingSet,
+    calculate_sum, count_odds, count_evens, calculate_spread
+)
+
+def _reference_features(draws, range_min, range_max, warmup):
+    # Straightforward draw-by-draw implementation the vectorized engine must match
+    gaps = {n: 0 for n in range(range_min, range_max + 1)}
+    freq = {n: 0 for n in range(range_min, range_max + 1)}
+    recent = {n: [] for n in range(range_min, range_max + 1)}
+    context = [0, 0, 0, 0]
+    X, y = [], []
+    for i, draw in enumerate(draws):
+        drawn = set(draw)
+        if i >= warmup:
+            for n in range(range_min, range_max + 1):
+                X.append([gaps[n], freq[n], sum(recent[n][-10:])] + context)
+                y.append(1 if n in drawn else 0)
+        for n in range(range_min, range_max + 1):
+            if n in drawn:
+                gaps[n] = 0
+                freq[n] += 1
+                recent[n].append(1)
+            else:
+                gaps[n] += 1
+                recent[n].append(0)
+        context = [calculate_sum(draw), count_odds(draw), count_evens(draw), calculate_spread(draw)]
+    return np.array(X), np.array(y)
+
+def test_incidence_matrix():
+    inc = build_incidence_matrix([[1, 3], [2, 3], []], 4)
+    assert inc.dtype == np.uint8
+    assert inc.tolist() == [[0, 1, 0, 1, 0], [0, 0, 1, 1, 0], [0, 0, 0, 0, 0]]
+
+def test_draw_statistics():
+    inc = build_incidence_matrix([[1, 2, 9], []], 10)
+    assert draw_statistics(inc).tolist() == [[12, 2, 1, 8], [0, 0, 0, 0]]
+
+def test_training_set_matches_reference():
+    rng = np.random.default_rng(7)
+    draws = [sorted(rng.choice(np.arange(1, 11), 3, replace=False).tolist()) for _ in range(70)]
+    X, y, next_features = build_training_set(pd.DataFrame({'dezenas': draws}), 1, 10, warmup=50)
+
+    ref_X, ref_y = _reference_features(draws, 1, 10, warmup=50)
+    np.testing.assert_array_equal(X, ref_X)
+    np.testing.assert_array_equal(y, ref_y)
+    assert next_features.shape == (10, 7)
+
+def test_never_drawn_gap_counts_all_draws():
+    inc = build_incidence_matrix([[1], [1], [1]], 3)
+    features = build_number_features(inc, 1, 3)
+    # Number 2 never appeared: gap equals the number of draws seen so far
+    assert features[:, 1, 0].tolist() == [0, 1, 2, 3]
+    assert features[:, 0, 0].tolist() == [0, 0, 0, 0]
+
+def test_draw_vectors_and_windows():
+    inc = build_incidence_matrix([[1, 2], [3, 4], [1, 4]], 4)
+    vectors = build_draw_vectors(inc, 2)
+    assert vectors.shape == (3, 9)
+    np.testing.assert_allclose(vectors[0], [0, 1, 1, 0, 0, 3 / 8, 1 / 2, 1 / 2, 1 / 4])
+
+    windows = build_sequence_windows(vectors, 2)
+    assert windows.shape == (2, 2, 9)
+    np.testing.assert_array_equal(windows[1], vectors[1:3])
+    assert build_sequence_windows(vectors, 4).shape == (0, 4, 9)
+
+def test_incremental_training_set_matches_fresh_build():
+    rng = np.random.default_rng(11)
+    draws = [sorted(rng.choice(np.arange(1, 11), 3, replace=False).tolist()) for _ in range(80)]
+    inc = build_incidence_matrix(draws, 10)
+
+    # Start before the warmup and recent window end, then append one draw at a time
+    incremental = IncrementalTrainingSet(inc[:5], 1, 10, warmup=50)
+    for i in range(5, len(draws)):
+        incremental.append(draws[i])
+        if i + 1 in (9, 10, 11, 50, 51, 80):
+            X, y, next_features = build_training_set(None, 1, 10, warmup=50, incidence=inc[:i + 1])
+            np.testing.assert_array_equal(incremental.X, X)
+            np.testing.assert_array_equal(incremental.y, y)
+            np.testing.assert_array_equal(incremental.next_features, next_features)
+    np.testing.assert_array_equal(incremental.history, inc)
+    # Buffers grow geometrically instead of being copied on every draw
+    assert len(incremental._history) >= len(inc) and len(incremental._history) < 2 * len(inc) + 5
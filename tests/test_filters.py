@@ -32,3 +32,35 @@ def test_combined_filters():
     assert f.validate([2, 4, 1]) is True # Sum 7, 1 odd -> OK
     assert f.validate([2, 4, 2]) is False # Sum 8, 0 odds -> Fail
     assert f.validate([5, 7]) is False # Sum 12, 2 odds -> Fail
+
+def _brute_force(f, range_min, range_max, k):
+    import itertools
+    return [list(c) for c in itertools.combinations(range(range_min, range_max + 1), k) if f.validate(list(c))]
+
+def test_count_matches_enumeration():
+    for spec in ["sum:20-30,odd:2", "even:1-2,sum:15-25", "odd:0", ""]:
+        f = PredictionFilter(spec)
+        assert f.count(1, 12, 4) == len(_brute_force(f, 1, 12, 4))
+
+def test_sample_is_valid_and_seeded():
+    f = PredictionFilter("sum:150-160,odd:4")
+    first = f.sample(1, 60, 6, seed=3)
+    assert f.validate(first) and len(set(first)) == 6
+    assert first == f.sample(1, 60, 6, seed=3)
+
+def test_nearest_keeps_most_numbers():
+    f = PredictionFilter("sum:20-30,odd:2")
+    valid = _brute_force(f, 1, 12, 4)
+    for numbers in ([1, 2, 3, 4], [9, 10, 11, 12], [1, 3, 5, 7]):
+        repaired = f.nearest(numbers, 1, 12)
+        assert repaired in valid
+        assert len(set(repaired) & set(numbers)) == max(len(set(c) & set(numbers)) for c in valid)
+
+def test_infeasible_filters():
+    import pytest
+    f = PredictionFilter("odd:5")
+    assert f.count(1, 10, 4) == 0
+    with pytest.raises(ValueError):
+        f.sample(1, 10, 4)
+    with pytest.raises(ValueError):
+        f.nearest([1, 2, 3, 4], 1, 10)
@@ -22,3 +22,19 @@ def test_quina_config():
     assert game.range_max == 80
     assert game.draw_count == 5
     assert game.slug == 'quina'
+
+def test_preprocess_caches_incidence():
+    import pandas as pd
+    game = Quina()
+    game.data = pd.DataFrame({
+        'Concurso': [1, 2, 3],
+        'Data Sorteio': ['01/01/2024', '02/01/2024', '03/01/2024'],
+        'Bola1': [1, 2, 1], 'Bola2': [5, 6, 7], 'Bola3': [10, 11, 12],
+        'Bola4': [20, 21, 22], 'Bola5': [80, 79, 78],
+    })
+    game.preprocess_data()
+
+    assert game.incidence.shape == (3, 81)
+    assert game.incidence[0, [1, 5, 10, 20, 80]].tolist() == [1, 1, 1, 1, 1]
+    assert game.count_between(0, 3)[1] == 2
+    assert game.count_between(1, 2)[1] == 0
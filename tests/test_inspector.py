@@ -85,5 +85,44 @@ class TestTrainingInspector(unittest.TestCase):
         # So it should be Epoch 1. 
         # Let's adjust expectation or data to be stricter.
         
+    def test_reads_training_logger_store(self):
+        from ops.logger import TrainingLogger
+        db = "tests/test_inspector_store.db"
+        logger = TrainingLogger(db)
+        try:
+            for epoch, val_loss in enumerate([0.5, 0.4, 0.3], start=1):
+                logger.log_epoch('lstm', epoch, {'loss': val_loss, 'val_loss': val_loss}, params_hash='h')
+            # close() writes the buffered epochs
+            logger.close()
+            runs = TrainingInspector(db).get_runs()
+            self.assertEqual(len(runs), 1)
+            self.assertEqual(runs[0]['total_epochs'], 3)
+            self.assertEqual(runs[0]['best_epoch'], 3)
+        finally:
+            os.remove(db)
+
+    def test_incremental_runs_match_full_parse(self):
+        cache = "tests/test_inspector_runs.pkl"
+        full = pd.read_csv(self.test_log)
+        try:
+            # First inspection sees the LSTM run and the start of the Transformer run
+            full.iloc[:8].to_csv(self.test_log, index=False)
+            first = TrainingInspector(self.test_log, cache_path=cache).get_runs()
+            self.assertEqual([r['total_epochs'] for r in first], [3, 5])
+
+            full.iloc[8:].to_csv(self.test_log, mode='a', header=False, index=False)
+            inspector = TrainingInspector(self.test_log, cache_path=cache)
+            self.assertEqual(inspector.get_runs(), TrainingInspector(self.test_log).get_runs())
+            self.assertEqual(inspector._state['cursor'], len(full))
+            self.assertEqual(len(inspector._state['tail']), 9) # the Transformer run may still grow
+
+            # A rewritten (shorter) log is parsed from scratch
+            full.iloc[:5].to_csv(self.test_log, index=False)
+            runs = TrainingInspector(self.test_log, cache_path=cache).get_runs()
+            self.assertEqual([r['model_type'] for r in runs], ['lstm'])
+        finally:
+            if os.path.exists(cache):
+                os.remove(cache)
+        
 if __name__ == '__main__':
     unittest.main()
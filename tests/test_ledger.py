@@ -2,9 +2,9 @@ import pytest
 import pandas as pd
 import os
 import shutil
-from src.judge.ledger import PredictionLedger
+from src.judge.ledger import PredictionLedger, COLUMNS
 
-TEST_LEDGER_FILE = "tests/data/test_ledger.csv"
+TEST_LEDGER_FILE = "tests/data/test_ledger.db"
 
 @pytest.fixture
 def ledger():
@@ -16,14 +16,16 @@ def ledger():
     yield ledger
     
     # Teardown
+    ledger.close()
     if os.path.exists("tests/data"):
         shutil.rmtree("tests/data")
 
 def test_ledger_creation(ledger):
     assert os.path.exists(TEST_LEDGER_FILE)
-    df = pd.read_csv(TEST_LEDGER_FILE)
+    df = ledger.fetch_history()
     expected_cols = ["timestamp", "game", "draw_number", "model_name", "predicted_numbers", "outcome", "metadata"]
     assert list(df.columns) == expected_cols
+    assert df.empty
 
 def test_log_prediction(ledger):
     ledger.log_prediction(
@@ -34,7 +36,7 @@ def test_log_prediction(ledger):
         metadata={"version": "v1"}
     )
     
-    df = pd.read_csv(TEST_LEDGER_FILE)
+    df = ledger.fetch_history()
     assert len(df) == 1
     assert df.iloc[0]['model_name'] == "test_model"
     assert df.iloc[0]['game'] == "megasena"
@@ -62,3 +64,48 @@ def test_get_last_draw(ledger):
     
     assert ledger.get_last_draw_number("g") == 25
     assert ledger.get_last_draw_number("other") == 0
+
+def test_log_predictions_batch(ledger):
+    ledger.log_predictions([
+        {"model_name": "rf", "game": "megasena", "draw_number": 101, "predicted_numbers": [6, 5, 4]},
+        {"model_name": "gap_canary", "game": "megasena", "draw_number": 101, "predicted_numbers": [1, 2, 3],
+         "metadata": {"type": "heuristic_canary"}},
+    ])
+
+    df = ledger.fetch_history(game="megasena")
+    assert df['model_name'].tolist() == ["rf", "gap_canary"]
+    assert df['predicted_numbers'].tolist() == ["[4, 5, 6]", "[1, 2, 3]"]
+    assert pd.isna(df.iloc[0]['metadata'])
+    assert ledger.get_last_draw_number("megasena") == 101
+
+def test_csv_ledger_is_migrated_once():
+    # Older CSV ledgers may predate the metadata column
+    os.makedirs("tests/data", exist_ok=True)
+    legacy = "tests/data/legacy_ledger.csv"
+    pd.DataFrame({
+        "timestamp": ["2024-01-01T00:00:00", "2024-01-02T00:00:00"],
+        "game": ["megasena", "lotofacil"],
+        "draw_number": [2700, 3000],
+        "model_name": ["rf", "lstm"],
+        "predicted_numbers": ["[1, 2, 3, 4, 5, 6]", "[1, 2, 3]"],
+        "outcome": ["", ""],
+    }).to_csv(legacy, index=False)
+
+    try:
+        ledger = PredictionLedger(filepath=legacy)
+        assert ledger.filepath == "tests/data/legacy_ledger.db"
+        df = ledger.fetch_history()
+        assert list(df.columns) == COLUMNS
+        assert df['draw_number'].tolist() == [2700, 3000]
+        assert df[['outcome', 'metadata']].isna().all().all()
+        assert ledger.get_last_draw_number("megasena") == 2700
+        ledger.log_prediction("rf", "megasena", 2701, [7, 8])
+        ledger.close()
+
+        # Reopening must not import the CSV again
+        ledger = PredictionLedger(filepath=legacy)
+        assert len(ledger.fetch_history()) == 3
+        assert os.path.exists(legacy)
+        ledger.close()
+    finally:
+        shutil.rmtree("tests/data")
@@ -4,7 +4,7 @@ import shutil
 import pandas as pd
 from ops.logger import TrainingLogger
 
-TEST_LOG_FILE = "tests/data/test_training_log.csv"
+TEST_LOG_FILE = "tests/data/test_training_log.db"
 
 @pytest.fixture
 def logger():
@@ -12,19 +12,20 @@ def logger():
         os.remove(TEST_LOG_FILE)
     logger = TrainingLogger(filepath=TEST_LOG_FILE)
     yield logger
+    logger.close()
     if os.path.exists("tests/data"):
         shutil.rmtree("tests/data")
 
 def test_logger_creation(logger):
     assert os.path.exists(TEST_LOG_FILE)
-    df = pd.read_csv(TEST_LOG_FILE)
+    df = logger.get_history()
     assert "val_loss" in df.columns
 
 def test_log_epoch(logger):
     metrics = {"loss": 0.5, "accuracy": 0.8, "val_loss": 0.6, "val_accuracy": 0.7}
     logger.log_epoch("lstm", 1, metrics, params_hash="abc", metadata={"lr": 0.001})
     
-    df = pd.read_csv(TEST_LOG_FILE)
+    df = logger.get_history()
     assert len(df) == 1
     assert df.iloc[0]['model_type'] == "lstm"
     assert df.iloc[0]['epoch'] == 1
@@ -41,3 +42,61 @@ def test_get_history(logger):
     
     df_hash = logger.get_history(params_hash="xyz")
     assert len(df_hash) == 1
+
+def test_callback_logs_throughput(logger):
+    import json
+    from ops.callbacks import TrainingLoggerCallback
+    
+    cb = TrainingLoggerCallback(logger, "lstm", metadata={"context": "geral"}, batch_size=32)
+    cb.on_epoch_begin(0)
+    for batch in range(4):
+        cb.on_train_batch_end(batch)
+    cb.on_epoch_end(0, logs={"loss": 0.5})
+    cb.on_train_end()
+    
+    # on_train_end flushed the buffer: a separate reader sees the epoch
+    reader = TrainingLogger(filepath=TEST_LOG_FILE)
+    metadata = json.loads(reader.get_history().iloc[0]['metadata'])
+    reader.close()
+    assert metadata["context"] == "geral"
+    assert metadata["epoch_seconds"] >= 0
+    assert "batches_per_second" in metadata and "samples_per_second" in metadata
+
+def test_epochs_are_buffered_until_flush(logger):
+    logger.log_epoch("lstm", 1, {"loss": 0.5}, params_hash="abc")
+    logger.log_epoch("lstm", 2, {"loss": 0.4}, params_hash="abc")
+
+    def stored():
+        return logger._connect().execute("SELECT COUNT(*) FROM epochs").fetchone()[0]
+
+    assert stored() == 0
+    logger.flush()
+    assert stored() == 2
+
+    logger.flush_interval = 0 # every epoch is due
+    logger.log_epoch("lstm", 3, {"loss": 0.3}, params_hash="abc")
+    assert stored() == 3
+
+def test_csv_log_is_migrated():
+    os.makedirs("tests/data", exist_ok=True)
+    legacy = "tests/data/legacy_training_log.csv"
+    pd.DataFrame({
+        "timestamp": ["2024-01-01T00:00:00", "2024-01-01T00:01:00"],
+        "model_type": ["lstm", "lstm"], "epoch": [1, 2],
+        "loss": [0.5, 0.4], "accuracy": [None, None], "val_loss": [0.6, 0.5], "val_accuracy": [None, None],
+        "params_hash": ["abc", "abc"], "metadata": ['{"context": "geral"}', None],
+    }).to_csv(legacy, index=False)
+
+    try:
+        logger = TrainingLogger(filepath=legacy)
+        df = logger.get_history(model_type="lstm", params_hash="abc")
+        assert df['epoch'].tolist() == [1, 2]
+        assert df['val_loss'].tolist() == [0.6, 0.5]
+        assert df['accuracy'].isna().all()
+        logger.close()
+
+        logger = TrainingLogger(filepath=legacy)
+        assert len(logger.get_history()) == 2
+        logger.close()
+    finally:
+        shutil.rmtree("tests/data")
@@ -56,3 +56,65 @@ def test_train_and_predict(mock_data):
     # Check values in range
     for num in prediction:
         assert 0 <= num <= 10
+
+def test_compiled_inference_and_save_load(mock_data, tmp_path):
+    model = LSTMModel(range_min=1, range_max=10, draw_count=6)
+    model.window_size = 3
+    model.train(mock_data, epochs=1, batch_size=4)
+    
+    prediction = model.predict(count=6)
+    # The traced function is reused and gives the same scores as an eager call
+    assert model.predict(count=6) == prediction
+    window = model._encode(mock_data)[-3:][None, :, :]
+    np.testing.assert_allclose(model._inference_fn()(window).numpy(), model.model(window, training=False).numpy(), rtol=1e-5)
+    
+    path = str(tmp_path / "lstm.pkl")
+    model.save(path)
+    loaded = LSTMModel(range_min=1, range_max=10, draw_count=6)
+    loaded.load(path)
+    assert loaded.predict(count=6) == prediction
+
+def test_window_dataset_matches_prepared_sequences(mock_data):
+    from models.deep.sequences import window_dataset
+    model = LSTMModel(range_min=1, range_max=10, draw_count=6)
+    model.window_size = 5
+    X, y = model._prepare_sequences(mock_data)
+    
+    batches = list(window_dataset(model._encode(mock_data), 5, 11, batch_size=4, shuffle=False))
+    np.testing.assert_array_equal(np.concatenate([b[0].numpy() for b in batches]), X)
+    np.testing.assert_array_equal(np.concatenate([b[1].numpy() for b in batches]), y)
+
+def test_window_dataset_shuffle_is_seeded(mock_data):
+    from models.deep.sequences import window_dataset
+    vectors = LSTMModel(range_min=1, range_max=10, draw_count=6)._encode(mock_data)
+    
+    def first_epoch(seed):
+        return np.concatenate([b[1].numpy() for b in window_dataset(vectors, 5, 11, batch_size=4, seed=seed)])
+    
+    np.testing.assert_array_equal(first_epoch(3), first_epoch(3))
+    assert first_epoch(3).dtype == np.float32
+
+def test_numpy_pipeline_option(mock_data):
+    model = LSTMModel(range_min=1, range_max=10, draw_count=6)
+    model.window_size = 3
+    assert model.train(mock_data, epochs=1, batch_size=4, pipeline='numpy') is not None
+    with pytest.raises(ValueError):
+        model.train(mock_data, epochs=1, pipeline='pandas')
+
+def test_online_update_fine_tunes_newest_window(mock_data):
+    model = LSTMModel(range_min=1, range_max=10, draw_count=6)
+    model.window_size = 3
+    model.train(mock_data, epochs=1, batch_size=4, fine_tune_steps=2, fine_tune_windows=2)
+    assert len(model.recent_draws) == 5
+    
+    before = [w.copy() for w in model.model.get_weights()]
+    model.update([1, 2, 3, 4, 5, 6])
+    
+    assert model.last_window[-1] == [1, 2, 3, 4, 5, 6]
+    assert len(model.recent_draws) == 5
+    assert any(not np.allclose(a, b) for a, b in zip(before, model.model.get_weights()))
+    assert len(model.predict(count=6)) == 6
+
+def test_update_requires_training():
+    with pytest.raises(ValueError):
+        LSTMModel(range_min=1, range_max=10, draw_count=6).update([1, 2, 3, 4, 5, 6])
@@ -1,6 +1,7 @@
 import pytest
+import numpy as np
 import pandas as pd
-from models import RandomModel, FrequencyModel, GapModel, SurfingModel
+from models import RandomModel, FrequencyModel, GapModel, SurfingModel, MonteCarloModel
 
 @pytest.fixture
 def mock_data():
@@ -153,3 +154,125 @@ def test_surfing_model_default_window(gap_mock_data):
     prediction = model.predict(count=1)
     # Should default to 1 because tie-break asc
     assert prediction == [1]
+
+
+@pytest.mark.parametrize("range_max,draw_count", [(60, 6), (25, 15)])
+def test_monte_carlo_seeded_and_valid(range_max, draw_count):
+    """Both simulation paths (rejection and random ordering) yield reproducible in-range picks."""
+    draws = [list(range(i % 5 + 1, i % 5 + 1 + draw_count)) for i in range(40)]
+    model = MonteCarloModel(range_min=1, range_max=range_max, draw_count=draw_count)
+    model.train(pd.DataFrame({'dezenas': draws}))
+
+    pred = model.predict(seed=7, simulations=50000, chunk_size=7000)
+    assert pred == model.predict(seed=7, simulations=50000, chunk_size=7000)
+    assert len(set(pred)) == draw_count
+    assert all(1 <= n <= range_max for n in pred)
+
+def test_monte_carlo_simulated_draws_are_unique():
+    model = MonteCarloModel(range_min=1, range_max=60, draw_count=6)
+    draws = model._simulate(np.random.default_rng(0), 10000)
+    assert draws.shape[1] == 6
+    assert all(len(set(row)) == 6 for row in draws.tolist())
+    assert draws.min() >= 0 and draws.max() <= 59
+
+
+def test_monte_carlo_training_histograms():
+    import statistics
+    draws = [[1, 2, 9], [3, 4, 10], [5, 7, 8], [2, 6, 10]]
+    model = MonteCarloModel(range_min=1, range_max=10, draw_count=3)
+    model.train(pd.DataFrame({'dezenas': draws}))
+
+    sums = [sum(d) for d in draws]
+    assert model.sum_hist[12] == 1 and model.sum_hist.sum() == 4
+    assert model.sum_stats['mean'] == pytest.approx(statistics.mean(sums))
+    assert model.sum_stats['stdev'] == pytest.approx(statistics.stdev(sums))
+    assert model.odd_probs == {0: 0.25, 1: 0.25, 2: 0.5}
+
+    model.update([1, 3, 10])
+    spreads = [max(d) - min(d) for d in draws + [[1, 3, 10]]]
+    assert model.spread_stats['stdev'] == pytest.approx(statistics.stdev(spreads))
+
+def test_heuristic_updates_match_retraining(gap_mock_data):
+    """update(draw) on the array-backed state must equal training on the extended history."""
+    draws = gap_mock_data['dezenas'].tolist()
+    extra = [[2, 9, 10], [1, 2, 3], [4, 11, 0], [5, 6, 7]] # out-of-range numbers are ignored
+
+    for cls in (GapModel, FrequencyModel, SurfingModel):
+        updated = cls(range_min=1, range_max=10, draw_count=3)
+        updated.train(gap_mock_data)
+        for draw in extra:
+            updated.update(draw)
+
+        retrained = cls(range_min=1, range_max=10, draw_count=3)
+        retrained.train(pd.DataFrame({'dezenas': draws + [[n for n in d if 1 <= n <= 10] for d in extra]}))
+
+        for window in (None, 1, 3, 100):
+            kwargs = {'window': window} if window else {}
+            assert updated.predict(count=3, **kwargs) == retrained.predict(count=3, **kwargs), cls.__name__
+
+    np.testing.assert_array_equal(updated.prefix_counts, retrained.prefix_counts)
+    assert updated.window_counts(2).tolist() == [0, 0, 0, 1, 1, 1, 1, 0, 0, 0]
+
+def test_heuristic_pickle_round_trip(gap_mock_data, tmp_path):
+    for cls in (GapModel, FrequencyModel, SurfingModel):
+        model = cls(range_min=1, range_max=10, draw_count=3)
+        model.train(gap_mock_data)
+        for draw in ([2, 9, 10], [1, 2, 3], [5, 6, 7]):
+            model.update(draw)
+        path = str(tmp_path / f"{cls.__name__}.pkl")
+        model.save(path)
+
+        loaded = cls(range_min=1, range_max=10, draw_count=3)
+        loaded.load(path)
+        assert loaded.predict(count=3) == model.predict(count=3), cls.__name__
+        loaded.update([4, 8, 10])
+        model.update([4, 8, 10])
+        assert loaded.predict(count=3) == model.predict(count=3), cls.__name__
+
+    # Only the filled rows of Surfing's doubling buffer are pickled
+    assert len(model.__getstate__()['_prefix']) == model.total_draws + 1 < len(model._prefix)
+
+def test_legacy_heuristic_states_are_converted(gap_mock_data):
+    """Pickles written before the array state (gaps/weights/frequencies attributes) still load."""
+    base = {'name': 'legacy', 'range_min': 1, 'range_max': 10, 'draw_count': 3}
+    trained = {}
+    for cls in (GapModel, FrequencyModel, SurfingModel):
+        trained[cls] = cls(range_min=1, range_max=10, draw_count=3)
+        trained[cls].train(gap_mock_data)
+
+    legacy_states = [
+        (GapModel, {**base, 'gaps': trained[GapModel].gaps}),
+        (FrequencyModel, {**base, 'weights': trained[FrequencyModel].weights, 'counts': trained[FrequencyModel].counts.copy()}),
+        (SurfingModel, {**base, 'window_size': 30, 'frequencies': trained[SurfingModel].frequencies,
+                        'prefix_counts': trained[SurfingModel].prefix_counts.copy()}),
+        (SurfingModel, {**base, 'window_size': 30, 'frequencies': trained[SurfingModel].frequencies, 'data': gap_mock_data}),
+    ]
+    for cls, state in legacy_states:
+        legacy = cls.__new__(cls)
+        legacy.__setstate__(dict(state))
+        reference = cls(range_min=1, range_max=10, draw_count=3)
+        reference.train(gap_mock_data)
+        for draw in (None, [2, 9, 10], [4, 8, 10]):
+            if draw:
+                legacy.update(draw)
+                reference.update(draw)
+            for kwargs in ({}, {'window': 2}):
+                assert legacy.predict(count=3, **kwargs) == reference.predict(count=3, **kwargs), cls.__name__
+        assert not {'gaps', 'weights', 'frequencies', 'prefix_counts', 'data'} & set(vars(legacy))
+
+def test_weights_only_frequency_pickle_is_refused(gap_mock_data, tmp_path):
+    """The oldest Frequency pickles only had normalized weights: counts cannot be recovered."""
+    import pickle
+    from core.base import IncompatibleSnapshotError
+
+    trained = FrequencyModel(range_min=1, range_max=10, draw_count=3)
+    trained.train(gap_mock_data)
+    legacy = FrequencyModel.__new__(FrequencyModel)
+    legacy.__dict__.update({'name': 'Frequency Model', 'range_min': 1, 'range_max': 10, 'draw_count': 3,
+                            'weights': trained.weights})
+    path = str(tmp_path / "legacy_frequency.pkl")
+    with open(path, 'wb') as f:
+        pickle.dump(legacy, f)
+
+    with pytest.raises(IncompatibleSnapshotError, match="retrain"):
+        FrequencyModel(range_min=1, range_max=10, draw_count=3).load(path)
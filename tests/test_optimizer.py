@@ -1,3 +1,5 @@
+import random
+import numpy as np
 import pytest
 from unittest.mock import MagicMock, patch
 from ops.optimizer import GeneticOptimizer
@@ -44,14 +46,41 @@ def test_calculate_fitness(mock_backtester_cls, mock_lottery, game_config):
     # Score should be > 0 (Quadra bonus)
     assert score > 0
 
-@patch('ops.optimizer.Backtester')
-def test_optimize_flow(mock_backtester_cls, mock_lottery, game_config):
-    # Mock return
-    mock_instance = mock_backtester_cls.return_value
-    mock_instance.run.return_value = {'hits_distribution': {0: 50}} # Zero hits
+def test_cached_scores_match_backtester(game_config, fake_lottery):
+    opt = GeneticOptimizer(fake_lottery(n_draws=120, range_max=60, draw_count=6, seed=3), game_config, draws_to_test=30)
+    individuals = [[1.0, 1.0, 1.0], [0.0, 3.5, 0.2], [7.25, 0.0, 2.0], [0.0, 0.0, 0.0]]
+    
+    # The vectorized evaluation must reproduce the hybrid backtest exactly (including tie-breaks)
+    fast = opt.evaluate_weights(individuals)
+    assert fast.tolist() == [opt._calculate_fitness(ind) for ind in individuals]
+    assert opt._component_scores()[0].shape == (30, 3, 60)
+
+def test_fitness_is_memoized(game_config, fake_lottery):
+    opt = GeneticOptimizer(fake_lottery(n_draws=120, range_max=60, draw_count=6, seed=3), game_config, draws_to_test=10)
+    with patch.object(opt, 'evaluate_weights', wraps=opt.evaluate_weights) as evaluate:
+        first = opt._fitness([[1.0, 2.0, 3.0], [3.0, 2.0, 1.0]])
+        # Same weights after rounding (and the repeated elite) are served from the cache
+        again = opt._fitness([[1.00001, 2.0, 3.0], [3.0, 2.0, 1.0], [0.5, 0.5, 0.5]])
+    
+    assert again[:2] == first
+    assert [len(call.args[0]) for call in evaluate.call_args_list] == [2, 1]
+
+def test_optimize_flow(game_config, fake_lottery):
+    random.seed(0)
     
     # Run small optimization
-    opt = GeneticOptimizer(mock_lottery, game_config, population_size=4, generations=2)
+    opt = GeneticOptimizer(fake_lottery(n_draws=120, range_max=60, draw_count=6, seed=3), game_config, population_size=4, generations=2)
     best_weights = opt.optimize()
     
     assert len(best_weights) == 3
+    assert tuple(round(w, 4) for w in best_weights) in opt._fitness_cache
+
+def test_grid_search(game_config, fake_lottery):
+    opt = GeneticOptimizer(fake_lottery(n_draws=120, range_max=60, draw_count=6, seed=3), game_config, draws_to_test=20)
+    best = opt.grid_search(steps=5)
+    
+    axis = np.linspace(0.0, 10.0, 5)
+    grid = np.array([[g, f, s] for g in axis for f in axis for s in axis])
+    fitness = opt.evaluate_weights(grid, chunk_size=7) # chunking must not change the scores
+    assert best == grid[np.argmax(fitness)].tolist()
+    assert fitness.max() == opt._calculate_fitness(best)
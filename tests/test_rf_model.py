@@ -36,3 +36,40 @@ def test_rf_predict_untrained():
     model = RandomForestModel(1, 10, 2)
     with pytest.raises(ValueError):
         model.predict()
+
+def test_rf_legacy_snapshot_is_refused(mock_data, tmp_path):
+    import pickle
+    from core.base import IncompatibleSnapshotError
+
+    # Snapshots from before the feature engine: final_* state only, no next_features
+    legacy = RandomForestModel.__new__(RandomForestModel)
+    legacy.__dict__.update({'name': "Random Forest Model", 'range_min': 1, 'range_max': 10, 'draw_count': 2,
+                            'trained': True, 'final_gaps': {}, 'final_freq': {}, 'final_freq10': {},
+                            'last_draw_features': [0, 0, 0, 0]})
+    path = str(tmp_path / "legacy_rf.pkl")
+    with open(path, 'wb') as f:
+        pickle.dump(legacy, f)
+
+    with pytest.raises(IncompatibleSnapshotError, match="retrain"):
+        RandomForestModel(1, 10, 2).load(path)
+
+def test_rf_history_snapshot_regains_training_set(mock_data, tmp_path):
+    import pickle
+    from data.features import build_incidence_matrix
+
+    model = RandomForestModel(1, 10, 2)
+    model.train(mock_data)
+    path = str(tmp_path / "rf.pkl")
+    model.save(path)
+
+    # Snapshots that stored the raw history instead of the incremental training set still update
+    with open(path, 'rb') as f:
+        state = pickle.load(f).__dict__
+    state = {**state, 'history': model.features.history}
+    del state['features']
+    converted = RandomForestModel.__new__(RandomForestModel)
+    converted.__setstate__(state)
+    np.testing.assert_array_equal(converted.features.history, build_incidence_matrix(mock_data['dezenas'].tolist(), 10))
+    converted.update([1, 2])
+    model.update([1, 2])
+    assert converted.predict() == model.predict()
@@ -0,0 +1,127 @@
+import json
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+import pytest
+from data.manager import DataManager
+from cli.server import PredictionService, make_server, main, parse_args, service_from_args
+
+def _write_megasena(path, n_draws, seed=0):
+    rng = np.random.default_rng(seed)
+    draws = [sorted(rng.choice(np.arange(1, 61), 6, replace=False)) for _ in range(n_draws)]
+    pd.DataFrame({
+        'Concurso': range(1, n_draws + 1),
+        'Data do Sorteio': ['01/01/2024'] * n_draws,
+        **{f'Bola{j + 1}': [int(d[j]) for d in draws] for j in range(6)},
+    }).to_csv(path / 'megasena.csv', index=False)
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    _write_megasena(tmp_path, 60)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(DataManager, "cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(DataManager, "mirror", str(tmp_path))
+    monkeypatch.setattr(DataManager, "offline", False)
+    monkeypatch.setattr(DataManager, "_fetched", {})
+    return tmp_path
+
+def test_cached_model_follows_new_draws(mirror):
+    service = PredictionService(refresh_interval=0)
+    first = service.handle('/predict', {'game': 'megasena', 'model': 'frequency', 'count': '6'})
+    model = service._games['megasena']['models'][('frequency', ())]
+
+    # Publish more draws: the ingest event advances the cached model with update(), not a rebuild
+    _write_megasena(mirror, 80)
+    second = service.handle('/predict', {'game': 'megasena', 'model': 'frequency', 'count': '6'})
+    assert service._games['megasena']['models'][('frequency', ())] is model
+    assert model.counts.sum() == 80 * 6
+
+    fresh = PredictionService().handle('/predict', {'game': 'megasena', 'model': 'frequency', 'count': '6'})
+    assert second['numbers'] == fresh['numbers']
+    assert len(first['numbers']) == 6
+
+def test_results_are_cached_until_new_draws(mirror):
+    service = PredictionService(refresh_interval=3600)
+    report = service.handle('/analyze', {'game': 'megasena', 'draws': '50'})
+    assert report['total_draws'] == 50
+    assert service.handle('/analyze', {'game': 'megasena', 'draws': '50'}) is report
+
+    summary = service.handle('/backtest', {'game': 'megasena', 'model': 'gap', 'draws': '5', 'count': '6'})
+    assert summary['total_bets'] == 5
+    assert 'details' not in summary
+
+def test_http_endpoints(mirror):
+    server = make_server(PredictionService(), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/predict?game=megasena&model=gap&count=6&filters=odd:3") as response:
+            body = json.load(response)
+        assert body['model'] == 'gap'
+        assert sum(n % 2 for n in body['numbers']) == 3
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/predict?game=lotomania")
+        assert error.value.code == 400
+        with urllib.request.urlopen(f"{base}/health") as response:
+            assert json.load(response)['games'] == {'megasena': 60}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_snapshot_option_reaches_the_ensemble(mirror):
+    from core.games.megasena import MegaSena
+    from models import GapModel
+
+    # A gap snapshot trained on the first 20 draws only, so its vote differs from a fresh training
+    snapshot = GapModel(1, 60, 6)
+    snapshot.train(MegaSena().preprocess_data().iloc[:20])
+    path = str(mirror / "gap_snapshot.pkl")
+    snapshot.save(path)
+
+    args = parse_args(['--port', '0', '--members', 'gap,frequency', '--snapshot', f'megasena:gap:{path}'])
+    service = service_from_args(args)
+    assert service.snapshot_paths == {'megasena': {'gap': path}}
+    assert service.model_args == {'epochs': 50}
+
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/ensemble?game=megasena&count=6"
+        with urllib.request.urlopen(url) as response:
+            body = json.load(response)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert body['models']['gap'] == snapshot.predict(count=6)
+
+@pytest.mark.parametrize("spec", ["lotomania:gap:x.pkl", "megasena:nope:x.pkl", "megasena:gap"])
+def test_invalid_snapshot_option_exits(spec, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['--snapshot', spec])
+    assert exit_info.value.code == 1
+    assert "Error:" in capsys.readouterr().err
+
+def test_cache_miss_trains_from_cached_incidence(mirror, monkeypatch):
+    from models import GapModel
+
+    seen = []
+    original_train = GapModel.train
+    monkeypatch.setattr(GapModel, 'train', lambda self, data, **kw: (seen.append(kw.get('incidence')), original_train(self, data, **kw)))
+    service = PredictionService()
+    service.handle('/predict', {'game': 'megasena', 'model': 'gap', 'count': '6'})
+    assert seen[0] is service._games['megasena']['lottery'].incidence
+
+def test_fine_tuned_models_are_retrained_after_new_draws(mirror):
+    service = PredictionService(refresh_interval=0)
+    service.handle('/predict', {'game': 'megasena', 'model': 'gap', 'count': '6'})
+    state = service._games['megasena']
+    # Stand-in for a cached deep model: its update() would only fine-tune
+    state['models'][('lstm', ())] = object()
+
+    _write_megasena(mirror, 70)
+    service.handle('/health', {})
+    service.handle('/predict', {'game': 'megasena', 'model': 'gap', 'count': '6'})
+    assert ('lstm', ()) not in state['models']
+    assert ('gap', ()) in state['models']
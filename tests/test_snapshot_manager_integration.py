@@ -3,6 +3,7 @@ import os
 import shutil
 import pandas as pd
 from ops.snapshot import SnapshotManager
+from ops.logger import TrainingLogger
 from core.base import Lottery
 
 class MockLottery(Lottery):
@@ -33,14 +34,14 @@ class TestSnapshotManagerIntegration(unittest.TestCase):
         # Override logger path strictly for test?
         # SnapshotManager uses global logger import which uses default path.
         # Ideally we'd patch TrainingLogger, but let's check the real file.
-        # We'll rely on it writing to data/training_log.csv and cleanup not strictly necessary 
+        # We'll rely on it writing to data/training_log.db and cleanup not strictly necessary 
         # for personal dev env, but good practice.
         # Or better: patch TrainingLogger in SnapshotManager?
         
         # For simplicity in this environment, I'll let it write to real log and check it.
         # Actually, let's backup real log if exists.
-        self.real_log = "data/training_log.csv"
-        self.real_log_bak = "data/training_log.csv.bak"
+        self.real_log = "data/training_log.db"
+        self.real_log_bak = "data/training_log.db.bak"
         if os.path.exists(self.real_log):
             os.rename(self.real_log, self.real_log_bak)
 
@@ -67,7 +68,9 @@ class TestSnapshotManagerIntegration(unittest.TestCase):
         
         # Check if log file exists and has rows
         self.assertTrue(os.path.exists(self.real_log))
-        df = pd.read_csv(self.real_log)
+        logger = TrainingLogger(self.real_log)
+        df = logger.get_history()
+        logger.close()
         self.assertGreater(len(df), 0)
         self.assertTrue((df['model_type'] == 'transformer').any())
         self.assertTrue((df['epoch'] == 1).any())